@@ -0,0 +1,447 @@
+# Advent of Code "Trophy"
+# 2023 Edition
+# Day 14 (rocks falling) puzzle logic, with no display code
+#   shared by code.py on the PyBadge and by the host-side tools in host-tools/
+#   a grid is a 2D int8 array (ulab.numpy on the badge, numpy on a host),
+#   indexed [row,col] with row 0 at the top
+
+try:
+    import ulab.numpy as np
+except ImportError:
+    import numpy as np # host side
+
+# cell values and fall directions, same values as DEMO_V_* and DEMO_FALL_* in code.py
+V_EMPTY = 0
+V_ROCK  = 1
+V_CUBE  = 2
+
+FALL_DOWN  = 1
+FALL_LEFT  = 2
+FALL_RIGHT = 3
+FALL_UP    = 4
+
+FALL_OFFSET = (None,(1,0),(0,-1),(0,1),(-1,0)) # (row,col) step of a falling rock, indexed by FALL_*
+
+# read a text layout, "O" for rock, "#" for cube, "." for empty
+#   returns the grid, sized by the file
+def read_layout(filename):
+    lines = list()
+    with open(filename) as f:
+        for line in f:
+            line = line.strip()
+            if len(line) > 0:
+                lines.append(line)
+
+    grid = np.zeros((len(lines),len(lines[0])),dtype=np.int8)
+    for (irow,line) in enumerate(lines):
+        if len(line) != len(lines[0]):
+            raise ValueError("row %d has %d columns, expected %d"%(irow,len(line),len(lines[0])))
+        for (icol,c) in enumerate(line):
+            if c == 'O':
+                grid[irow,icol] = V_ROCK
+            elif c == '#':
+                grid[irow,icol] = V_CUBE
+            elif c != '.':
+                raise ValueError("Unrecognized symbol: %s"%c)
+
+    return grid
+
+# BINARY LAYOUT ---------------------------------------------------------------
+#   made from a text layout by host-tools/day14_pack.py, so that a big input is 
+#   not text-parsed on the badge:
+#     header, 8 bytes: LAYOUT_MAGIC, then n_rows and n_cols as little-endian uint16
+#     rock layer: n_rows rows of layout_row_bytes(n_cols) bytes, the bit for 
+#       column icol is bit icol%8 of byte icol//8 of its row, unused bits are 0
+#     cube layer: same as the rock layer
+
+LAYOUT_MAGIC = b"D14L"
+LAYOUT_HEADER_SIZE = 8
+LAYOUT_MAX_SIZE = 100 # rows or columns, the size of a real puzzle input
+
+def layout_row_bytes(n_cols):
+    return (n_cols+7)//8
+
+# size of a binary layout file of n_rows x n_cols, header included
+def layout_bin_size(n_rows, n_cols):
+    return LAYOUT_HEADER_SIZE + 2*n_rows*layout_row_bytes(n_cols)
+
+# binary layout of grid, as bytes
+def pack_layout(grid):
+    (n_rows,n_cols) = grid.shape
+    n_bytes = layout_row_bytes(n_cols)
+    buf = bytearray(layout_bin_size(n_rows,n_cols))
+    buf[0:4] = LAYOUT_MAGIC
+    buf[4:8] = bytes((n_rows & 0xFF,n_rows >> 8,n_cols & 0xFF,n_cols >> 8))
+    for (layer,value) in enumerate((V_ROCK,V_CUBE)):
+        offset = LAYOUT_HEADER_SIZE + layer*n_rows*n_bytes
+        for irow in range(n_rows):
+            for icol in range(n_cols):
+                if grid[irow,icol] == value:
+                    buf[offset+irow*n_bytes+icol//8] |= 1 << (icol%8)
+    return bytes(buf)
+
+# read a binary layout with one readinto into buf (allocated for the largest 
+#   layout if not given), the header is checked against the number of bytes read.
+#   returns the grid, like read_layout()
+def read_layout_bin(filename, buf=None):
+    if buf is None:
+        buf = bytearray(layout_bin_size(LAYOUT_MAX_SIZE,LAYOUT_MAX_SIZE))
+    with open(filename,"rb") as f:
+        n_read = f.readinto(buf)
+        if n_read == len(buf) and len(f.read(1)) > 0:
+            raise ValueError("layout file is larger than the %d byte buffer"%len(buf))
+    return unpack_layout(buf,n_read)
+
+# grid of the binary layout in the first n_read bytes of buf (a file read by 
+#   read_layout_bin(), or a board sent over the data link), raises ValueError 
+#   unless it is exactly one layout
+def unpack_layout(buf, n_read):
+    if n_read < LAYOUT_HEADER_SIZE or bytes(buf[0:4]) != LAYOUT_MAGIC:
+        raise ValueError("not a binary layout file")
+    n_rows = buf[4] | (buf[5] << 8)
+    n_cols = buf[6] | (buf[7] << 8)
+    if n_rows == 0 or n_cols == 0 or n_read != layout_bin_size(n_rows,n_cols):
+        raise ValueError("header says %dx%d, which does not match the %d bytes read"%(n_rows,n_cols,n_read))
+
+    grid = np.zeros((n_rows,n_cols),dtype=np.int8)
+    n_bytes = layout_row_bytes(n_cols)
+    for (layer,value) in enumerate((V_ROCK,V_CUBE)):
+        offset = LAYOUT_HEADER_SIZE + layer*n_rows*n_bytes
+        for irow in range(n_rows):
+            for ibyte in range(n_bytes):
+                bits = buf[offset+irow*n_bytes+ibyte]
+                icol = 8*ibyte
+                while bits: # only the set bits cost anything
+                    if bits & 1:
+                        if icol >= n_cols or grid[irow,icol] != V_EMPTY:
+                            raise ValueError("bad cell (%d,%d) in binary layout"%(irow,icol))
+                        grid[irow,icol] = value
+                    bits >>= 1
+                    icol += 1
+    return grid
+
+# settle grid in place: every rock falls as far as it can in direction
+#   each row (left/right) or column (up/down) is walked once starting at the
+#   wall the rocks fall towards.  the next free cell is tracked as we go, it
+#   jumps past each cube and advances by one for each rock landing on the pile,
+#   so the whole grid costs O(cells) no matter how far the rocks travel.
+#   returns a list of (from_row,from_col,to_row,to_col) for the rocks that moved
+def settle(grid, direction):
+    (n_rows,n_cols) = grid.shape
+
+    if direction == FALL_DOWN:
+        (vertical,start,step) = (True,n_rows-1,-1)
+    elif direction == FALL_UP:
+        (vertical,start,step) = (True,0,1)
+    elif direction == FALL_RIGHT:
+        (vertical,start,step) = (False,n_cols-1,-1)
+    elif direction == FALL_LEFT:
+        (vertical,start,step) = (False,0,1)
+    else:
+        raise ValueError("Invalid direction = %s"%direction)
+
+    if vertical:
+        (n_lines,n_cells) = (n_cols,n_rows)
+    else:
+        (n_lines,n_cells) = (n_rows,n_cols)
+
+    moves = list()
+    for line in range(n_lines):
+        land = start # where the next rock will land
+        pos = start
+        for k in range(n_cells):
+            if vertical:
+                (irow,icol) = (pos,line)
+            else:
+                (irow,icol) = (line,pos)
+
+            v = grid[irow,icol]
+            if v == V_CUBE:
+                land = pos + step
+            elif v == V_ROCK:
+                if land != pos:
+                    grid[irow,icol] = V_EMPTY
+                    if vertical:
+                        grid[land,icol] = V_ROCK
+                        moves.append((irow,icol,land,icol))
+                    else:
+                        grid[irow,land] = V_ROCK
+                        moves.append((irow,icol,irow,land))
+                land += step
+            pos += step
+
+    return moves
+
+# animation plan for the moves returned by settle()
+#   returns a list of (distance,from_row,from_col,to_row,to_col), longest
+#   travel first, so a tween which moves every rock one cell per frame can stop
+#   looking at the list at the first rock which has already arrived
+def plan_travel(moves):
+    plan = [(abs(jrow-irow)+abs(jcol-icol),irow,icol,jrow,jcol) for (irow,icol,jrow,jcol) in moves]
+    plan.sort(reverse=True)
+    return plan
+
+# weight vectors for the load of each direction, see loads()
+#   returns a list indexed by FALL_*, each entry (axis,weights): the rock count 
+#   of each row (axis 1) or column (axis 0) times weights is the load
+def load_weights(n_rows, n_cols):
+    weights = [None]*5
+    weights[FALL_UP]    = (1,np.array([n_rows-irow for irow in range(n_rows)]))
+    weights[FALL_DOWN]  = (1,np.array([irow+1 for irow in range(n_rows)]))
+    weights[FALL_RIGHT] = (0,np.array([n_cols-icol for icol in range(n_cols)]))
+    weights[FALL_LEFT]  = (0,np.array([icol+1 for icol in range(n_cols)]))
+    return weights
+
+# total load for every direction as shown on the demo screen (FALL_UP is the 
+#   north support beam load of the AoC puzzle), one dot product per direction.
+#   returns a list indexed by FALL_*, weights from load_weights()
+def loads(grid, weights):
+    if isinstance(grid,Bitboard):
+        counts = grid.rock_counts()
+    else:
+        rocks = np.array(grid == V_ROCK,dtype=np.uint8)
+        counts = (np.sum(rocks,axis=0),np.sum(rocks,axis=1)) # per column, per row
+
+    totals = [0]*5
+    for direction in (FALL_DOWN,FALL_LEFT,FALL_RIGHT,FALL_UP):
+        (axis,w) = weights[direction]
+        totals[direction] = int(np.dot(counts[axis],w))
+    return totals
+
+# total load for one direction
+def load(grid, direction):
+    if direction not in (FALL_DOWN,FALL_LEFT,FALL_RIGHT,FALL_UP):
+        raise ValueError("Invalid direction = %s"%direction)
+    (n_rows,n_cols) = grid.shape
+    return loads(grid,load_weights(n_rows,n_cols))[direction]
+
+# change in the load of every direction when n rocks each move by (drow,dcol),
+#   added in place to totals from loads()
+def account_moves(totals, n, drow, dcol):
+    totals[FALL_UP]    -= n*drow
+    totals[FALL_DOWN]  += n*drow
+    totals[FALL_RIGHT] -= n*dcol
+    totals[FALL_LEFT]  += n*dcol
+
+# SPIN CYCLE (AoC part 2) ----------------------------------------------------
+
+SPIN_ORDER = (FALL_UP,FALL_LEFT,FALL_DOWN,FALL_RIGHT) # north, west, south, east
+
+# packed bitboard of the rocks in grid, bit irow*n_cols+icol for cell (irow,icol)
+#   (the layout of Bitboard.rocks).
+#   two grids have the same rocks exactly when their bits are equal, and the 
+#   int is hashed and compared as one object instead of cell by cell
+def rock_bits(grid):
+    if isinstance(grid,Bitboard):
+        return grid.rocks
+
+    (n_rows,n_cols) = grid.shape
+    bits = 0
+    for irow in range(n_rows):
+        row = 0
+        for icol in range(n_cols):
+            if grid[irow,icol] == V_ROCK:
+                row |= 1 << icol
+        bits |= row << (irow*n_cols)
+    return bits
+
+# one spin cycle: settle grid in place north, west, south, then east
+def spin_cycle(grid):
+    for direction in SPIN_ORDER:
+        if isinstance(grid,Bitboard):
+            grid.settle(direction)
+        else:
+            settle(grid,direction)
+
+# north load after n_cycles spin cycles, without running all of them.
+#   the state after each cycle is remembered by its rock_bits() until one 
+#   repeats, from there on the states go round a loop of fixed period and the 
+#   answer is the load of the state at the same place in the loop as n_cycles.
+#   at most max_states states are kept, ValueError if no repeat shows up by then.
+#   grid is spun in place, pass a Bitboard for speed.
+#   returns (load,first cycle of the loop,period)
+def spin_load(grid, n_cycles=1000000000, max_states=512):
+    search = SpinSearch(grid,n_cycles,max_states)
+    while not search.step(max_states):
+        pass
+    return search.result
+
+# spin_load() a few cycles at a time, for a caller which cannot wait for all of 
+#   them (code.py runs it as a scheduled task).  step(n) runs at most n more 
+#   cycles and returns True once result, spin_load()'s return value, is set
+class SpinSearch:
+
+    def __init__(self, grid, n_cycles=1000000000, max_states=512):
+        self.grid = grid
+        self.n_cycles = n_cycles
+        self.max_states = max_states
+        self.weights = load_weights(*grid.shape)
+        self.seen = dict() # rock_bits() -> cycle number
+        self.history = list() # history[i] is the north load after cycle i+1
+        self.cycle = 0
+        self.result = None
+
+    def step(self, n):
+        for i in range(n):
+            if self.result is not None:
+                break
+            if self.cycle == min(self.n_cycles,self.max_states):
+                if self.n_cycles <= self.max_states:
+                    self.result = (self.history[-1],None,None) # ran them all
+                    break
+                raise ValueError("no repeated state within %d spin cycles"%self.max_states)
+
+            self.cycle += 1
+            spin_cycle(self.grid)
+            key = rock_bits(self.grid)
+            if key in self.seen:
+                start = self.seen[key]
+                period = self.cycle - start
+                target = start + (self.n_cycles - start) % period
+                self.result = (self.history[target-1],start,period)
+                break
+            self.seen[key] = self.cycle
+            self.history.append(loads(self.grid,self.weights)[FALL_UP])
+        return self.result is not None
+
+# BITBOARD -------------------------------------------------------------------
+
+# grid stored as two packed bitboards, one int for the rocks and one for the
+#   cubes, with bit irow*n_cols+icol for cell (irow,icol).
+#   reads and writes with grid[irow,icol] like the int8 array, so code written
+#   for the array works on it unchanged, but a whole-board tilt step is a few 
+#   shifts and masks (step(), settle()), the state key is the rocks int itself,
+#   and snapshot()/restore() save and put back the rocks without copying cells.
+#   it takes 2 bits per cell instead of the array's 8.
+class Bitboard:
+
+    def __init__(self, n_rows, n_cols, rocks=0, cubes=0):
+        self.shape = (n_rows,n_cols)
+        self.n_rows = n_rows
+        self.n_cols = n_cols
+        self.rocks = rocks
+        self.cubes = cubes
+
+        # masks, all ints are kept non negative so only & | ^ and shifts are used
+        self.row_mask = (1 << n_cols) - 1
+        self.all_mask = (1 << (n_rows*n_cols)) - 1
+        self.top_row = self.row_mask
+        self.bottom_row = self.row_mask << ((n_rows-1)*n_cols)
+        self.left_col = 0
+        for irow in range(n_rows):
+            self.left_col |= 1 << (irow*n_cols)
+        self.right_col = self.left_col << (n_cols-1)
+
+    # copy of an int8 grid (or another Bitboard).
+    #   each row is built as a small int and shifted into place once, as in 
+    #   rock_bits(), so the big ints are not rebuilt per cell
+    @staticmethod
+    def from_grid(grid):
+        (n_rows,n_cols) = grid.shape
+        if isinstance(grid,Bitboard):
+            return Bitboard(n_rows,n_cols,grid.rocks,grid.cubes)
+        rocks = 0
+        cubes = 0
+        for irow in range(n_rows):
+            row_rocks = 0
+            row_cubes = 0
+            for icol in range(n_cols):
+                value = grid[irow,icol]
+                if value == V_ROCK:
+                    row_rocks |= 1 << icol
+                elif value == V_CUBE:
+                    row_cubes |= 1 << icol
+            rocks |= row_rocks << (irow*n_cols)
+            cubes |= row_cubes << (irow*n_cols)
+        return Bitboard(n_rows,n_cols,rocks,cubes)
+
+    # int8 array copy
+    def to_grid(self):
+        grid = np.zeros(self.shape,dtype=np.int8)
+        for irow in range(self.n_rows):
+            for icol in range(self.n_cols):
+                grid[irow,icol] = self[irow,icol]
+        return grid
+
+    def copy(self):
+        return Bitboard(self.n_rows,self.n_cols,self.rocks,self.cubes)
+
+    def __getitem__(self, index):
+        (irow,icol) = index
+        bit = 1 << (irow*self.n_cols + icol)
+        if self.rocks & bit:
+            return V_ROCK
+        if self.cubes & bit:
+            return V_CUBE
+        return V_EMPTY
+
+    def __setitem__(self, index, value):
+        (irow,icol) = index
+        bit = 1 << (irow*self.n_cols + icol)
+        self.rocks = (self.rocks | bit) ^ bit
+        self.cubes = (self.cubes | bit) ^ bit
+        if value == V_ROCK:
+            self.rocks |= bit
+        elif value == V_CUBE:
+            self.cubes |= bit
+
+    def __eq__(self, other):
+        return self.shape == other.shape and self.rocks == other.rocks and self.cubes == other.cubes
+
+    def __hash__(self):
+        return hash(self.rocks) ^ hash(self.cubes)
+
+    # state for undo/replay, cubes never move so the rocks int is enough
+    def snapshot(self):
+        return self.rocks
+
+    def restore(self, snapshot):
+        self.rocks = snapshot
+
+    # move every rock which can move one cell in direction at the same time.
+    #   a rock moves when the cell in front is empty before the step, the 
+    #   same rule as the ulab batch step in code.py.
+    #   returns the bits of the cells the rocks moved from (0 when settled)
+    def step(self, direction):
+        free = self.all_mask ^ (self.rocks | self.cubes)
+        n_cols = self.n_cols
+        if direction == FALL_DOWN:
+            moving = self.rocks & (free >> n_cols)
+            self.rocks = (self.rocks ^ moving) | (moving << n_cols)
+        elif direction == FALL_UP:
+            moving = self.rocks & ((free << n_cols) & self.all_mask)
+            self.rocks = (self.rocks ^ moving) | (moving >> n_cols)
+        elif direction == FALL_RIGHT:
+            moving = self.rocks & (free >> 1) & (self.all_mask ^ self.right_col)
+            self.rocks = (self.rocks ^ moving) | (moving << 1)
+        elif direction == FALL_LEFT:
+            moving = self.rocks & ((free << 1) & self.all_mask) & (self.all_mask ^ self.left_col)
+            self.rocks = (self.rocks ^ moving) | (moving >> 1)
+        else:
+            raise ValueError("Invalid direction = %s"%direction)
+        return moving
+
+    # step until nothing moves, at most n_rows or n_cols steps
+    def settle(self, direction):
+        while self.step(direction):
+            pass
+
+    # (row,col) of each set bit in bits, row major order
+    def cells(self, bits):
+        for irow in range(self.n_rows):
+            row = (bits >> (irow*self.n_cols)) & self.row_mask
+            icol = 0
+            while row:
+                if row & 1:
+                    yield (irow,icol)
+                row >>= 1
+                icol += 1
+
+    # rocks per column and per row, as lists
+    def rock_counts(self):
+        col_counts = [0]*self.n_cols
+        row_counts = [0]*self.n_rows
+        for (irow,icol) in self.cells(self.rocks):
+            col_counts[icol] += 1
+            row_counts[irow] += 1
+        return (np.array(col_counts),np.array(row_counts))
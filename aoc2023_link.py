@@ -0,0 +1,139 @@
+# Advent of Code "Trophy"
+# 2023 Edition
+# Framing of the data link, the second USB serial channel (usb_cdc.data, see
+#   boot.py) next to the console, no display code
+#   shared by code.py on the PyBadge and by the host-side tools in host-tools/
+#   (link_send.py sends, link_loopback.py tests both ends over a pseudo-terminal)
+#
+#   frame: SYNC (1 byte), type (1 byte), payload length (uint16 little-endian),
+#     the payload, then the CRC-32 of type, length and payload (uint32
+#     little-endian).  bytes before a SYNC are skipped, a frame with a bad
+#     length or CRC is dropped and the reader looks for the next SYNC, and
+#     so is a partial frame when the bytes stop coming (FrameReader.abandon())
+#   the badge answers each frame it took in with an ACK frame, payload
+#     (type of the frame, ACK_* status)
+
+import binascii
+
+SYNC = 0xA5
+HEADER_SIZE = 4
+CRC_SIZE = 4
+
+# frame types
+BOARD       = 1 # payload is a binary Day 14 layout, as aoc2023_day14_init.bin
+LEADERBOARD = 2 # payload is a leaderboard record file, as aoc2023_leaderboard.bin
+ACK         = 0x80 # badge to host
+
+# ACK status
+ACK_OK  = 0
+ACK_BAD = 1 # payload rejected, nothing changed
+ACK_UNKNOWN = 2 # frame type not known
+
+MAX_PAYLOAD = 4250 # largest payload taken in: a leaderboard of 200 members (the
+                   #   most an AoC private leaderboard has), 50+21*200 bytes.  a 
+                   #   100x100 layout is 2608 bytes
+
+# CRC-32 of the first n bytes of buf
+def crc(buf, n):
+    return binascii.crc32(memoryview(buf)[0:n]) & 0xFFFFFFFF
+
+# frame of frame_type around payload, as bytes
+def frame(frame_type, payload):
+    n = len(payload)
+    buf = bytearray(HEADER_SIZE+n+CRC_SIZE)
+    buf[0] = SYNC
+    buf[1] = frame_type
+    buf[2] = n & 0xFF
+    buf[3] = n >> 8
+    buf[HEADER_SIZE:HEADER_SIZE+n] = payload
+    c = crc(memoryview(buf)[1:],HEADER_SIZE-1+n)
+    for i in range(CRC_SIZE):
+        buf[HEADER_SIZE+n+i] = (c >> (8*i)) & 0xFF
+    return bytes(buf)
+
+# incremental frame reader: feed() it the bytes as they come, in any chunks.
+#   the frame is assembled in one buffer allocated up front, nothing is
+#   allocated per byte or per good frame.  after a bad frame the bytes already
+#   taken are searched again from the next SYNC, so a good frame right behind
+#   line noise or a broken frame is not lost
+class FrameReader:
+
+    def __init__(self, max_payload=MAX_PAYLOAD):
+        self.buf = bytearray(HEADER_SIZE+max_payload+CRC_SIZE)
+        self.max_payload = max_payload
+        self.n = 0 # bytes in buf, from a SYNC
+        self.need = HEADER_SIZE # bytes of the frame, once its length is known
+        self.frame_type = None # type of the complete frame in buf, until next()
+        self.length = 0 # and its payload length
+        self.errors = 0 # frames dropped for a bad length or CRC
+
+    # take bytes chunk[start:stop] (chunk a memoryview, bytes or bytearray)
+    #   up to the end of a frame.  returns the index of the first byte not
+    #   taken, frame_type is set once a good frame is complete.  call it again
+    #   after next() even with no bytes left, buf may hold the next frame
+    def feed(self, chunk, start, stop):
+        i = start
+        while self.frame_type is None:
+            if self.n == 0:
+                while i < stop and chunk[i] != SYNC:
+                    i += 1
+            if self.n < self.need:
+                if i == stop:
+                    break
+                take = min(self.need-self.n,stop-i)
+                self.buf[self.n:self.n+take] = chunk[i:i+take]
+                self.n += take
+                i += take
+                if self.n < self.need:
+                    break
+            self._check()
+        return i
+
+    # the first need bytes of buf are in: check the header or the whole frame
+    def _check(self):
+        if self.need == HEADER_SIZE:
+            length = self.buf[2] | (self.buf[3] << 8)
+            if length <= self.max_payload:
+                self.need = HEADER_SIZE+length+CRC_SIZE
+                return
+        else:
+            length = self.need-HEADER_SIZE-CRC_SIZE
+            c = 0
+            for k in range(CRC_SIZE):
+                c |= self.buf[HEADER_SIZE+length+k] << (8*k)
+            if c == crc(memoryview(self.buf)[1:],HEADER_SIZE-1+length):
+                self.frame_type = self.buf[1]
+                self.length = length
+                return
+        self.errors += 1
+        self._drop(1)
+
+    # the rest of the frame in buf is not coming (nothing came in for a while):
+    #   drop it and look for a frame in the bytes after its SYNC.  returns 
+    #   True if there was a partial frame
+    def abandon(self):
+        if self.n == 0 or self.frame_type is not None:
+            return False
+        self.errors += 1
+        self._drop(1)
+        return True
+
+    # drop the bytes of buf before the first SYNC at or after index start
+    def _drop(self, start):
+        j = start
+        while j < self.n and self.buf[j] != SYNC:
+            j += 1
+        self.buf[0:self.n-j] = self.buf[j:self.n]
+        self.n -= j
+        self.need = HEADER_SIZE
+
+    # payload of the complete frame, a view into the reader buffer which is
+    #   only good until next()
+    def payload(self):
+        return memoryview(self.buf)[HEADER_SIZE:HEADER_SIZE+self.length]
+
+    # done with the complete frame, look for the next one
+    def next(self):
+        self.frame_type = None
+        self.length = 0
+        self._drop(self.need)
@@ -0,0 +1,201 @@
+# Advent of Code "Trophy"
+# 2023 Edition
+# Benchmarks of the Day 14 puzzle logic in aoc2023_day14.py
+#   runs from the CircuitPython REPL in reduced form (copy this file and
+#   aoc2023_day14.py to CIRCUITPY, then):
+#     import bench_day14
+#     bench_day14.run()
+#   and on a computer through host-tools/day14_bench.py, which adds the code.py
+#   cases (demo_rocks_fall(), demo_init(), ...) by way of the simulator.
+#
+#   a result is a dict: case name, us (mean per call), max_us, alloc (bytes
+#   allocated per call, gc.mem_alloc() with the collector off on the badge,
+#   tracemalloc peak on a host) and steps (calls until settled, when it applies)
+
+import gc
+import random
+import time
+
+import aoc2023_day14 as day14
+
+BOARD_SIZES = ((20,20),(100,100)) # random boards, besides the example
+
+DIRECTIONS = ((day14.FALL_UP,"UP"),(day14.FALL_DOWN,"DOWN"),(day14.FALL_LEFT,"LEFT"),(day14.FALL_RIGHT,"RIGHT"))
+
+TOLERANCE = 0.5 # allowed slowdown against a baseline, 0.5 = 50 %
+
+ticks_ns = time.monotonic_ns # clock of all timings, host-tools/day14_bench.py swaps in a real one under the simulator
+
+# MEASURING -------------------------------------------------------------------
+
+def _tracing():
+    try:
+        import tracemalloc
+    except ImportError:
+        return None
+    if tracemalloc.is_tracing():
+        return tracemalloc
+    return None
+
+# start counting allocations, the collector is off until alloc_end() so
+#   nothing allocated is freed in between
+def alloc_start():
+    gc.collect()
+    gc.disable()
+    tracemalloc = _tracing()
+    if tracemalloc is not None:
+        tracemalloc.reset_peak()
+        return tracemalloc.get_traced_memory()[0]
+    if hasattr(gc,"mem_alloc"):
+        return gc.mem_alloc()
+    return 0
+
+# bytes allocated since alloc_start() returned start
+def alloc_end(start):
+    tracemalloc = _tracing()
+    if tracemalloc is not None:
+        used = tracemalloc.get_traced_memory()[1] - start
+    elif hasattr(gc,"mem_alloc"):
+        used = gc.mem_alloc() - start
+    else:
+        used = 0
+    gc.enable()
+    return max(used,0)
+
+# call fn(*args) n_calls times, with setup(), when given, run untimed before
+#   each call (and its return value passed as the arguments)
+def measure(name, fn, n_calls=1, setup=None):
+    total_ns = 0
+    max_ns = 0
+    alloc = 0
+    for i in range(n_calls):
+        args = setup() if setup is not None else ()
+        start = alloc_start()
+        t_start = ticks_ns()
+        fn(*args)
+        dt = ticks_ns() - t_start
+        alloc += alloc_end(start)
+        total_ns += dt
+        max_ns = max(max_ns,dt)
+    return {"case": name, "us": total_ns/n_calls/1000, "max_us": max_ns/1000, "alloc": alloc//n_calls}
+
+# call step() until it returns 0 (or max_steps calls), timing each call.
+#   steps is the number of calls which moved something
+def measure_steps(name, step, max_steps):
+    total_ns = 0
+    max_ns = 0
+    alloc = 0
+    steps = 0
+    while steps < max_steps:
+        start = alloc_start()
+        t_start = ticks_ns()
+        n = step()
+        dt = ticks_ns() - t_start
+        alloc += alloc_end(start)
+        total_ns += dt
+        max_ns = max(max_ns,dt)
+        if not n:
+            break
+        steps += 1
+    return {"case": name, "us": total_ns/(steps+1)/1000, "max_us": max_ns/1000,
+            "alloc": alloc//(steps+1), "steps": steps if steps < max_steps else -max_steps}
+
+# BOARDS ----------------------------------------------------------------------
+
+# a random board with about a quarter rocks and a quarter cubes
+def random_board(n_rows, n_cols, seed):
+    random.seed(seed)
+    grid = day14.np.zeros((n_rows,n_cols),dtype=day14.np.int8)
+    for irow in range(n_rows):
+        for icol in range(n_cols):
+            r = random.randint(0,3)
+            if r == 1:
+                grid[irow,icol] = day14.V_ROCK
+            elif r == 2:
+                grid[irow,icol] = day14.V_CUBE
+    return grid
+
+# list of (name,grid): the example, then one random board per BOARD_SIZES entry
+def boards(example="aoc2023_day14_ex.txt", sizes=BOARD_SIZES):
+    found = [("ex",day14.read_layout(example))]
+    for (n_rows,n_cols) in sizes:
+        found.append(("rand%dx%d"%(n_rows,n_cols),random_board(n_rows,n_cols,n_rows*1000+n_cols)))
+    return found
+
+# CASES -----------------------------------------------------------------------
+
+# puzzle logic cases for one board, list of results.  spin adds spin_load(),
+#   which on a full size board takes a long time on the badge
+def bench_logic(name, grid, n_calls=5, spin=True):
+    results = list()
+    (n_rows,n_cols) = grid.shape
+    weights = day14.load_weights(n_rows,n_cols)
+
+    results.append(measure("loads/%s"%name,day14.loads,n_calls,lambda: (grid,weights)))
+    results.append(measure("bitboard.from_grid/%s"%name,day14.Bitboard.from_grid,1,lambda: (grid,)))
+    for (direction,dir_name) in DIRECTIONS:
+        results.append(measure("settle/%s/%s"%(name,dir_name),day14.settle,n_calls,lambda: (grid.copy(),direction)))
+        board = day14.Bitboard.from_grid(grid)
+        results.append(measure_steps("bitboard.step/%s/%s"%(name,dir_name),lambda: board.step(direction),n_rows+n_cols))
+    if spin:
+        results.append(measure("spin_load/%s"%name,day14.spin_load,1,lambda: (day14.Bitboard.from_grid(grid),)))
+    return results
+
+# REPORTING -------------------------------------------------------------------
+
+def format_result(result):
+    text = "%-44s %10.1f us %10.1f max %8d B"%(result["case"],result["us"],result["max_us"],result["alloc"])
+    if "steps" in result:
+        steps = result["steps"]
+        text += " %7s steps"%(str(steps) if steps >= 0 else ">%d"%-steps)
+    return text
+
+# steps of a result for comparing, a capped count (-max_steps) is more than max_steps
+def _steps(result):
+    steps = result.get("steps",0)
+    if steps < 0:
+        return 1-steps
+    return steps
+
+# compare results against baseline (a dict of case name -> result), returns a
+#   list of text lines, one per regression: slower than the baseline by more
+#   than tolerance, or more allocations or more steps than the baseline
+def check(results, baseline, tolerance=TOLERANCE):
+    regressions = list()
+    for result in results:
+        base = baseline.get(result["case"])
+        if base is None:
+            continue
+        if result["us"] > base["us"]*(1+tolerance):
+            regressions.append("%s: %.1f us, baseline %.1f us"%(result["case"],result["us"],base["us"]))
+        if result["alloc"] > base["alloc"]*(1+tolerance):
+            regressions.append("%s: %d B allocated, baseline %d B"%(result["case"],result["alloc"],base["alloc"]))
+        if _steps(result) > _steps(base):
+            regressions.append("%s: %s steps, baseline %s"%(result["case"],result["steps"],base["steps"]))
+    return regressions
+
+# run the puzzle logic benchmarks and print them.  reduced (the default, for
+#   the badge) uses fewer calls and skips spin_load() on the big boards.
+#   baseline is a dict as for check(), or the name of a JSON file holding a
+#   list of results (as written by host-tools/day14_bench.py --save).
+#   returns the list of results
+def run(reduced=True, baseline=None, example="aoc2023_day14_ex.txt"):
+    results = list()
+    for (name,grid) in boards(example):
+        big = grid.shape[0]*grid.shape[1] > 1000
+        for result in bench_logic(name,grid,n_calls=1 if reduced else 5,spin=not (reduced and big)):
+            print(format_result(result))
+            results.append(result)
+        grid = None
+        gc.collect()
+
+    if baseline is not None:
+        if isinstance(baseline,str):
+            import json
+            with open(baseline) as f:
+                baseline = dict((result["case"],result) for result in json.load(f))
+        regressions = check(results,baseline)
+        for line in regressions:
+            print("REGRESSION: %s"%line)
+        print("%d regressions against the baseline"%len(regressions))
+    return results
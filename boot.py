@@ -0,0 +1,9 @@
+# Advent of Code "Trophy"
+# 2023 Edition
+# runs once at reset, before code.py (a reload after saving a file does not run it)
+#   turns on the second USB serial channel, usb_cdc.data, next to the console:
+#   the data link code.py takes new boards and leaderboards from, see aoc2023_link.py
+
+import usb_cdc
+
+usb_cdc.enable(console=True, data=True)
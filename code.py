@@ -1,16 +1,48 @@
 # Advent of Code "Trophy"
 # 2023 Edition
 # Demo of Day 14 (rocks falling) for visualization
-#   initialized from aoc2023_day14_init.txt, backup aoc2023_day14_ex.txt
-#   note, must be a 10x10 grid of "O" for rocks, "#" for immovable cubes, or "." for empty
+#   initialized from aoc2023_day14_init.bin or aoc2023_day14_init.txt, backup aoc2023_day14_ex.txt
+#   note, a grid of "O" for rocks, "#" for immovable cubes, or "." for empty, any size up to 100x100
 
 # PARAMETERS AND CONSTANTS ----------------------------------------------------
 
 USE_NEOPIXELS = True # set to True or False... one board is defective :-(
+NEOPIXEL_BRIGHTNESS = 0.01 # scale of the neopixel colors, applied once when the frames are built
+PIX_FADE_FRAMES = const(8) # frames of a neopixel fade, see pix_fade_frames()
+PIX_CHASE_SEC = 0.1 # seconds per step of the neopixel chase of spin cycle mode
 
 USE_ACCEL = True # set to True or False... PyBadge LC does not have device.
 
+DEMO_USE_BITBOARD = False # set to True to keep the demo map as packed bitboards (day14.Bitboard) instead of a ulab array
+
+DEMO_RENDER_REPORT = True # set to True to measure the board renderer against one shape per cell the first time the demo screen is shown
+
+DEMO_MEMO_HEAP_FRACTION = 0.25 # share of the free memory, when the demo screen is built, the tilt memo may take (0 = no memo), see demo_memo_store()
+DEMO_MEMO_MAX_ENTRIES = const(32) # most tilts kept in the memo, past this the least recently used are evicted
+DEMO_MEMO_MOVE_BYTES = const(48) # estimated bytes per rock move of a plan kept in the memo
+
+SCREEN_WARM_BUDGET = 12000 # bytes of screens not shown kept built, past this the least recently shown are released
+DISPLAY_FPS = 30 # most display refreshes per second, auto_refresh is off and the loop refreshes once per frame
+SCHED_IDLE_MAX_SEC = 0.020 # longest idle sleep between loop iterations, bounds the key press latency
+KEYS_HOLDOFF_SEC = 0.5 # presses within this time after a handled press are ignored
+
+LINK_CHUNK = const(64) # most bytes read from the data link per loop iteration, see link_poll()
+LINK_POLL_SEC = 0.05 # data link poll period while nothing comes in
+LINK_GAP_SEC = 0.5 # a frame which stops coming in for this long is dropped
+
+PROFILE = True # set to True to keep loop timing and memory counters, printed as one line by the SELECT button
+PROF_RING_SIZE = const(64) # number of recent loop iteration times kept
+
+ACCEL_DATA_RATE_HZ = 25 # LIS3DH sample rate, one of 1, 10, 25, 50, 100
+ACCEL_FILTER_ALPHA = 0.3 # low-pass filter weight of a new sample (1.0 = no filtering)
+ACCEL_HYST_DEG = 10 # a new direction must lead by 45 degrees plus this much
+ACCEL_STABLE_SAMPLES = const(4) # filtered samples in a row the new direction must hold before the demo follows
+ACCEL_MIN_TILT_G = 0.25 # below this much gravity in the screen plane the board is flat and the direction is kept
+
 MAX_CHAR = const(20) # max number of text chars that can fit, based on observation
+LEADERBOARD_ROWS = const(3) # leaderboard rows per page on the main screen
+LEADERBOARD_PAGE_SEC = 5.0 # seconds per leaderboard page, UP and DOWN turn pages by hand
+DEMO_LOADVAL_CHARS = const(6) # cells of the load value text field, loads of a 100x100 board reach 6 digits
 
 COLOR_AOCGREEN  = 0x009900 # from AoC website stylesheet
 COLOR_AOCYELLOW = 0xFFFF66 # from AoC website stylesheet
@@ -26,20 +58,42 @@ COLOR_ROCK   = COLOR_GRAY
 COLOR_CUBE   = COLOR_BROWN
 
 # demo params needed early
-DEMO_CIR_RADIUS = const(4)
 DEMO_CIR_START_X = const(55) # 57 no border # note, starts in upper left and goes to right
 DEMO_CIR_START_Y = const(23) # 25 no border # note, starts in upper left and goes down
-
-DEMO_N_ROWS = const(10)
-DEMO_N_COLS = const(10)
+DEMO_AREA_SIZE   = const(100) # board area is DEMO_AREA_SIZE pixels square from (DEMO_CIR_START_X,DEMO_CIR_START_Y)
+DEMO_ROUND_MIN_CELL = const(6) # smallest cell (pixels) where the rock tile is drawn round, smaller cells are solid squares
+DEMO_V_EMPTY = const(0)
+DEMO_V_ROCK  = const(1)
+DEMO_V_CUBE  = const(2) # DEMO_V_* are the demo_map cell values and the board tile indices
+
+ACCEL_I2C_ADDRESS = const(0x18) # LIS3DH on the board I2C bus, the adafruit_lis3dh default
+ACCEL_REG_CTRL3 = const(0x22) # LIS3DH CTRL_REG3, routes interrupts to int1
+ACCEL_CTRL3_I1_DRDY1 = const(0x10) # data ready on int1
+
+TEXT_FIRST_CHAR = const(32) # chars of the text field tiles, the font subset is 32..126
+TEXT_LAST_CHAR  = const(126)
+TEXT_SPACE   = const(0) # text field tile indices, char code - TEXT_FIRST_CHAR
+TEXT_STAR    = const(10) # "*"
+TEXT_DIGIT_0 = const(16) # "0", the digits follow in order
+LEADERBOARD_FILE = "aoc2023_leaderboard.bin" # record file, see host-tools/leaderboard_pack.py
+LEADERBOARD_MAGIC = b"AOCB"
+LEADERBOARD_FIFTY_NAME = const(8) # offset of the first to 50 name (length byte, then MAX_CHAR chars)
+LEADERBOARD_FIFTY_DATE = const(29) # and of the date
+LEADERBOARD_HEAD_SIZE = const(50) # header and first to 50 block, the records follow
+LEADERBOARD_RECORD_SIZE = const(21) # MAX_CHAR chars of row text, then the stars
+LEADERBOARD_STARS_CHARS = const(7) # stars field, "    50*"
+TEXT_ATLAS_MAGIC = b"GLYA" # glyph atlas file, see host-tools/font_atlas.py
+TEXT_ATLAS_HEADER_SIZE = const(8)
+TEXT_LINE_SPACING = 1.25 # line pitch of text_label() in cell heights, as label.Label
 
 # IMPORTS --------------------------------------------------------------------
 import board
 import displayio
 import gc
+import io
 import keypad 
-from math import floor
-import neopixel
+from math import radians, tan
+import neopixel_write
 import random
 import re 
 # note limitations of circuitpython re module here: 
@@ -48,10 +102,13 @@ import time
 import ulab.numpy as np 
 # note limitations of circuitpython ulab.numpy module here: 
     # https://micropython-ulab.readthedocs.io/en/latest/ulab-intro.html
-from adafruit_bitmap_font import bitmap_font
-from adafruit_display_text import label
+import bitmaptools
+import os
 from adafruit_display_shapes.rect import Rect
 from adafruit_display_shapes.circle import Circle
+import aoc2023_day14 as day14 # puzzle logic shared with the host-side tools
+import aoc2023_link as link # data link framing shared with the host-side tools
+import usb_cdc
 import adafruit_lis3dh # accelerometer library, see 
    # https://learn.adafruit.com/adafruit-lis3dh-triple-axis-accelerometer-breakout/python-circuitpython
    # from experimentation, as you look at the board, +x is to the right, 
@@ -60,297 +117,1728 @@ import digitalio # needed for accelerometer
 
 # HELPER FUNCTIONS -----------------------------------------------------------
 
+# text field functions: a text field is one TileGrid of fixed width cells over
+#   text_sheet, which holds one tile per printable ASCII char (tile index = 
+#   char code - TEXT_FIRST_CHAR) of the monospaced font.  changing the text is
+#   tile index writes, nothing is laid out or allocated (unlike label.Label)
+
+# load text_sheet from the glyph atlas made by host-tools/font_atlas.py (see there 
+#   for the format): the header and metrics table, then the whole bitmap with 
+#   one bitmaptools.readinto().  raises OSError when there is no atlas, 
+#   ValueError when it does not fit the text fields
+def text_load_atlas(filename):
+    global text_sheet
+    global text_cell_w
+    global text_cell_h
+
+    n_chars = TEXT_LAST_CHAR-TEXT_FIRST_CHAR+1
+    file_size = os.stat(filename)[6]
+    with open(filename,"rb") as f:
+        header = f.read(TEXT_ATLAS_HEADER_SIZE)
+        if len(header) < TEXT_ATLAS_HEADER_SIZE or header[0:4] != TEXT_ATLAS_MAGIC:
+            raise ValueError("not a glyph atlas")
+        (cell_w,cell_h,first_char,n_atlas) = (header[4],header[5],header[6],header[7])
+        if first_char != TEXT_FIRST_CHAR or n_atlas != n_chars:
+            raise ValueError("atlas holds chars %d..%d, not %d..%d"%(first_char,first_char+n_atlas-1,TEXT_FIRST_CHAR,TEXT_LAST_CHAR))
+        for advance in f.read(n_chars):
+            if advance != cell_w:
+                raise ValueError("font is not monospaced")
+        if file_size != TEXT_ATLAS_HEADER_SIZE + n_chars + (cell_w*n_chars+7)//8*cell_h:
+            raise ValueError("atlas is %d bytes, truncated or damaged"%file_size)
+        sheet = displayio.Bitmap(cell_w*n_chars,cell_h,2)
+        bitmaptools.readinto(sheet,f,bits_per_pixel=1)
+
+    text_sheet = sheet
+    text_cell_w = cell_w
+    text_cell_h = cell_h
+
+# rasterize the chars TEXT_FIRST_CHAR..TEXT_LAST_CHAR of font into text_sheet, 
+#   one cell per char, the glyphs placed on a common baseline.  only used when
+#   there is no atlas, parsing the BDF font takes most of the boot time
+def text_make_sheet(font):
+    global text_sheet
+    global text_cell_w
+    global text_cell_h
+
+    (bb_w,bb_h,bb_dx,bb_dy) = font.get_bounding_box()
+    n_chars = TEXT_LAST_CHAR-TEXT_FIRST_CHAR+1
+    font.load_glyphs(range(TEXT_FIRST_CHAR,TEXT_LAST_CHAR+1))
+    text_cell_w = font.get_glyph(ord("0")).shift_x # monospaced, every char advances as much
+    text_cell_h = bb_h
+    baseline = bb_h + bb_dy
+    text_sheet = displayio.Bitmap(text_cell_w*n_chars,text_cell_h,2)
+    for i in range(n_chars):
+        glyph = font.get_glyph(TEXT_FIRST_CHAR+i)
+        if glyph is None:
+            continue
+        per_row = glyph.bitmap.width//glyph.width if glyph.width else 1
+        src_x = (glyph.tile_index%per_row)*glyph.width
+        src_y = (glyph.tile_index//per_row)*glyph.height
+        top = baseline - (glyph.height+glyph.dy)
+        for y in range(glyph.height):
+            for x in range(glyph.width):
+                cell_x = glyph.dx + x
+                cell_y = top + y
+                if glyph.bitmap[src_x+x,src_y+y] and 0 <= cell_x < text_cell_w and 0 <= cell_y < text_cell_h:
+                    text_sheet[i*text_cell_w+cell_x,cell_y] = 1
+
+# new text field of n_chars cells with its upper left corner at (x,y), blank
+def text_field(n_chars,color,x,y):
+    palette = displayio.Palette(2)
+    palette.make_transparent(0)
+    palette[1] = color
+    return displayio.TileGrid(text_sheet,pixel_shader=palette,
+                              width=n_chars,height=1,
+                              tile_width=text_cell_w,tile_height=text_cell_h,
+                              default_tile=TEXT_SPACE,x=x,y=y)
+
+# new text field showing text, placed as a label.Label with anchor_point anchor at
+#   anchored_position (x,y).  a text of several lines gives a Group of one text 
+#   field per line, TEXT_LINE_SPACING cell heights apart
+def text_label(text,color,x,y,anchor=(0.0,0.0)):
+    lines = text.split("\n")
+    line_h = int(text_cell_h*TEXT_LINE_SPACING)
+    width = max([len(line) for line in lines])*text_cell_w
+    height = text_cell_h + line_h*(len(lines)-1)
+    x = int(round(x-anchor[0]*width))
+    y = int(round(y-anchor[1]*height))
+    if len(lines) == 1:
+        field = text_field(len(text),color,x,y)
+        text_set(field,text)
+        return field
+
+    group = displayio.Group(x=x,y=y)
+    for i in range(len(lines)):
+        field = text_field(len(lines[i]),color,0,i*line_h)
+        text_set(field,lines[i])
+        group.append(field)
+    return group
+
+# set the color of field
+def text_color(field,color):
+    field.pixel_shader[1] = color
+
+# set field to n_chars ASCII chars of buf from start, padded with blanks
+def text_set_bytes(field,buf,start,n_chars):
+    for i in range(field.width):
+        if i < n_chars:
+            field[i] = buf[start+i] - TEXT_FIRST_CHAR
+        else:
+            field[i] = TEXT_SPACE
+
+# set cells start..stop-1 of field to tile
+def text_fill(field,start,stop,tile):
+    for i in range(start,stop):
+        field[i] = tile
+
+# set field to text, cut off or padded with blanks to the field width
+def text_set(field,text):
+    for i in range(field.width):
+        if i < len(text):
+            field[i] = ord(text[i]) - TEXT_FIRST_CHAR
+        else:
+            field[i] = TEXT_SPACE
+
+# set field to the decimal value (not negative) as "%*d"%(min_width,value) would 
+#   print it, left aligned in the field, without making the string
+def text_set_int(field,value,min_width):
+    n_digits = 1
+    scale = 10
+    while value >= scale:
+        n_digits += 1
+        scale *= 10
+    n_pad = max(min_width-n_digits,0)
+    text_fill(field,0,n_pad,TEXT_SPACE)
+    for i in range(n_pad+n_digits-1,n_pad-1,-1): # last digit first
+        if i < field.width:
+            field[i] = TEXT_DIGIT_0 + value%10
+        value //= 10
+    text_fill(field,n_pad+n_digits,field.width,TEXT_SPACE)
+
 # set stars label 
 def update_label_stars(star_count): 
-    global label_stars
-    label_stars.text = ("*"*star_count) + (" "*(MAX_CHAR-star_count))
+    text_fill(label_stars,0,star_count,TEXT_STAR)
+    text_fill(label_stars,star_count,MAX_CHAR,TEXT_SPACE)
 
-# set flash count label
-def update_label_loadval(): # takes in an int
-    global label_loadval
+# set load value label from the running load totals, or the load after 1e9 
+#   spin cycles in spin mode.  the label is only re-rendered when the value shown changes
+def update_label_loadval():
     global demo_loadval 
-    global demo_map
+    global demo_loadval_shown
 
-    # update demo_loadval by reading demo_map
-    demo_loadval = 0
-    for irow in range(DEMO_N_ROWS):
-        for icol in range(DEMO_N_COLS):
-            if demo_map[irow,icol] == DEMO_V_ROCK:
-                if   demo_falldir == DEMO_FALL_UP:
-                    demo_loadval += (DEMO_N_ROWS - irow) 
-                elif demo_falldir == DEMO_FALL_DOWN: 
-                    demo_loadval += (irow + 1)
-                elif demo_falldir == DEMO_FALL_RIGHT: 
-                    demo_loadval += (DEMO_N_COLS - icol)
-                elif demo_falldir == DEMO_FALL_LEFT: 
-                    demo_loadval += (icol + 1)
-                else: 
-                    raise ValueError("Invalid demo_falldir = %s"%demo_falldir)    
+    if demo_spinning:
+        demo_loadval = demo_spin_load
+    else:
+        demo_loadval = demo_loads[demo_falldir]
 
     # update label asset 
-    label_loadval.text = "%4d" % demo_loadval
+    if demo_loadval != demo_loadval_shown:
+        text_set_int(label_loadval,demo_loadval,4)
+        demo_loadval_shown = demo_loadval
+
+# leaderboard functions: the rows come from the record file made by 
+#   host-tools/leaderboard_pack.py (see there for the format), already sorted 
+#   and laid out as text.  the file stays open and a page is one seek and one
+#   readinto into leaderboard_buf, so memory does not grow with the leaderboard
+
+# open the record file and read its header and first to 50 block.  without a 
+#   usable file the leaderboard is empty
+def leaderboard_open(filename):
+    global leaderboard_n
+    global leaderboard_page
+
+    try:
+        leaderboard_use(open(filename,"rb"))
+    except (OSError,ValueError) as e:
+        print("WARN: no leaderboard (%s), run host-tools/leaderboard_pack.py"%e)
+        leaderboard_n = 0
+        leaderboard_page = 0
+        leaderboard_head[LEADERBOARD_FIFTY_NAME] = 0
+        leaderboard_head[LEADERBOARD_FIFTY_DATE] = 0
+
+# read the rows from f from now on, the record file or the same from the data 
+#   link, and read its header and first to 50 block.  raises ValueError if it 
+#   is not a record file, the leaderboard is empty then
+def leaderboard_use(f):
+    global leaderboard_file
+    global leaderboard_n
+    global leaderboard_page
+
+    if leaderboard_file is not None:
+        leaderboard_file.close()
+    leaderboard_file = f
+    leaderboard_n = 0
+    leaderboard_page = 0
+    n = leaderboard_file.readinto(leaderboard_head)
+    if n < LEADERBOARD_HEAD_SIZE or leaderboard_head[0:4] != LEADERBOARD_MAGIC or leaderboard_head[6] != MAX_CHAR:
+        raise ValueError("not a leaderboard record file for %d chars"%MAX_CHAR)
+    leaderboard_n = leaderboard_head[4] + 256*leaderboard_head[5]
+    print("INFO: leaderboard of %d members"%leaderboard_n)
+
+# take a leaderboard from the data link (a record file) and show it on the 
+#   built screens, returns a link.ACK_* status.  a bad one changes nothing
+def leaderboard_link(payload):
+    global display_dirty
+
+    n = len(payload)
+    if (n < LEADERBOARD_HEAD_SIZE or bytes(payload[0:4]) != LEADERBOARD_MAGIC or payload[6] != MAX_CHAR or 
+            n != LEADERBOARD_HEAD_SIZE+(payload[4]+256*payload[5])*LEADERBOARD_RECORD_SIZE):
+        print("WARN: data link leaderboard rejected, not a record file for %d chars"%MAX_CHAR)
+        return link.ACK_BAD
+    leaderboard_use(io.BytesIO(bytes(payload))) # the reader buffer is reused for the next frame
+    if leaderboard_rows is not None:
+        leaderboard_show_page(0)
+        sched_delay(DGROUP_MAIN,leaderboard_page_tick,LEADERBOARD_PAGE_SEC)
+    if label_firstto50name is not None:
+        leaderboard_show_fifty()
+    display_dirty = True
+    return link.ACK_OK
+
+# number of pages of LEADERBOARD_ROWS rows
+def leaderboard_n_pages():
+    return max((leaderboard_n+LEADERBOARD_ROWS-1)//LEADERBOARD_ROWS,1)
+
+# fill the row pool with page (wraps around) of the leaderboard, rows past 
+#   the end are blank
+def leaderboard_show_page(page):
+    global leaderboard_page
+
+    leaderboard_page = page%leaderboard_n_pages()
+    first = leaderboard_page*LEADERBOARD_ROWS
+    n_rows = min(leaderboard_n-first,LEADERBOARD_ROWS)
+    if n_rows > 0:
+        leaderboard_file.seek(LEADERBOARD_HEAD_SIZE+first*LEADERBOARD_RECORD_SIZE)
+        leaderboard_file.readinto(leaderboard_buf)
+    for i in range(LEADERBOARD_ROWS):
+        (row_field,stars_field) = leaderboard_rows[i]
+        if i < n_rows:
+            start = i*LEADERBOARD_RECORD_SIZE
+            text_set_bytes(row_field,leaderboard_buf,start,MAX_CHAR)
+            text_set_int(stars_field,leaderboard_buf[start+MAX_CHAR],LEADERBOARD_STARS_CHARS-1)
+            stars_field[LEADERBOARD_STARS_CHARS-1] = TEXT_STAR
+        else:
+            text_fill(row_field,0,MAX_CHAR,TEXT_SPACE)
+            text_fill(stars_field,0,LEADERBOARD_STARS_CHARS,TEXT_SPACE)
+
+# show the first to 50 name and date from the record file header, centered
+def leaderboard_show_fifty():
+    for (field,start) in ((label_firstto50name,LEADERBOARD_FIFTY_NAME),(label_firstto50date,LEADERBOARD_FIFTY_DATE)):
+        n_chars = leaderboard_head[start]
+        text_set_bytes(field,leaderboard_head,start+1,n_chars)
+        field.x = (board.DISPLAY.width-n_chars*text_cell_w)//2
+
+# recompute the load totals of every direction from demo_map
+def demo_recompute_loads():
+    global demo_loads
+    demo_loads = day14.loads(demo_map,demo_load_weights)
 
 # demo_convert_rowcol_to_circlecoords
 #  be very careful of row/col and x/y directions.  rows go down y and cols go down x.
 def demo_convert_rowcol_to_circlecoord(c_row,c_col):
 
-    global DEMO_CIR_RADIUS
-    global DEMO_CIR_START_X
-    global DEMO_CIR_START_Y
+    cir_x = demo_grid_x+demo_cell//2+demo_cell*c_col # x along col
 
-    cir_x = DEMO_CIR_START_X+DEMO_CIR_RADIUS+1+(2*DEMO_CIR_RADIUS+2)*c_col # x along col
-
-    cir_y = DEMO_CIR_START_Y+DEMO_CIR_RADIUS+1+(2*DEMO_CIR_RADIUS+2)*c_row # y along rows
+    cir_y = demo_grid_y+demo_cell//2+demo_cell*c_row # y along rows
 
     return (cir_x,cir_y)
 
-# init demo
-# there's not going to be a lot of error handling here...
+# read the demo layout: the last board from the data link if one came, else 
+#   aoc2023_day14_init.bin (made by host-tools/day14_pack.py),
+#   else aoc2023_day14_init.txt, or the example if neither is there
+#   returns an int8 grid sized by the file
+def demo_read_layout():
+    if demo_link_layout_bin is not None:
+        print("INFO: using the board from the data link")
+        return day14.unpack_layout(demo_link_layout_bin,len(demo_link_layout_bin))
+
+    try:
+        layout = day14.read_layout_bin("aoc2023_day14_init.bin")
+        print("INFO: reading binary init file")
+        return layout
+    except OSError:
+        pass
+    except ValueError as e:
+        print("WARN: ignoring aoc2023_day14_init.bin, %s"%e)
+
+    try:
+        layout = day14.read_layout("aoc2023_day14_init.txt")
+        print("INFO: reading init file")
+    except OSError:
+        layout = day14.read_layout("aoc2023_day14_ex.txt")
+        print("INFO: using default init") 
+    return layout
+
+# pick the cell (tile) size and origin which fit a n_rows x n_cols board in the board area
+def demo_set_geometry(n_rows,n_cols):
+    global demo_n_rows
+    global demo_n_cols
+    global demo_cell
+    global demo_cir_radius
+    global demo_grid_x
+    global demo_grid_y
+    global demo_load_weights
+
+    demo_cell = min(DEMO_AREA_SIZE//n_cols,DEMO_AREA_SIZE//n_rows)
+    if demo_cell < 1:
+        raise Exception("%dx%d board does not fit on the display"%(n_rows,n_cols))
+
+    demo_n_rows = n_rows
+    demo_n_cols = n_cols
+    demo_cir_radius = (demo_cell-2)//2
+    demo_grid_x = DEMO_CIR_START_X + (DEMO_AREA_SIZE-demo_cell*n_cols)//2 # center in the board area
+    demo_grid_y = DEMO_CIR_START_Y + (DEMO_AREA_SIZE-demo_cell*n_rows)//2
+    demo_load_weights = day14.load_weights(n_rows,n_cols)
+
+    print("INFO: demo board %dx%d, %d pixel tiles"%(n_rows,n_cols,demo_cell))
+
+# build the tile sheet of the board: tile DEMO_V_EMPTY, DEMO_V_ROCK and DEMO_V_CUBE 
+#   side by side, each demo_cell pixels square.  the rock is drawn like the old 
+#   Circle (gray fill, light gray outline) when the tile is big enough, otherwise 
+#   it is a solid gray square.  returns (bitmap,palette)
+def demo_make_tile_sheet():
+    palette = displayio.Palette(4)
+    palette[0] = COLOR_BLACK
+    palette[1] = COLOR_ROCK
+    palette[2] = COLOR_CUBE
+    palette[3] = COLOR_LTGRAY # rock outline
+
+    r = demo_cir_radius
+    c = demo_cell//2 # circle center within the tile, same as demo_convert_rowcol_to_circlecoord()
+    def in_disc(x,y):
+        return (x-c)*(x-c)+(y-c)*(y-c) <= r*r+r
+
+    sheet = displayio.Bitmap(3*demo_cell,demo_cell,4)
+    for y in range(demo_cell):
+        for x in range(demo_cell):
+            sheet[DEMO_V_CUBE*demo_cell+x,y] = 2
+            if demo_cell < DEMO_ROUND_MIN_CELL:
+                sheet[DEMO_V_ROCK*demo_cell+x,y] = 1
+            elif in_disc(x,y):
+                if in_disc(x-1,y) and in_disc(x+1,y) and in_disc(x,y-1) and in_disc(x,y+1):
+                    sheet[DEMO_V_ROCK*demo_cell+x,y] = 1
+                else:
+                    sheet[DEMO_V_ROCK*demo_cell+x,y] = 3 # edge of the disc
+
+    return (sheet,palette)
+
+# set up demo_layout, the initial board in the same form as demo_map, with its 
+#   loads, then demo_map as a copy of it and draw it.  done once per build of the 
+#   demo screen (see demo_build()): demo_init() resets the board from demo_layout
+def demo_load_layout(layout):
+    global demo_layout
+    global demo_layout_loads
+    global demo_map 
+
+    # send out garbage collector 
+    gc.collect()
+    mem_free_before = gc.mem_free()
+
+    if DEMO_USE_BITBOARD:
+        demo_layout = day14.Bitboard.from_grid(layout)
+    else:
+        demo_layout = layout
+    demo_map = demo_layout.copy()
+    gc.collect()
+    print("INFO: demo_layout and demo_map (%s) take %d bytes"%("bitboard" if DEMO_USE_BITBOARD else "ulab int8",mem_free_before-gc.mem_free()))
+
+    demo_recompute_loads()
+    demo_layout_loads = list(demo_loads)
+
+    # draw the board, the tile index is the DEMO_V_* value
+    for irow in range(demo_n_rows):
+        for icol in range(demo_n_cols):
+            demo_board_tiles[icol,irow] = demo_map[irow,icol]
+
+# build the per-direction tables indexed by DEMO_FALL_*, once per build after 
+#   demo_load_layout(), so a step selects its direction by index instead of 
+#   branching on demo_falldir:
+#   demo_dir_views: (src,dst,src_row,src_col,drow,dcol) for demo_rocks_fall_batch()
+#     and demo_work_build(),
+#     src and dst are views sharing memory with demo_map (ulab demo_map only)
+#   demo_dir_highlight: (wide_x,wide_y,tall_x,tall_y) of the highlight Rects,
+#     the unused one parked off screen at (160,120)
+def demo_make_dir_tables():
+    global demo_dir_views
+    global demo_dir_highlight
+
+    (n_rows,n_cols) = (demo_n_rows,demo_n_cols)
+    demo_dir_views = [None]*5
+    if not DEMO_USE_BITBOARD:
+        demo_dir_views[DEMO_FALL_DOWN]  = (demo_map[:-1,:],demo_map[1:,:],0,0,1,0)
+        demo_dir_views[DEMO_FALL_UP]    = (demo_map[1:,:],demo_map[:-1,:],1,0,-1,0)
+        demo_dir_views[DEMO_FALL_RIGHT] = (demo_map[:,:-1],demo_map[:,1:],0,0,0,1)
+        demo_dir_views[DEMO_FALL_LEFT]  = (demo_map[:,1:],demo_map[:,:-1],0,1,0,-1)
+
+    demo_dir_highlight = [None]*5
+    demo_dir_highlight[DEMO_FALL_DOWN]  = (demo_grid_x-2,demo_grid_y+demo_cell*n_rows,160,120)
+    demo_dir_highlight[DEMO_FALL_UP]    = (demo_grid_x-2,demo_grid_y-2,160,120)
+    demo_dir_highlight[DEMO_FALL_RIGHT] = (160,120,demo_grid_x+demo_cell*n_cols,demo_grid_y-2)
+    demo_dir_highlight[DEMO_FALL_LEFT]  = (160,120,demo_grid_x-2,demo_grid_y-2)
+
+# init demo, put the board back to demo_layout
+#   nothing is read, parsed or allocated for the display: only the cells which 
+#   differ from the layout are redrawn, so a reset costs the number of rocks 
+#   out of place rather than the size of the board
 def demo_init(): 
-    global disp_group 
-    global demo_disp_circles
-    global demo_display_group_init_size
     global demo_map 
+    global demo_loads
     global demo_stop
-
-    global DEMO_CIR_RADIUS
-    global DEMO_CIR_START_X
-    global DEMO_CIR_START_Y
-    
+    global demo_settled_dir
+    global demo_spinning
     # set global variables to initial values
+    global demo_work_dir
+    global demo_memo_dir
+    global demo_memo_key
+    global demo_memo_origin
+
     demo_stop = False 
+    demo_tween_finish() # the tiles of a rock still on its way are behind demo_map
+    demo_settled_dir = None
+    demo_work_dir = None # worklist rebuilt on the next step
+    demo_memo_dir = None # memo looked up again on the next step
+    demo_memo_key = None
+    demo_memo_origin = None
+    if demo_spinning or demo_spin_search is not None:
+        demo_spin_toggle()
+
+    if DEMO_USE_BITBOARD:
+        for (irow,icol) in demo_map.cells(demo_map.rocks ^ demo_layout.rocks):
+            demo_board_tiles[icol,irow] = demo_layout[irow,icol]
+        demo_map.restore(demo_layout.snapshot())
+    else:
+        (moved_rows,moved_cols) = np.nonzero(demo_map != demo_layout)
+        for i in range(len(moved_rows)):
+            irow = int(moved_rows[i])
+            icol = int(moved_cols[i])
+            demo_board_tiles[icol,irow] = demo_layout[irow,icol]
+        demo_map[:,:] = demo_layout # copy in place
 
-    demo_disp_circles = list()
+    demo_loads = list(demo_layout_loads)
 
-    # remove all rock and cube objects (anything drawn after initial init)
-    while len(disp_group[DGROUP_2023DAY14]) > demo_display_group_init_size:
-        disp_group[DGROUP_2023DAY14].pop() 
-        
-    # send out garbage collector 
-    gc.collect()
+    print("INFO: demo_init() complete")
 
-    # read input file or use default input
-    try:
-        f = open("aoc2023_day14_init.txt")
-        print("INFO: reading init file")
-    except:
-        f = open("aoc2023_day14_ex.txt")
-        print("INFO: using default init") 
-        
-    # fill in map and draw objects
-    irow = 0
-    for line in f.readlines():
-        if len(line) < 2:
-            continue 
-        
-        for (icol,c) in enumerate(line.strip()):
-            if c == '.':
-                demo_map[irow,icol] = DEMO_V_EMPTY
+# put grid (same size as the board) in place of demo_layout and reset the board 
+#   to it, only the cells which change are redrawn
+def demo_replace_layout(grid):
+    global demo_layout
+    global demo_layout_loads
+
+    demo_tween_finish() # the tiles of a rock still on its way are behind demo_map
+    if DEMO_USE_BITBOARD:
+        layout = day14.Bitboard.from_grid(grid)
+        for (irow,icol) in demo_map.cells((demo_map.rocks ^ layout.rocks) | (demo_map.cubes ^ layout.cubes)):
+            demo_board_tiles[icol,irow] = layout[irow,icol]
+        demo_map.rocks = layout.rocks
+        demo_map.cubes = layout.cubes
+        demo_layout = layout
+    else:
+        (moved_rows,moved_cols) = np.nonzero(demo_map != grid)
+        for i in range(len(moved_rows)):
+            irow = int(moved_rows[i])
+            icol = int(moved_cols[i])
+            demo_board_tiles[icol,irow] = grid[irow,icol]
+        demo_map[:,:] = grid # copy in place, demo_dir_views stay good
+        demo_layout = grid
+    demo_recompute_loads()
+    demo_layout_loads = list(demo_loads)
+    demo_memo_clear() # tilts of the old cubes
+    demo_init() # nothing left to redraw, resets the rest of the demo state
+
+# take a board from the data link (a binary layout), returns a link.ACK_* status.
+#   a board of the same size is swapped in place, another size rebuilds the 
+#   demo screen (at once if it is shown, else the next time it is)
+def demo_link_layout(payload):
+    global demo_link_layout_bin
 
-            elif c == 'O':
-                demo_map[irow,icol] = DEMO_V_ROCK 
+    try:
+        grid = day14.unpack_layout(payload,len(payload))
+    except ValueError as e:
+        print("WARN: data link board rejected, %s"%e)
+        return link.ACK_BAD
+    demo_link_layout_bin = bytes(payload) # kept packed for the next demo_build()
+    print("INFO: data link board %dx%d"%grid.shape)
+
+    if disp_group[DGROUP_2023DAY14] is None:
+        return link.ACK_OK
+    if grid.shape == (demo_n_rows,demo_n_cols):
+        demo_replace_layout(grid)
+    else:
+        grid = None
+        screen_release(DGROUP_2023DAY14)
+        if dgroup_show != DGROUP_2023DAY14:
+            return link.ACK_OK # built from demo_link_layout_bin when shown next
+        screen_show(DGROUP_2023DAY14)
+        demo_init()
+    update_label_loadval()
+    demo_wake()
+    return link.ACK_OK
+
+# time a redraw of the board: hide it, let the display catch up, show it again and 
+#   time that refresh.  returns milliseconds
+def demo_time_board_redraw(layer):
+    layer.hidden = True
+    board.DISPLAY.refresh()
+    layer.hidden = False
+    t_start = time.monotonic_ns()
+    board.DISPLAY.refresh()
+    return (time.monotonic_ns()-t_start)/1e6
+
+# measure the tile grid board against drawing one Circle per rock and one Rect per 
+#   cube, the way the board used to be drawn: free memory taken and board redraw 
+#   time of each.  the shapes are only built for boards with round rocks, a big 
+#   board would not fit in memory that way
+def demo_render_report():
+    board.DISPLAY.show(disp_group[DGROUP_2023DAY14])
+    tiles_ms = demo_time_board_redraw(demo_board_tiles)
+    print("INFO: board tile grid takes %d bytes, redraw %0.1f ms"%(demo_board_mem,tiles_ms))
+
+    if demo_cell < DEMO_ROUND_MIN_CELL:
+        return
 
+    gc.collect()
+    shapes_mem = gc.mem_free()
+    shapes = displayio.Group()
+    for irow in range(demo_n_rows):
+        for icol in range(demo_n_cols):
+            c = demo_map[irow,icol]
+            if c == DEMO_V_ROCK:
                 (cir_x,cir_y) = demo_convert_rowcol_to_circlecoord(irow,icol)
+                shapes.append( Circle( cir_x, cir_y, demo_cir_radius, fill=COLOR_ROCK, stroke=1, outline=COLOR_LTGRAY) )
+            elif c == DEMO_V_CUBE:
+                shapes.append( Rect( demo_grid_x+demo_cell*icol, demo_grid_y+demo_cell*irow, demo_cell, demo_cell, fill=COLOR_CUBE) )
+    gc.collect()
+    shapes_mem -= gc.mem_free()
 
-                demo_disp_circles.append( Circle( cir_x, cir_y,                                                 
-                                                  DEMO_CIR_RADIUS,
-                                                  fill=COLOR_GRAY, 
-                                                  stroke=1,
-                                                  outline=COLOR_LTGRAY) )
-                
-                # print("DEBUG: creating rock at map index (%d,%d) with coords (%d,%d)"%(irow,icol,cir_x,cir_y))
-                
-                disp_group[DGROUP_2023DAY14].append(demo_disp_circles[-1])
-
-            elif c == '#':
-                demo_map[irow,icol] = DEMO_V_CUBE 
-
-                disp_group[DGROUP_2023DAY14].append( Rect( DEMO_CIR_START_X+(2*DEMO_CIR_RADIUS+2)*icol, 
-                                                           DEMO_CIR_START_Y+(2*DEMO_CIR_RADIUS+2)*irow,
-                                                           2*DEMO_CIR_RADIUS+2, # height
-                                                           2*DEMO_CIR_RADIUS+2, # width
-                                                           fill=COLOR_BROWN ) )
-
-            else:
-                raise Exception("Unrecognized symbol: %s"%c)
-                
-        irow += 1
-
-    f.close()
+    demo_board_tiles.hidden = True
+    disp_group[DGROUP_2023DAY14].append(shapes)
+    shapes_ms = demo_time_board_redraw(shapes)
+    disp_group[DGROUP_2023DAY14].remove(shapes)
+    demo_board_tiles.hidden = False
+    print("INFO: one shape per cell (%d shapes) would take %d bytes, redraw %0.1f ms"%(len(shapes),shapes_mem,shapes_ms))
 
-    print("INFO: demo_init() complete")
+    shapes = None
+    gc.collect()
     
     
-# demo-related function: check for rotation
-#   updates demo_falldir and reset demo_stop
+# demo-related function: direction the board is tilted towards from (a_x,a_y)
+#   current is kept unless another axis leads by ACCEL_HYST_RATIO (45 degrees plus
+#   ACCEL_HYST_DEG) or the board lies too flat to tell, so noise near 45 degrees 
+#   does not flip it
+def demo_tilt_dir(a_x,a_y,current):
+    if a_x*a_x + a_y*a_y < accel_min_tilt_sq:
+        return current
+    if abs(a_y) >= abs(a_x):
+        (major,minor) = (abs(a_y),abs(a_x))
+        new = DEMO_FALL_DOWN if a_y > 0 else DEMO_FALL_UP
+    else:
+        (major,minor) = (abs(a_x),abs(a_y))
+        new = DEMO_FALL_RIGHT if a_x > 0 else DEMO_FALL_LEFT
+    if new != current and major < minor*ACCEL_HYST_RATIO:
+        return current
+    return new
+
+# write value to register of the accelerometer straight on the I2C bus, for the 
+#   settings adafruit_lis3dh has no public call for.  returns False if the bus 
+#   is busy or the write fails
+def accel_write_register(register,value):
+    i2c = board.I2C()
+    if not i2c.try_lock():
+        return False
+    try:
+        i2c.writeto(ACCEL_I2C_ADDRESS,bytes((register,value)))
+    except OSError:
+        return False
+    finally:
+        i2c.unlock()
+    return True
+
+# demo-related function: restart the accelerometer filter from a fresh sample 
+#   and follow it at once, no hysteresis (on entering the demo screen)
+def demo_accel_reset():
+    global accel_x
+    global accel_y
+    global accel_reads
+    global accel_candidate
+    global accel_stable
+
+    (accel_x,accel_y,a_z) = accel.acceleration 
+    accel_reads += 1
+    accel_candidate = demo_tilt_dir(accel_x,accel_y,None) or demo_falldir
+    accel_stable = 0
+    demo_set_falldir(accel_candidate)
+
+# demo screen task: check for rotation, returns seconds until due again
+#   the LIS3DH samples at ACCEL_DATA_RATE_HZ and raises int1 when a sample is 
+#   ready (data-ready interrupt), so the I2C bus is only read once per new 
+#   sample: a poll without one costs a pin read (without the interrupt, see 
+#   accel_drdy, every poll reads).  samples go through a low-pass 
+#   filter and demo_tilt_dir(), and demo_falldir only changes once the same new 
+#   direction came out of ACCEL_STABLE_SAMPLES samples in a row
 def demo_check_rotation():
-    global demo_falldir 
-    global demo_stop 
-    
-    init_demo_falldir = demo_falldir 
-    
-    # read accelerometer
-    (a_x,a_y,a_z) = accel.acceleration 
+    global accel_x
+    global accel_y
+    global accel_reads
+    global accel_candidate
+    global accel_stable
+
+    if demo_spinning or (accel_drdy and not accel_int1.value): 
+        return accel_poll_sec
+
+    (a_x,a_y,a_z) = accel.acceleration # clears the data-ready interrupt
+    accel_reads += 1
+    accel_x += ACCEL_FILTER_ALPHA*(a_x-accel_x)
+    accel_y += ACCEL_FILTER_ALPHA*(a_y-accel_y)
     
-    # print('DEBUG: check_rotation a_x = %0.2f, a_y = %0.2f, a_z = %0.2f'%(a_x,a_y,a_z))
-    
-    if a_y > 0 and abs(a_y) > abs(a_x): 
-        demo_falldir = DEMO_FALL_DOWN
-    elif a_y < 0 and abs(a_y) > abs(a_x): 
-        demo_falldir = DEMO_FALL_UP
-    elif a_x > 0 and abs(a_x) > abs(a_y):
-        demo_falldir = DEMO_FALL_RIGHT
-    elif a_x < 0 and abs(a_x) > abs(a_y):
-        demo_falldir = DEMO_FALL_LEFT
+    # print('DEBUG: check_rotation a_x = %0.2f, a_y = %0.2f, filtered %0.2f, %0.2f'%(a_x,a_y,accel_x,accel_y))
+
+    new_falldir = demo_tilt_dir(accel_x,accel_y,demo_falldir)
+    if new_falldir == demo_falldir:
+        accel_stable = 0
+    elif new_falldir != accel_candidate:
+        accel_candidate = new_falldir
+        accel_stable = 1
     else:
-        demo_falldir = DEMO_FALL_DOWN
-        print('WARN: could not detect direction, so setting demo_falldir = DEMO_FALL_DOWN')
-        
-    if init_demo_falldir != demo_falldir:
-        if demo_falldir == DEMO_FALL_DOWN:
-            disp_group[DGROUP_2023DAY14][DEMO_DIR_HIGHLIGHT_WIDE_INDEX].x = DEMO_CIR_START_X-2
-            disp_group[DGROUP_2023DAY14][DEMO_DIR_HIGHLIGHT_WIDE_INDEX].y = DEMO_CIR_START_Y+(2*DEMO_CIR_RADIUS+2)*DEMO_N_ROWS
-            disp_group[DGROUP_2023DAY14][DEMO_DIR_HIGHLIGHT_TALL_INDEX].x = 160
-            disp_group[DGROUP_2023DAY14][DEMO_DIR_HIGHLIGHT_TALL_INDEX].y = 120 
-            # disp_group[DGROUP_2023DAY14][DEMO_DIR_HIGHLIGHT_INDEX].x = DEMO_CIR_START_X-2
-            # disp_group[DGROUP_2023DAY14][DEMO_DIR_HIGHLIGHT_INDEX].y = DEMO_CIR_START_Y+(2*DEMO_CIR_RADIUS+2)*DEMO_N_ROWS
-            # disp_group[DGROUP_2023DAY14][DEMO_DIR_HIGHLIGHT_INDEX].width  = (2*DEMO_CIR_RADIUS+2)*DEMO_N_ROWS+4
-            # disp_group[DGROUP_2023DAY14][DEMO_DIR_HIGHLIGHT_INDEX].height = 2 # note: can't update height and width (apparently)
-            print('INFO: changing rotation direction to DOWN')
-        elif demo_falldir == DEMO_FALL_UP:
-            disp_group[DGROUP_2023DAY14][DEMO_DIR_HIGHLIGHT_WIDE_INDEX].x = DEMO_CIR_START_X-2
-            disp_group[DGROUP_2023DAY14][DEMO_DIR_HIGHLIGHT_WIDE_INDEX].y = DEMO_CIR_START_Y-2
-            disp_group[DGROUP_2023DAY14][DEMO_DIR_HIGHLIGHT_TALL_INDEX].x = 160
-            disp_group[DGROUP_2023DAY14][DEMO_DIR_HIGHLIGHT_TALL_INDEX].y = 120
-            # disp_group[DGROUP_2023DAY14][DEMO_DIR_HIGHLIGHT_INDEX].x = DEMO_CIR_START_X-2
-            # disp_group[DGROUP_2023DAY14][DEMO_DIR_HIGHLIGHT_INDEX].y = DEMO_CIR_START_Y-2
-            # disp_group[DGROUP_2023DAY14][DEMO_DIR_HIGHLIGHT_INDEX].width  = (2*DEMO_CIR_RADIUS+2)*DEMO_N_ROWS+4
-            # disp_group[DGROUP_2023DAY14][DEMO_DIR_HIGHLIGHT_INDEX].height = 2
-            print('INFO: changing rotation direction to UP')
-        elif demo_falldir == DEMO_FALL_RIGHT:
-            disp_group[DGROUP_2023DAY14][DEMO_DIR_HIGHLIGHT_TALL_INDEX].x = DEMO_CIR_START_X+(2*DEMO_CIR_RADIUS+2)*DEMO_N_COLS
-            disp_group[DGROUP_2023DAY14][DEMO_DIR_HIGHLIGHT_TALL_INDEX].y = DEMO_CIR_START_Y-2
-            disp_group[DGROUP_2023DAY14][DEMO_DIR_HIGHLIGHT_WIDE_INDEX].x = 160
-            disp_group[DGROUP_2023DAY14][DEMO_DIR_HIGHLIGHT_WIDE_INDEX].y = 120
-            # disp_group[DGROUP_2023DAY14][DEMO_DIR_HIGHLIGHT_INDEX].x = DEMO_CIR_START_X-2
-            # disp_group[DGROUP_2023DAY14][DEMO_DIR_HIGHLIGHT_INDEX].y = DEMO_CIR_START_Y+(2*DEMO_CIR_RADIUS+2)*DEMO_N_COLS
-            # disp_group[DGROUP_2023DAY14][DEMO_DIR_HIGHLIGHT_INDEX].width  = 2 
-            # disp_group[DGROUP_2023DAY14][DEMO_DIR_HIGHLIGHT_INDEX].height = (2*DEMO_CIR_RADIUS+2)*DEMO_N_COLS+4
-            print('INFO: changing rotation direction to RIGHT')
-        elif demo_falldir == DEMO_FALL_LEFT:
-            disp_group[DGROUP_2023DAY14][DEMO_DIR_HIGHLIGHT_TALL_INDEX].x = DEMO_CIR_START_X-2
-            disp_group[DGROUP_2023DAY14][DEMO_DIR_HIGHLIGHT_TALL_INDEX].y = DEMO_CIR_START_Y-2
-            disp_group[DGROUP_2023DAY14][DEMO_DIR_HIGHLIGHT_WIDE_INDEX].x = 160
-            disp_group[DGROUP_2023DAY14][DEMO_DIR_HIGHLIGHT_WIDE_INDEX].y = 120
-            # disp_group[DGROUP_2023DAY14][DEMO_DIR_HIGHLIGHT_INDEX].x = DEMO_CIR_START_X-2
-            # disp_group[DGROUP_2023DAY14][DEMO_DIR_HIGHLIGHT_INDEX].y = DEMO_CIR_START_Y-2
-            # disp_group[DGROUP_2023DAY14][DEMO_DIR_HIGHLIGHT_INDEX].width  = 2 
-            # disp_group[DGROUP_2023DAY14][DEMO_DIR_HIGHLIGHT_INDEX].height = (2*DEMO_CIR_RADIUS+2)*DEMO_N_COLS+4
-            print('INFO: changing rotation direction to LEFT')
-
-        demo_stop = False # restart demo if it was stopped
-    
-# return rock (Circle) object in  disp_group[DGROUP_2023DAY14] which corresponds to coordinates given
-#   or None for failure
-def demo_find_rock_in_disp_group(c_row,c_col):
+        accel_stable += 1
+    if accel_stable >= ACCEL_STABLE_SAMPLES:
+        accel_stable = 0
+        demo_set_falldir(new_falldir)
+
+    return accel_poll_sec
 
-    global demo_disp_circles
+# demo-related function: restart the rocks after demo_rocks_fall() stopped them
+#   on a settled board, demo_step() is parked meanwhile and made due now
+def demo_wake():
+    global demo_stop
+    global display_dirty
+
+    demo_stop = False
+    display_dirty = True
+    sched_delay(DGROUP_2023DAY14,demo_step,0.0)
+
+# demo-related function: move the direction highlight to demo_falldir
+def demo_place_highlight():
+    (wide_x,wide_y,tall_x,tall_y) = demo_dir_highlight[demo_falldir]
+    demo_highlight_wide.x = wide_x
+    demo_highlight_wide.y = wide_y
+    demo_highlight_tall.x = tall_x
+    demo_highlight_tall.y = tall_y
+
+# demo-related function: change fall direction
+#   updates demo_falldir, moves the direction highlight and wakes the demo
+def demo_set_falldir(new_falldir):
+    global demo_falldir 
+    
+    if new_falldir == demo_falldir:
+        return 
 
-    (cir_x,cir_y) = demo_convert_rowcol_to_circlecoord(c_row,c_col)
-    # print("DEBUG: in find_rock searching for rock at map index (%d,%d) with coords (%d,%d)"%(c_row,c_col,cir_x,cir_y))
+    demo_falldir = new_falldir
+    demo_place_highlight()
+    print('INFO: changing rotation direction to %s'%DEMO_FALL_NAMES[demo_falldir])
 
-    for Rock in demo_disp_circles:
-        # print("DEBUG: (Rock.x,Rock.y)=(%d,%d)"%(Rock.x,Rock.y))
-        if Rock.x + DEMO_CIR_RADIUS == cir_x and Rock.y + DEMO_CIR_RADIUS == cir_y : # constructor is a convenience function(?), x/y are shifted by CIR_RADIUS on read back
-           return Rock 
+    demo_wake() # restart demo if it was stopped
 
-    print("ERROR: did not find a match in find_rock")
-    time.sleep(1.0) # DEBUG
+# move a rock from (irow,icol) to (jrow,jcol) 
+#   demo_map and the drawing are updated together, so there 
+#   is nothing to unroll if something goes wrong
+def demo_move_rock(irow,icol,jrow,jcol):
+    global demo_map
 
-    return None 
+    if demo_map[irow,icol] != DEMO_V_ROCK:
+        raise Exception("no rock at (%d,%d)"%(irow,icol)) # raise before touching any state
     
+    # update position in demo_map
+    demo_map[jrow,jcol] = DEMO_V_ROCK 
+    demo_map[irow,icol] = DEMO_V_EMPTY 
+    day14.account_moves(demo_loads,1,jrow-irow,jcol-icol)
+
+    demo_draw_rock_move(irow,icol,jrow,jcol)
+
+# move the drawing of a rock from (irow,icol) to (jrow,jcol), demo_map is not touched.
+#   two tile index writes, and the move is tracked while a tilt is kept for the memo
+def demo_draw_rock_move(irow,icol,jrow,jcol):
+    demo_board_tiles[icol,irow] = DEMO_V_EMPTY
+    demo_board_tiles[jcol,jrow] = DEMO_V_ROCK
+    if demo_memo_origin is not None:
+        demo_memo_track(irow*demo_n_cols+icol,jrow*demo_n_cols+jcol)
+
 # demo-related function: try to move the rocks 
+#   one step of the animation, how much moves depends on demo_step_mode
+#   returns number of rocks moved, 0 once the board has settled
 def demo_rocks_fall() :
     global demo_stop 
-    global demo_map
-    global DEMO_N_ROWS
-    global DEMO_N_COLS
-    
-    fall_x = 0 # amount to "fall" in x direction
-    fall_y = 0 # amount to "fall" in y direction
-    
-    if demo_falldir == DEMO_FALL_DOWN:
-        fall_y = 1
-    elif demo_falldir == DEMO_FALL_UP:
-        fall_y = -1
-    elif demo_falldir ==  DEMO_FALL_LEFT:
-        fall_x = -1
-    elif demo_falldir ==  DEMO_FALL_RIGHT:
-        fall_x = 1
+    global demo_spin_index
+
+    if demo_memo_dir != demo_falldir:
+        demo_memo_begin() # a new tilt, played from the memo when seen before
+
+    if len(demo_tween) > 0: # a memo hit, or DEMO_MODE_SETTLE
+        n_moved = demo_tween_step()
+    elif demo_step_mode == DEMO_MODE_BATCH:
+        n_moved = demo_rocks_fall_batch()
+    elif demo_step_mode == DEMO_MODE_SETTLE:
+        if demo_settled_dir != demo_falldir:
+            demo_settle(demo_falldir)
+        n_moved = demo_tween_step()
     else:
-        raise ValueError(demo_falldir)
-    
-    # print("DEBUG: inside demo_rocks_fall()") # debug
-    
-    # scan map and try to move each rock.  if one moves, bail out (this will make "falling" visible)
-    for irow in range(DEMO_N_ROWS):
-        for icol in range(DEMO_N_COLS):
-            # print("DEBUG: checking map at (%d,%d), value found = %d"%(irow,icol,demo_map[irow,icol]))
-            if demo_map[irow,icol] == DEMO_V_ROCK:
-
-                # print("DEBUG: rock found at (%d,%d)"%(irow,icol))
-                # DANGEROUS - reading beyond indices doesn't always fail?? extends array!
-                #   DO NOT DO: # print("DEBUG: value where we want to move to is %d (EMPTY = %d)"%(demo_map[irow+fall_y,icol+fall_x],DEMO_V_EMPTY))
-                # print("DEBUG: irow = %d, fall_y = %d, DEMO_N_ROWS = %d, icol = %d, fall_x= %d, DEMO_N_COLS = %d"%(irow,fall_y,DEMO_N_ROWS,icol,fall_x,DEMO_N_COLS))
-                # print("DEBUG: 0 <= irow+fall_y < DEMO_N_ROWS is %s and 0 <= icol+fall_x < DEMO_N_COLS is %s"%(0 <= irow+fall_y < DEMO_N_ROWS, 0 <= icol+fall_x < DEMO_N_COLS ))
-                if 0 <= irow+fall_y < DEMO_N_ROWS and 0 <= icol+fall_x < DEMO_N_COLS and demo_map[irow+fall_y,icol+fall_x] == DEMO_V_EMPTY:
-                    # update position in demo_map
-                    demo_map[irow+fall_y,icol+fall_x] = DEMO_V_ROCK 
-                    demo_map[irow,icol] = DEMO_V_EMPTY 
-
-                    # update position in display_group drawing
-                    Rock = demo_find_rock_in_disp_group(irow,icol)
-                    if not Rock:
-                        # unroll changes to demo_map to avoid state corruption
-                        demo_map[irow+fall_y,icol+fall_x] = DEMO_V_EMPTY 
-                        demo_map[irow,icol] = DEMO_V_ROCK 
-                        raise Exception("*** find_rock failed !!!") # fucks up state in demo_map... not atomic
-                    
-                    (new_cir_x,new_cir_y) = demo_convert_rowcol_to_circlecoord(irow+fall_y,icol+fall_x)
-                    Rock.x = new_cir_x - DEMO_CIR_RADIUS
-                    Rock.y = new_cir_y - DEMO_CIR_RADIUS 
-
-                    # if we successfully moved a rock, return early
-                    # print("DEBUG: *** moved a rock ***") # debug
-                    return 
+        n_moved = demo_rocks_fall_one()
 
-    # if we get here, then no rocks were moved
-    demo_stop = False # was True here... this basically makes demo_stop always False 
-    # NOTE: the CPU has to be doing something, so no point of demo_stop = True. 
+    if n_moved > 0:
+        return n_moved
 
+    # if we get here, then no rocks were moved
     # print("DEBUG: hit bottom of demo_rocks_fall() with no rock moved") # debug
+    demo_memo_end()
     update_label_loadval()    
-    
 
-# SETUP ----------------------------------------------------------------------
+    if demo_spinning: # settled, tilt to the next direction of the spin cycle
+        demo_spin_index = (demo_spin_index+1)%len(day14.SPIN_ORDER)
+        demo_set_falldir(day14.SPIN_ORDER[demo_spin_index])
+    else:
+        demo_stop = True # settled, nothing to do until demo_wake()
+
+    return 0
+
+# move one rock which can move, returns number of rocks moved (0 or 1)
+#   rocks are taken from the worklist demo_work (see demo_work_build()), so a 
+#   step does not scan the board.  a rock which moved may move again and the 
+#   rock behind the cell it left may now move, these two are the only cells 
+#   added back, each at the end of the list
+def demo_rocks_fall_one():
+    global demo_work_head
+
+    if demo_work_dir != demo_falldir:
+        demo_work_build()
+    (fall_y,fall_x) = day14.FALL_OFFSET[demo_falldir]
+
+    while demo_work_head < len(demo_work):
+        cell = demo_work[demo_work_head]
+        demo_work_head += 1
+        irow = cell//demo_n_cols
+        icol = cell%demo_n_cols
+        jrow = irow+fall_y
+        jcol = icol+fall_x
+        if not (0 <= jrow < demo_n_rows and 0 <= jcol < demo_n_cols):
+            continue
+        if demo_map[irow,icol] != DEMO_V_ROCK or demo_map[jrow,jcol] != DEMO_V_EMPTY:
+            continue # stale entry
+
+        demo_move_rock(irow,icol,jrow,jcol)
+        demo_work.append(jrow*demo_n_cols+jcol)
+        krow = irow-fall_y
+        kcol = icol-fall_x
+        if 0 <= krow < demo_n_rows and 0 <= kcol < demo_n_cols and demo_map[krow,kcol] == DEMO_V_ROCK:
+            demo_work.append(krow*demo_n_cols+kcol)
+        if demo_work_head > DEMO_WORK_COMPACT:
+            del demo_work[:demo_work_head] # drop the entries done
+            demo_work_head = 0
+        return 1
+
+    # worklist empty, settled
+    del demo_work[:]
+    demo_work_head = 0
+    return 0
+
+# fill the worklist demo_work with the cells (irow*demo_n_cols+icol) of the 
+#   rocks which can move in demo_falldir, found in one go: on the shifted views
+#   of demo_dir_views with ulab, or with a day14.Bitboard.step() on a copy
+def demo_work_build():
+    global demo_work_dir
+    global demo_work_head
+
+    del demo_work[:]
+    demo_work_head = 0
+    if DEMO_USE_BITBOARD:
+        for (irow,icol) in demo_map.cells(demo_map.copy().step(demo_falldir)):
+            demo_work.append(irow*demo_n_cols+icol)
+    else:
+        (src,dst,src_row,src_col,fall_y,fall_x) = demo_dir_views[demo_falldir]
+        (move_rows,move_cols) = np.nonzero((src == DEMO_V_ROCK) * (dst == DEMO_V_EMPTY))
+        for i in range(len(move_rows)):
+            demo_work.append((int(move_rows[i])+src_row)*demo_n_cols+int(move_cols[i])+src_col)
+    demo_work_dir = demo_falldir
+
+# move every rock which can move one cell in demo_falldir at the same time, 
+#   returns number of rocks moved.
+#   the search is done with ulab on shifted views of demo_map (demo_dir_views): 
+#   src is the view of cells a rock could leave and dst the view of the cells it 
+#   would land in
+def demo_rocks_fall_batch():
+
+    if DEMO_USE_BITBOARD:
+        return demo_rocks_fall_batch_bits()
+
+    (src,dst,src_row,src_col,fall_y,fall_x) = demo_dir_views[demo_falldir]
+
+    # 1 where a rock sits in front of an empty cell.  the landing cell must be 
+    # empty before the step, so a rock never moves into a cell being vacated 
+    # this step and no cell is both a source and a destination
+    moving = np.array((src == DEMO_V_ROCK) * (dst == DEMO_V_EMPTY), dtype=np.int8)
+
+    (move_rows,move_cols) = np.nonzero(moving)
+    if len(move_rows) == 0:
+        return 0
+
+    # apply all moves to demo_map at once (DEMO_V_ROCK = 1, DEMO_V_EMPTY = 0)
+    src -= moving 
+    dst += moving 
+    day14.account_moves(demo_loads,len(move_rows),fall_y,fall_x)
+
+    # then move the drawings
+    for i in range(len(move_rows)):
+        irow = int(move_rows[i]) + src_row
+        icol = int(move_cols[i]) + src_col
+        demo_draw_rock_move(irow,icol,irow+fall_y,icol+fall_x)
+
+    return len(move_rows)
+
+# demo_rocks_fall_batch() for a bitboard demo_map, the step is done with shifts and 
+#   masks by day14.Bitboard.step()
+def demo_rocks_fall_batch_bits():
+    (fall_y,fall_x) = day14.FALL_OFFSET[demo_falldir]
+
+    moved = demo_map.step(demo_falldir) # bits of the cells the rocks left
+    if moved == 0:
+        return 0
+
+    n_moved = 0
+    for (irow,icol) in demo_map.cells(moved):
+        demo_draw_rock_move(irow,icol,irow+fall_y,icol+fall_x)
+        n_moved += 1
+    day14.account_moves(demo_loads,n_moved,fall_y,fall_x)
+
+    return n_moved
+
+# demo-related function: jump demo_map straight to its settled state for direction
+#   (see day14.settle()) and plan the animation of each rock to its destination, 
+#   which demo_tween_step() then plays back one cell per step
+def demo_settle(direction):
+    global demo_tween
+    global demo_tween_frame
+    global demo_settled_dir
+
+    demo_tween_finish() # snap any animation still playing to its end
+
+    moves = day14.settle(demo_map,direction)
+    for (irow,icol,jrow,jcol) in moves:
+        day14.account_moves(demo_loads,1,jrow-irow,jcol-icol)
+
+    demo_tween = demo_plan(moves)
+    demo_tween_frame = 0
+    demo_settled_dir = direction
+    demo_memo_store(demo_tween)
+
+# animation plan of moves (irow,icol,jrow,jcol) for demo_tween_step(), 
+#   (irow,icol,drow,dcol,dist) per rock sorted longest travel first
+def demo_plan(moves):
+    plan = list()
+    for (dist,irow,icol,jrow,jcol) in day14.plan_travel(moves):
+        plan.append((irow,icol,(jrow-irow)//dist,(jcol-icol)//dist,dist))
+    return plan
+
+# advance the planned animation by one cell, returns number of rocks moved
+def demo_tween_step():
+    global demo_tween
+    global demo_tween_frame
+
+    if len(demo_tween) == 0:
+        return 0
+
+    demo_tween_frame += 1
+    frame = demo_tween_frame
+    n_moved = 0
+
+    # clear every moving rock first, a rock may step into the cell the rock ahead just left
+    for (irow,icol,drow,dcol,dist) in demo_tween:
+        if dist < frame:
+            break
+        demo_board_tiles[icol+dcol*(frame-1),irow+drow*(frame-1)] = DEMO_V_EMPTY
+
+    for (irow,icol,drow,dcol,dist) in demo_tween:
+        if dist < frame:
+            break # plan is sorted longest travel first, everyone else has arrived
+        demo_board_tiles[icol+dcol*frame,irow+drow*frame] = DEMO_V_ROCK
+        n_moved += 1
+
+    if demo_tween_frame >= demo_tween[0][4]:
+        demo_tween = list() # done
+
+    return n_moved
+
+# jump the planned animation to its end
+def demo_tween_finish():
+    global demo_tween
+
+    for (irow,icol,drow,dcol,dist) in demo_tween:
+        frame = min(dist,demo_tween_frame)
+        demo_board_tiles[icol+dcol*frame,irow+drow*frame] = DEMO_V_EMPTY
+
+    for (irow,icol,drow,dcol,dist) in demo_tween:
+        demo_board_tiles[icol+dcol*dist,irow+drow*dist] = DEMO_V_ROCK
+
+    demo_tween = list()
+
+# tilt memo functions: a tilt seen before, the same board state and direction, 
+#   is not worked out again.  demo_memo maps (demo_memo_state(),direction) to
+#   [last use stamp,plan,loads after,settled rocks,bytes]: the plan of the tilt
+#   as demo_plan() makes it, demo_loads after the tilt, the settled rocks with 
+#   a bitboard demo_map (a ulab one is settled by the plan) and the estimated 
+#   bytes of the entry.  entries past demo_memo_budget bytes or 
+#   DEMO_MEMO_MAX_ENTRIES are evicted least recently used first
+
+# memo key of the board state, exact: the rocks with a bitboard, else the cells 
+#   as bytes (one per cell)
+def demo_memo_state():
+    if DEMO_USE_BITBOARD:
+        return demo_map.rocks
+    return demo_map.tobytes()
+
+# a new tilt to demo_falldir: on a hit, settle demo_map and demo_loads from the 
+#   memo at once and play its plan with demo_tween_step() whatever the step mode.
+#   else track the tilt, demo_settle() or demo_memo_end() stores it
+def demo_memo_begin():
+    global demo_memo_dir
+    global demo_memo_key
+    global demo_memo_origin
+    global demo_memo_stamp
+    global demo_memo_hits
+    global demo_memo_misses
+    global demo_loads
+    global demo_tween
+    global demo_tween_frame
+    global demo_settled_dir
+    global demo_work_dir
+    global demo_work_head
+
+    demo_tween_finish() # snap the animation of the last tilt to its end
+    demo_memo_dir = demo_falldir
+    demo_memo_key = None
+    demo_memo_origin = None
+    if demo_memo_budget <= 0:
+        return
+
+    key = (demo_memo_state(),demo_falldir)
+    entry = demo_memo.get(key)
+    if entry is None:
+        demo_memo_misses += 1
+        demo_memo_key = key
+        if demo_step_mode != DEMO_MODE_SETTLE:
+            demo_memo_origin = dict()
+        return
+
+    demo_memo_hits += 1
+    demo_memo_stamp += 1
+    entry[0] = demo_memo_stamp
+    plan = entry[1]
+    if DEMO_USE_BITBOARD:
+        demo_map.restore(entry[3])
+    else:
+        for (irow,icol,drow,dcol,dist) in plan:
+            demo_map[irow,icol] = DEMO_V_EMPTY
+        for (irow,icol,drow,dcol,dist) in plan:
+            demo_map[irow+drow*dist,icol+dcol*dist] = DEMO_V_ROCK
+    demo_loads = list(entry[2])
+    demo_tween = plan # demo_tween_step() does not change the plan
+    demo_tween_frame = 0
+    demo_settled_dir = demo_falldir # nothing left for demo_settle()
+    del demo_work[:] # nor for the worklist
+    demo_work_head = 0
+    demo_work_dir = demo_falldir
+
+# a rock of the tracked tilt moved from cell to new_cell (irow*demo_n_cols+icol).
+#   tracking stops when the plan would not fit in the memo anyway
+def demo_memo_track(cell,new_cell):
+    global demo_memo_key
+    global demo_memo_origin
+
+    demo_memo_origin[new_cell] = demo_memo_origin.pop(cell,cell)
+    if len(demo_memo_origin)*DEMO_MEMO_MOVE_BYTES > demo_memo_budget:
+        demo_memo_key = None
+        demo_memo_origin = None
+
+# the board settled: store the tilt tracked in a step mode, planned from where 
+#   each rock started
+def demo_memo_end():
+    global demo_memo_origin
+
+    if demo_memo_origin is None:
+        return
+    moves = list()
+    for cell in demo_memo_origin:
+        start = demo_memo_origin[cell]
+        if start != cell:
+            moves.append((start//demo_n_cols,start%demo_n_cols,cell//demo_n_cols,cell%demo_n_cols))
+    demo_memo_origin = None
+    demo_memo_store(demo_plan(moves))
+
+# store the tilt in progress, settled with plan, then evict down to the budget
+def demo_memo_store(plan):
+    global demo_memo_key
+    global demo_memo_bytes
+    global demo_memo_stamp
+
+    key = demo_memo_key
+    demo_memo_key = None
+    if key is None:
+        return
+    size = 64+DEMO_MEMO_MOVE_BYTES*len(plan)
+    settled = None
+    if DEMO_USE_BITBOARD:
+        settled = demo_map.snapshot()
+        size += demo_n_rows*demo_n_cols//4 # the rocks of the key and the settled rocks
+    else:
+        size += demo_n_rows*demo_n_cols # the cells of the key
+    if size > demo_memo_budget:
+        return
+
+    demo_memo_stamp += 1
+    demo_memo[key] = [demo_memo_stamp,plan,list(demo_loads),settled,size]
+    demo_memo_bytes += size
+
+    while demo_memo_bytes > demo_memo_budget or len(demo_memo) > DEMO_MEMO_MAX_ENTRIES:
+        oldest = min(demo_memo,key=lambda k: demo_memo[k][0])
+        demo_memo_bytes -= demo_memo.pop(oldest)[4]
+
+# forget every tilt, for a new layout
+def demo_memo_clear():
+    global demo_memo_bytes
+    global demo_memo_dir
+    global demo_memo_key
+    global demo_memo_origin
+
+    demo_memo.clear()
+    demo_memo_bytes = 0
+    demo_memo_dir = None
+    demo_memo_key = None
+    demo_memo_origin = None
+
+# demo-related function: start or stop spin cycle mode (AoC part 2)
+#   while spinning, the board tilts north, west, south, east over and over 
+#   instead of following the accelerometer, and the load label shows the north 
+#   load after 1e9 spin cycles, found by cycle detection on a copy of demo_map.
+#   the search runs first, a few cycles per demo_spin_search_step(), with the 
+#   rocks held; a press during the search cancels it
+def demo_spin_toggle():
+    global demo_spinning
+    global demo_spin_search
+    global demo_spin_t_start
+
+    if demo_spinning:
+        demo_spinning = False
+        text_set(label_load,"Load")
+        pix_stop()
+        print("INFO: spin cycle mode off")
+        update_label_loadval()
+    elif demo_spin_search is not None:
+        demo_spin_search = None
+        print("INFO: spin cycle search cancelled")
+        demo_wake()
+    else:
+        demo_tween_finish() # the rocks are held where demo_map has them
+        demo_spin_t_start = time.monotonic()
+        demo_spin_search = day14.SpinSearch(day14.Bitboard.from_grid(demo_map))
+        print("INFO: spin cycle mode, searching for the cycle")
+        sched_delay(DGROUP_2023DAY14,demo_spin_search_step,0.0)
+
+# demo screen task: run DEMO_SPIN_CYCLES_PER_STEP cycles of the search started by 
+#   demo_spin_toggle(), then turn spin cycle mode on once it is done, returns 
+#   seconds until due again.  a board with no repeat soon enough stays as it is
+def demo_spin_search_step():
+    global demo_spin_search
+    global demo_spinning
+    global demo_spin_index
+    global demo_spin_load
+
+    if demo_spin_search is None:
+        return DEMO_PARK_SEC
+
+    try:
+        done = demo_spin_search.step(DEMO_SPIN_CYCLES_PER_STEP)
+    except ValueError as e:
+        print("WARN: no spin cycle mode, %s"%e)
+        demo_spin_search = None
+        demo_wake()
+        return DEMO_PARK_SEC
+    if not done:
+        return 0.0
+
+    (demo_spin_load,cycle_start,cycle_period) = demo_spin_search.result
+    demo_spin_search = None
+    print("INFO: spin cycle mode on, states repeat every %d cycles from cycle %d, load after 1e9 cycles = %d (%0.2f s)"%
+          (cycle_period,cycle_start,demo_spin_load,time.monotonic()-demo_spin_t_start))
+    demo_spinning = True
+    demo_spin_index = 0
+    text_set(label_load,"Spin")
+    pix_play(DGROUP_2023DAY14,pix_chase,PIX_CHASE_SEC,0)
+    demo_set_falldir(day14.SPIN_ORDER[demo_spin_index])
+    demo_wake() # in case the direction was already the first of the cycle
+    update_label_loadval()
+    return DEMO_PARK_SEC
+
+# neopixel functions: the pixels are written straight from packed frames, 3 bytes
+#   per pixel in GRB order already scaled by NEOPIXEL_BRIGHTNESS, so an update is
+#   one neopixel_write() of a frame built at setup, nothing is converted or 
+#   allocated per update.  an animation (fade, chase) is a list of frames played 
+#   by the pix_tick() task of the screen which started it, see pix_play()
+
+# new frame of colors (one 0xRRGGBB per pixel)
+def pix_frame(colors):
+    frame = bytearray(3*num_neopixel)
+    for i in range(num_neopixel):
+        frame[3*i]   = int(((colors[i]>>8)&0xFF)*NEOPIXEL_BRIGHTNESS) # G
+        frame[3*i+1] = int(((colors[i]>>16)&0xFF)*NEOPIXEL_BRIGHTNESS) # R
+        frame[3*i+2] = int((colors[i]&0xFF)*NEOPIXEL_BRIGHTNESS) # B
+    return frame
+
+# color part of the way (0.0..1.0) from color_a to color_b
+def pix_mix(color_a,color_b,part):
+    color = 0
+    for shift in (16,8,0):
+        a = (color_a>>shift)&0xFF
+        b = (color_b>>shift)&0xFF
+        color |= int(a+(b-a)*part+0.5)<<shift
+    return color
+
+# n_frames frames of all pixels going from color_a to color_b, the last one is color_b
+def pix_fade_frames(color_a,color_b,n_frames):
+    frames = list()
+    for k in range(1,n_frames+1):
+        frames.append(pix_frame([pix_mix(color_a,color_b,k/n_frames)]*num_neopixel))
+    return frames
+
+# num_neopixel frames of one pixel of color running along the strip, the 
+#   PIX_CHASE_TAIL pixels behind it fading out
+def pix_chase_frames(color):
+    frames = list()
+    for k in range(num_neopixel):
+        colors = [COLOR_BLACK]*num_neopixel
+        for t in range(PIX_CHASE_TAIL+1):
+            colors[(k-t)%num_neopixel] = pix_mix(color,COLOR_BLACK,t/(PIX_CHASE_TAIL+1))
+        frames.append(pix_frame(colors))
+    return frames
+
+# write frame to the pixels
+def pix_show(frame):
+    global pix_writes
+
+    if USE_NEOPIXELS:
+        neopixel_write.neopixel_write(pix_pin,frame)
+        pix_writes += 1
+
+# play frames on the pixels, one every frame_sec, by the pix_tick() task of 
+#   screen.  loops is the number of times through the frames, 0 for ever
+def pix_play(screen,frames,frame_sec,loops=1):
+    global pix_anim
+    global pix_anim_index
+    global pix_anim_sec
+    global pix_anim_loops
+
+    pix_anim = frames
+    pix_anim_index = 0
+    pix_anim_sec = frame_sec
+    pix_anim_loops = loops
+    sched_delay(screen,pix_tick,0.0)
+
+# stop the animation playing and turn the pixels off
+def pix_stop():
+    global pix_anim
+
+    pix_anim = None
+    pix_show(pix_off)
+
+# every screen's task: show the next frame of the animation playing, returns 
+#   seconds until due again.  parked while nothing plays, pix_play() makes it due
+def pix_tick():
+    global pix_anim
+    global pix_anim_index
+    global pix_anim_loops
+
+    if pix_anim is None:
+        return PIX_PARK_SEC
+
+    pix_show(pix_anim[pix_anim_index])
+    pix_anim_index += 1
+    if pix_anim_index == len(pix_anim):
+        pix_anim_index = 0
+        if pix_anim_loops == 1:
+            pix_anim = None # the last frame stays on
+        elif pix_anim_loops > 1:
+            pix_anim_loops -= 1
+    return pix_anim_sec
+
+# data link functions: frames (see aoc2023_link.py) come in on the second USB 
+#   serial channel, usb_cdc.data (turned on by boot.py), and are applied to the 
+#   running screens without a reload.  link_poll() reads at most LINK_CHUNK bytes 
+#   at a time and never waits for more, so the animations go on while a frame 
+#   comes in
+
+# every screen's task: read what came in on the data link and apply the frames 
+#   completed, returns seconds until due again (at once while more is waiting).
+#   a partial frame is given up after LINK_GAP_SEC without a byte
+def link_poll():
+    global link_last_byte
+
+    n = 0
+    if link_port.in_waiting > 0:
+        n = link_port.readinto(link_chunk) or 0
+    if n > 0:
+        link_last_byte = time.monotonic()
+    elif time.monotonic()-link_last_byte < LINK_GAP_SEC or not link_reader.abandon():
+        return LINK_POLL_SEC
+    else:
+        print("WARN: data link frame cut off, dropped")
+
+    i = 0
+    while True:
+        i = link_reader.feed(link_chunk_view,i,n)
+        if link_reader.frame_type is None:
+            break
+        link_apply(link_reader.frame_type,link_reader.payload())
+        link_reader.next()
+    if n == LINK_CHUNK:
+        return 0.0
+    return LINK_POLL_SEC
+
+# apply a complete frame and answer it with an ACK frame
+def link_apply(frame_type,payload):
+    global link_frames
+
+    link_frames += 1
+    if frame_type == link.BOARD:
+        status = demo_link_layout(payload)
+    elif frame_type == link.LEADERBOARD:
+        status = leaderboard_link(payload)
+    else:
+        print("WARN: data link frame of unknown type %d"%frame_type)
+        status = link.ACK_UNKNOWN
+    link_port.write(link.frame(link.ACK,bytes((frame_type,status))))
+
+# main screen task: blink the "more" label, returns seconds until due again
+def main_more_blink():
+    global main_more_delay_on
+
+    if main_more_delay_on:
+        text_color(label_more,COLOR_BLACK) # turn "off" text
+        main_more_delay_on = False
+    else: 
+        text_color(label_more,COLOR_GRAY) # turn "on" text
+        main_more_delay_on = True
+
+    return main_more_delay_sec
+
+# main screen task: turn to the next page of the leaderboard, returns seconds until due again
+def leaderboard_page_tick():
+    if leaderboard_n_pages() > 1:
+        leaderboard_show_page(leaderboard_page+1)
+    return LEADERBOARD_PAGE_SEC
+
+# 50* screen task: count the stars up, then flash them, returns seconds until due again
+def fiftystar_tick():
+    global fiftystar_stars
+    global fiftystar_flash_on
+    global fiftystar_flash_count
+
+    if fiftystar_stars < MAX_CHAR:
+        fiftystar_stars += 1
+        update_label_stars(fiftystar_stars)
+        pix_show(pix_bar[fiftystar_stars*num_neopixel//MAX_CHAR])
+        
+        if fiftystar_stars == MAX_CHAR:
+            fiftystar_flash_on = True
+            return fiftystar_flash_delay_sec
+        return fiftystar_count_delay_sec
+
+    # on max stars
+    if fiftystar_flash_count < FIFTYSTAR_FLASHES:
+        if fiftystar_flash_on: # if they were on, now turn off
+            update_label_stars(0)
+            pix_play(DGROUP_50STARS,pix_fade_out,fiftystar_flash_delay_sec/(2*PIX_FADE_FRAMES))
+            fiftystar_flash_on = False
+            fiftystar_flash_count += 1
+            
+        else: # if they were off, now turn on
+            update_label_stars(MAX_CHAR)
+            pix_play(DGROUP_50STARS,pix_fade_in,fiftystar_flash_delay_sec/(2*PIX_FADE_FRAMES))
+            fiftystar_flash_on = True
+
+        return fiftystar_flash_delay_sec
+
+    # last flash
+    fiftystar_flash_on = True 
+    fiftystar_flash_count = 0
+    fiftystar_stars = 0
+    update_label_stars(0)
+    return fiftystar_count_delay_sec
+
+# demo screen task: step the rocks, returns seconds until due again
+#   once the board settled (demo_stop) it is parked, demo_wake() makes it due again
+def demo_step():
+    if demo_stop or demo_spin_search is not None: 
+        return DEMO_PARK_SEC
+
+    demo_rocks_fall() 
+    return demo_step_delay_sec
+
+# scheduler functions: sched_tasks[screen] (indexed by DGROUP_*) holds the periodic 
+#   tasks of each screen as [deadline,task,draws] lists.  task() runs once time.monotonic() 
+#   reaches deadline and returns the seconds until it is due again.  only the 
+#   tasks of the screen shown run, and the loop sleeps until the next deadline
+
+# register task for screen, first due after delay seconds.  draws is False for a 
+#   task which only sometimes changes the display, it sets display_dirty itself then
+def sched_add(screen,task,delay,draws=True):
+    sched_tasks[screen].append([time.monotonic()+delay,task,draws])
+
+# make task of screen due after delay seconds
+def sched_delay(screen,task,delay):
+    for entry in sched_tasks[screen]:
+        if entry[1] is task:
+            entry[0] = time.monotonic()+delay
+
+# run the tasks of screen which are due, returns the earliest deadline (time.monotonic())
+#   of its tasks, at most SCHED_IDLE_MAX_SEC away so key presses are still seen.
+#   sets display_dirty when a task which draws ran
+def sched_run(screen):
+    global display_dirty
+
+    next_deadline = time.monotonic() + SCHED_IDLE_MAX_SEC
+    for entry in sched_tasks[screen]:
+        if time.monotonic() >= entry[0]:
+            delay = entry[1]()
+            entry[0] = time.monotonic() + delay
+            if entry[2]:
+                display_dirty = True
+        if entry[0] < next_deadline:
+            next_deadline = entry[0]
+    return next_deadline
+
+# profiling functions: counters per screen (indexed by DGROUP_*) since the last 
+#   summary, and the recent loop iteration times in prof_ring.  nothing is 
+#   printed until prof_summary(), a print per iteration would block on the serial link
+
+# clear all counters, starts a new summary interval
+def prof_reset():
+    global prof_t_start
+    global prof_mem_low
+    global prof_mem_last
+    global prof_gc_count
+    global prof_gc_worst_ns
+    global accel_reads
+    global pix_writes
+    global link_frames
+    global demo_memo_hits
+    global demo_memo_misses
+
+    for screen in range(len(prof_iters)):
+        prof_iters[screen] = 0
+        prof_handler_ns[screen] = 0
+        prof_refreshes[screen] = 0
+        prof_refresh_ns[screen] = 0
+        prof_worst_ns[screen] = 0
+    prof_t_start = time.monotonic_ns()
+    prof_mem_low = gc.mem_free()
+    prof_mem_last = prof_mem_low
+    prof_gc_count = 0
+    prof_gc_worst_ns = 0
+    accel_reads = 0
+    pix_writes = 0
+    link_frames = 0
+    demo_memo_hits = 0
+    demo_memo_misses = 0
+    if link_port is not None:
+        link_reader.errors = 0
+
+# account a loop iteration on screen which started at t_start (time.monotonic_ns())
+#   the heap only has more free memory than at the last iteration when the 
+#   collector ran, that is how a GC pause is spotted
+def prof_loop_done(screen,t_start):
+    global prof_ring_index
+    global prof_mem_low
+    global prof_mem_last
+    global prof_gc_count
+    global prof_gc_worst_ns
+
+    dt = time.monotonic_ns() - t_start
+    prof_iters[screen] += 1
+    if dt > prof_worst_ns[screen]:
+        prof_worst_ns[screen] = dt
+    prof_ring[prof_ring_index] = dt//1000 # us
+    prof_ring_index = (prof_ring_index+1)%PROF_RING_SIZE
+
+    mem = gc.mem_free()
+    if mem < prof_mem_low:
+        prof_mem_low = mem
+    if mem > prof_mem_last:
+        prof_gc_count += 1
+        if dt > prof_gc_worst_ns:
+            prof_gc_worst_ns = dt
+    prof_mem_last = mem
+
+# refresh the display and account the time to screen
+def prof_refresh(screen):
+    t_start = time.monotonic_ns()
+    board.DISPLAY.refresh()
+    prof_refreshes[screen] += 1
+    prof_refresh_ns[screen] += time.monotonic_ns() - t_start
+
+# print the counters as one line and start a new interval.  per screen: loop 
+#   iterations, mean state handler time, display refreshes and their mean time, 
+#   worst iteration, bytes the screen took when built (- when not built). 
+#   then the median, 95th percentile and max of the recent iterations in 
+#   prof_ring, free memory low-water mark and GC pauses spotted,
+#   the accelerometer reads (I2C transfers) of demo_check_rotation() and the 
+#   neopixel writes of pix_show(), the data link frames taken in and dropped,
+#   the tilt memo hits and misses and its entries
+def prof_summary():
+    line = "PROF: %0.1fs"%((time.monotonic_ns()-prof_t_start)/1e9)
+    for screen in range(len(prof_iters)):
+        n = max(prof_iters[screen],1)
+        line += " | %s it=%d h=%dus r=%d/%dus w=%dus"%(PROF_SCREEN_NAMES[screen],prof_iters[screen],
+                prof_handler_ns[screen]//n//1000,prof_refreshes[screen],
+                prof_refresh_ns[screen]//max(prof_refreshes[screen],1)//1000,prof_worst_ns[screen]//1000)
+        if disp_group[screen] is not None:
+            line += " m=%d"%screen_mem[screen]
+        else:
+            line += " m=-"
+    ring = sorted(prof_ring)
+    line += " | loop p50=%dus p95=%dus max=%dus"%(ring[PROF_RING_SIZE//2],ring[PROF_RING_SIZE*95//100],ring[-1])
+    line += " | mem_low=%d gc=%d gc_worst=%dus"%(prof_mem_low,prof_gc_count,prof_gc_worst_ns//1000)
+    if USE_ACCEL:
+        line += " | accel reads=%d"%accel_reads
+    if USE_NEOPIXELS:
+        line += " | pixel writes=%d"%pix_writes
+    if link_port is not None:
+        line += " | link frames=%d errors=%d"%(link_frames,link_reader.errors)
+    line += " | memo hits=%d misses=%d entries=%d/%dB"%(demo_memo_hits,demo_memo_misses,len(demo_memo),demo_memo_bytes)
+    print(line)
+    prof_reset()
+
+# screen functions: a screen (disp_group[DGROUP_*]) is only built when it is 
+#   shown, by SCREEN_BUILD[screen], and screens not shown are kept built (warm) 
+#   while they fit in SCREEN_WARM_BUDGET, else released by SCREEN_RELEASE[screen] 
+#   least recently shown first.  a builder returns the new Group and sets the 
+#   globals its screen tasks use, a release sets them back to None
+
+# build the main screen: leaderboard rows pool, "more" label
+def main_build():
+    global leaderboard_rows
+    global label_more
+
+    group = displayio.Group()
+
+    # # background
+    # bg = Rect(0, 0, board.DISPLAY.width, board.DISPLAY.height, fill=COLOR_BGBLUE)
+    # group.append(bg)
+
+    # AOC label at top
+    group.append(text_label("Advent of Code\n   int y=2023;",COLOR_AOCGREEN,0,0)) # upper left
+
+    # "VTS Leaderboard"
+    group.append(text_label("~ VTS Leaderboard ~",COLOR_WHITE,board.DISPLAY.width/2,45,(0.5,0.0))) # middle top
+
+    # leaderboard rows, a fixed pool of LEADERBOARD_ROWS filled from the record file
+    #   one page at a time by leaderboard_show_page().  the stars field overlays the 
+    #   blanks after the rank, one pixel left and down
+    leaderboard_rows = list() # (row field, stars field)
+    for i in range(LEADERBOARD_ROWS):
+        row_field = text_field(MAX_CHAR,COLOR_WHITE,0,60+15*i)
+        group.append(row_field)
+        stars_field = text_field(LEADERBOARD_STARS_CHARS,COLOR_AOCYELLOW,-1,60+15*i+1)
+        group.append(stars_field)
+        leaderboard_rows.append((row_field,stars_field))
+    leaderboard_show_page(leaderboard_page)
+
+    # push button for more...
+    label_more = text_label("push button for more",COLOR_BLACK,board.DISPLAY.width/2,board.DISPLAY.height,(0.5,1.0)) # middle bottom
+    group.append(label_more)
+    return group
+
+def main_release():
+    global leaderboard_rows
+    global label_more
+
+    leaderboard_rows = None
+    label_more = None
+
+# build the first to 50 stars screen: name and date, stars
+def fiftystar_build():
+    global label_firstto50name
+    global label_firstto50date
+    global label_stars
+
+    group = displayio.Group()
+
+    # AOC label at top
+    group.append(text_label("Advent of Code\n   int y=2023;",COLOR_AOCGREEN,0,0)) # left top
+
+    # "First to 50*"
+    group.append(text_label("First to 50*",COLOR_WHITE,board.DISPLAY.width/2,45,(0.5,0.0))) # middle top
+
+    # Name and date, from the leaderboard record file, centered
+    label_firstto50name = text_field(MAX_CHAR,COLOR_AOCYELLOW,0,60)
+    group.append(label_firstto50name)
+    label_firstto50date = text_field(MAX_CHAR,COLOR_WHITE,0,75)
+    group.append(label_firstto50date)
+    leaderboard_show_fifty()
+
+    # stars
+    # label_stars = label.Label(font,text="0123456789012345678901234",color=0xffff66) # only 20 chars show
+    #label_stars = label.Label(font,text=("*"*MAX_CHAR),color=COLOR_YELLOW)
+    label_stars = text_field(MAX_CHAR,COLOR_AOCYELLOW,0,100) # text field, see text_field()
+    group.append(label_stars)
+    return group
+
+def fiftystar_release():
+    global label_firstto50name
+    global label_firstto50date
+    global label_stars
 
-# load font
-font = bitmap_font.load_font("fonts/SourceCodePro-subset_32_126-10pt.bdf", 
-                             displayio.Bitmap)
+    label_firstto50name = None
+    label_firstto50date = None
+    label_stars = None
+
+# build the demo screen: read the layout, size and draw the board, direction 
+#   highlight, load labels.  the board starts from the layout, as after demo_init()
+def demo_build():
+    global demo_board_mem
+    global demo_tile_sheet
+    global demo_tile_palette
+    global demo_board_tiles
+    global demo_highlight_wide
+    global demo_highlight_tall
+    global label_load
+    global label_loadval
+    global demo_tween
+    global demo_settled_dir
+    global demo_work_dir
+    global demo_memo_budget
+    global demo_loadval_shown
+
+    group = displayio.Group()
+
+    # # background -- looks bad when display is viewed from the side
+    # bg = Rect(0, 0, board.DISPLAY.width, board.DISPLAY.height, fill=0x0f0f23)
+    # group.append(bg)
+
+    # AOC label at top
+    group.append(text_label("AoC 2023      Day 14",COLOR_AOCGREEN,0,0)) # left top
+
+    # size the board from the layout file, sets demo_n_rows, demo_n_cols, demo_cell, ...
+    layout = demo_read_layout() # parsed once per build, see demo_load_layout()
+    demo_set_geometry(*layout.shape)
+
+    # border NOTE: don't forget to adjust start of grid positions START_X ...
+    group.append( Rect( demo_grid_x-2, 
+                        demo_grid_y-2,
+                        demo_cell*demo_n_cols+4, # width
+                        demo_cell*demo_n_rows+4, # height
+                        fill=COLOR_BLACK, 
+                        stroke=2,
+                        outline=COLOR_WHITE) )
+
+    # board, one TileGrid over a three tile sheet, tile index is the DEMO_V_* value of the cell
+    gc.collect()
+    demo_board_mem = gc.mem_free()
+    (demo_tile_sheet,demo_tile_palette) = demo_make_tile_sheet()
+    demo_board_tiles = displayio.TileGrid(demo_tile_sheet,
+                                          pixel_shader=demo_tile_palette,
+                                          width=demo_n_cols,
+                                          height=demo_n_rows,
+                                          tile_width=demo_cell,
+                                          tile_height=demo_cell,
+                                          default_tile=DEMO_V_EMPTY,
+                                          x=demo_grid_x,
+                                          y=demo_grid_y)
+    group.append(demo_board_tiles)
+    demo_board_mem -= gc.mem_free()
+
+    # direction highlight
+    demo_highlight_wide = Rect( demo_grid_x-2, 
+                                demo_grid_y+demo_cell*demo_n_rows,
+                                demo_cell*demo_n_cols+4, # width
+                                2, # height
+                                fill=COLOR_YELLOW )
+    group.append(demo_highlight_wide)
+
+    # can't seem to adjust width and height at runtime... so we need to move these on and off screen
+    demo_highlight_tall = Rect( 160, 
+                                120,
+                                2, # width
+                                demo_cell*demo_n_rows+4, # height
+                                fill=COLOR_YELLOW )
+    group.append(demo_highlight_tall)
+
+    # "Load" label
+    label_load = text_label("Load",COLOR_WHITE,0,100) # left top
+    group.append(label_load)
+
+    # "Load" value label
+    label_loadval = text_field(DEMO_LOADVAL_CHARS,COLOR_WHITE,0,115) # text field, see text_field()
+    text_set(label_loadval,"   0")
+    demo_loadval_shown = 0 # what the new label shows, update_label_loadval() redraws from it
+    group.append(label_loadval)
+
+    # the board itself, sets demo_layout, demo_layout_loads and demo_map
+    demo_load_layout(layout)
+    layout = None
+    demo_make_dir_tables() # direction tables of the steps and the highlight
+    demo_place_highlight()
+    demo_tween = list()
+    demo_settled_dir = None
+    demo_work_dir = None
+    demo_memo_clear()
+    gc.collect()
+    demo_memo_budget = int(gc.mem_free()*DEMO_MEMO_HEAP_FRACTION)
+    return group
+
+def demo_release():
+    global demo_tile_sheet
+    global demo_tile_palette
+    global demo_board_tiles
+    global demo_highlight_wide
+    global demo_highlight_tall
+    global label_load
+    global label_loadval
+    global demo_layout
+    global demo_map
+    global demo_dir_views
+    global demo_tween
+    global demo_work_dir
+
+    if demo_spinning or demo_spin_search is not None:
+        demo_spin_toggle()
+    demo_tile_sheet = None
+    demo_tile_palette = None
+    demo_board_tiles = None
+    demo_highlight_wide = None
+    demo_highlight_tall = None
+    label_load = None
+    label_loadval = None
+    demo_layout = None
+    demo_map = None
+    demo_dir_views = None
+    demo_tween = list()
+    del demo_work[:]
+    demo_work_dir = None
+    demo_memo_clear()
+
+# release screen, it is built again the next time it is shown
+def screen_release(screen):
+    SCREEN_RELEASE[screen]()
+    disp_group[screen] = None
+    print("INFO: %s screen released, %d bytes"%(PROF_SCREEN_NAMES[screen],screen_mem[screen]))
+
+# show screen, building it first when it is not built.  then release the least 
+#   recently shown other screens until the ones still built take no more than 
+#   SCREEN_WARM_BUDGET bytes
+def screen_show(screen):
+    global screen_shows
+    global demo_render_reported
+
+    if disp_group[screen] is None:
+        gc.collect()
+        mem_free_before = gc.mem_free()
+        t_start = time.monotonic()
+        disp_group[screen] = SCREEN_BUILD[screen]()
+        gc.collect()
+        screen_mem[screen] = mem_free_before-gc.mem_free()
+        print("INFO: %s screen built in %0.1f ms, takes %d bytes"%(PROF_SCREEN_NAMES[screen],
+              1000*(time.monotonic()-t_start),screen_mem[screen]))
+    board.DISPLAY.show(disp_group[screen])
+    screen_shows += 1
+    screen_last_shown[screen] = screen_shows
+
+    warm = [s for s in range(len(disp_group)) if s != screen and disp_group[s] is not None]
+    warm.sort(key=lambda s: screen_last_shown[s])
+    warm_mem = 0
+    for s in warm:
+        warm_mem += screen_mem[s]
+    while warm and warm_mem > SCREEN_WARM_BUDGET:
+        s = warm.pop(0)
+        screen_release(s)
+        warm_mem -= screen_mem[s]
+    gc.collect()
+    print("INFO: showing %s screen, free memory = %d bytes"%(PROF_SCREEN_NAMES[screen],gc.mem_free()))
+
+    if screen == DGROUP_2023DAY14 and DEMO_RENDER_REPORT and not demo_render_reported:
+        demo_render_reported = True
+        demo_render_report()
 
-# display group setup
-disp_group = list()
-disp_group.append(displayio.Group()) # disp_group[0] for main leaderboard
-disp_group.append(displayio.Group()) # disp_group[1] for first-to-50 stars
-disp_group.append(displayio.Group()) # disp_group[2] for 2023 day14 demo
+# SETUP ----------------------------------------------------------------------
+
+# the loop refreshes the display once per frame, after all the changes of a tick 
+#   (see DISPLAY_FPS), instead of displayio refreshing in the middle of them
+board.DISPLAY.auto_refresh = False
+
+# load font, as the glyph tiles of the text fields (text_sheet)
+# from the atlas made by host-tools/font_atlas.py, else from the BDF font
+t_font = time.monotonic()
+try:
+    text_load_atlas("fonts/SourceCodePro-subset_32_126-10pt.atlas")
+    print("INFO: font atlas loaded in %0.1f ms"%(1000*(time.monotonic()-t_font)))
+except (OSError,ValueError) as e:
+    print("WARN: no usable font atlas (%s), parsing the BDF font"%e)
+    from adafruit_bitmap_font import bitmap_font # only needed without the atlas
+    font = bitmap_font.load_font("fonts/SourceCodePro-subset_32_126-10pt.bdf", 
+                                 displayio.Bitmap)
+    text_make_sheet(font)
+    font = None
+    print("INFO: BDF font loaded in %0.1f ms"%(1000*(time.monotonic()-t_font)))
+
+# display group setup, each is None until the screen is built (see screen_show())
+disp_group = [None,None,None]
+# disp_group[0] for main leaderboard
+# disp_group[1] for first-to-50 stars
+# disp_group[2] for 2023 day14 demo
 DGROUP_MAIN      = const(0)
 DGROUP_50STARS   = const(1)
 DGROUP_2023DAY14 = const(2)
-
-# build common display group assets - DOES NOT WORK, CANNOT ADD OBJECTS TO MULTIPLE DISPLAY GROUPS
-#label_aoc = label.Label(font, text="Advent of Code\n  int y=202x;", color=0x009900)
-#label_aoc.anchor_point = (0.0,0.0) # upper left
-#label_aoc.anchored_position = (0,0)
+label_more = None # text of the built screens the screen tasks change, see screen_show()
+label_stars = None
+label_firstto50name = None
+label_firstto50date = None
+label_load = None
+label_loadval = None
+demo_board_tiles = None
 
 # button stuff
 BUTTON_LEFT   = const(128)
@@ -362,6 +1850,16 @@ BUTTON_START  = const(4)
 BUTTON_A      = const(2)
 BUTTON_B      = const(1)
 
+# key_number reported by keys.events is the bit position of the BUTTON_* mask above
+KEY_LEFT   = const(7)
+KEY_UP     = const(6)
+KEY_DOWN   = const(5)
+KEY_RIGHT  = const(4)
+KEY_SELECT = const(3)
+KEY_START  = const(2)
+KEY_A      = const(1)
+KEY_B      = const(0)
+
 keys = keypad.ShiftRegisterKeys(
     clock=board.BUTTON_CLOCK,
     data=board.BUTTON_OUT,
@@ -374,222 +1872,196 @@ keys = keypad.ShiftRegisterKeys(
 # read by pulling (x,y,z) = accel.acceleration
 # normalize by dividing by adafruit_lis3dh.STANDARD_GRAVITY
 # to check for shaking, use "accel.shake(shake_threshold=30)" (lower = easier to detect, try 15-60)
+# demo_check_rotation() samples it through the data-ready interrupt on int1 instead
+accel_drdy = False # True once the data-ready interrupt is on int1
 if USE_ACCEL: 
-    accel = adafruit_lis3dh.LIS3DH_I2C(board.I2C(), int1=digitalio.DigitalInOut(board.ACCELEROMETER_INTERRUPT))
+    accel_int1 = digitalio.DigitalInOut(board.ACCELEROMETER_INTERRUPT)
+    accel = adafruit_lis3dh.LIS3DH_I2C(board.I2C(), address=ACCEL_I2C_ADDRESS, int1=accel_int1)
     accel.range = adafruit_lis3dh.RANGE_2_G
+    accel.data_rate = {1: adafruit_lis3dh.DATARATE_1_HZ, 10: adafruit_lis3dh.DATARATE_10_HZ,
+                       25: adafruit_lis3dh.DATARATE_25_HZ, 50: adafruit_lis3dh.DATARATE_50_HZ,
+                       100: adafruit_lis3dh.DATARATE_100_HZ}[ACCEL_DATA_RATE_HZ]
+    accel_drdy = accel_write_register(ACCEL_REG_CTRL3,ACCEL_CTRL3_I1_DRDY1) # data ready on int1
+    if not accel_drdy:
+        print("WARN: no accelerometer data-ready interrupt, polling it")
+ACCEL_HYST_RATIO = tan(radians(45+ACCEL_HYST_DEG)) # |major axis| over |minor axis| needed to change direction
+accel_poll_sec = (0.5 if accel_drdy else 1.0)/ACCEL_DATA_RATE_HZ # int1 is polled twice per sample period, else one read per sample
+accel_min_tilt_sq = (ACCEL_MIN_TILT_G*adafruit_lis3dh.STANDARD_GRAVITY)**2
+accel_x = 0.0 # low-pass filtered acceleration (m/s^2)
+accel_y = 0.0
+accel_candidate = None # direction the filtered samples point to, when not demo_falldir
+accel_stable = 0 # samples in a row which gave accel_candidate
+accel_reads = 0 # acceleration reads (I2C transfers) since the last profiling summary
 
 # print('DEBUG: initial accelerometer reading (normalized): ')
 # (a_x,a_y,a_z) = accel.acceleration 
 # print('       a_x = %0.2f g, a_y = %0.2f g, a_z = %0.2f g'%
 #       (a_x/adafruit_lis3dh.STANDARD_GRAVITY,a_y/adafruit_lis3dh.STANDARD_GRAVITY,a_z/adafruit_lis3dh.STANDARD_GRAVITY))
 
-# build disp_group[DGROUP_MAIN] --------------------------
-
-# # background
-# bg = Rect(0, 0, board.DISPLAY.width, board.DISPLAY.height, fill=COLOR_BGBLUE)
-# disp_group[DGROUP_MAIN].append(bg)
-
-# AOC label at top
-label_aoc = label.Label(font, text="Advent of Code\n   int y=2023;", color=COLOR_AOCGREEN)
-label_aoc.anchor_point = (0.0,0.0) # upper left
-label_aoc.anchored_position = (0,0)
-disp_group[DGROUP_MAIN].append(label_aoc)
-
-# "VTS Leaderboard"
-label_leaderboard = label.Label(font,text="~ VTS Leaderboard ~")
-label_leaderboard.anchor_point = (0.5,0.0) # middle top
-label_leaderboard.anchored_position = (board.DISPLAY.width/2,45)
-disp_group[DGROUP_MAIN].append(label_leaderboard)
-
-# first place                             NNNNNNNNNNNNN
-label_1st = label.Label(font,text="1st:   DominickBeamn")
-label_1st.anchor_point = (0.0,0.0) # left top
-label_1st.anchored_position = (0,60)
-disp_group[DGROUP_MAIN].append(label_1st)
-
-label_1st_stars = label.Label(font,text="    50*",color=COLOR_AOCYELLOW)
-label_1st_stars.anchor_point = (0.0,0.0) # left top
-label_1st_stars.anchored_position = (-1,60+1)
-disp_group[DGROUP_MAIN].append(label_1st_stars)
-
-# second place                            NNNNNNNNNNNNN
-label_2nd = label.Label(font,text="2nd:   Sean McCarthy")
-label_2nd.anchor_point = (0.0,0.0) # left top
-label_2nd.anchored_position = (0,75)
-disp_group[DGROUP_MAIN].append(label_2nd)
-
-label_2nd_stars = label.Label(font,text="    42*",color=COLOR_AOCYELLOW)
-label_2nd_stars.anchor_point = (0.0,0.0) # left top
-label_2nd_stars.anchored_position = (-1,75+1)
-disp_group[DGROUP_MAIN].append(label_2nd_stars)
-
-# third place                             NNNNNNNNNNNNN
-label_3rd = label.Label(font,text="3rd:   DaveBuscaglia")
-label_3rd.anchor_point = (0.0,0.0) # left top
-label_3rd.anchored_position = (0,90)
-disp_group[DGROUP_MAIN].append(label_3rd)
-
-label_3rd_stars = label.Label(font,text="    41*",color=COLOR_AOCYELLOW)
-label_3rd_stars.anchor_point = (0.0,0.0) # left top
-label_3rd_stars.anchored_position = (-1,90+1)
-disp_group[DGROUP_MAIN].append(label_3rd_stars)
-
-# push button for more...
-label_more = label.Label(font,text="push button for more",color=COLOR_BLACK)
-label_more.anchor_point = (0.5,1.0) # middle bottom
-label_more.anchored_position = (board.DISPLAY.width/2,board.DISPLAY.height)
-disp_group[DGROUP_MAIN].append(label_more)
-
-# build disp_group[DGROUP_50STARS] -----------------------
-
-# # background
-# bg = Rect(0, 0, board.DISPLAY.width, board.DISPLAY.height, fill=0x0f0f23)
-# disp_group[DGROUP_50STARS].append(bg)
-
-# AOC label at top
-label_aoc = label.Label(font, text="Advent of Code\n   int y=2023;", color=COLOR_AOCGREEN)
-label_aoc.anchor_point = (0.0,0.0) # left top
-label_aoc.anchored_position = (0,0)
-disp_group[DGROUP_50STARS].append(label_aoc)
-
-# "First to 50*"
-label_firstto50 = label.Label(font,text="First to 50*")
-label_firstto50.anchor_point = (0.5,0.0) # middle top
-label_firstto50.anchored_position = (board.DISPLAY.width/2,45)
-disp_group[DGROUP_50STARS].append(label_firstto50)
-
-# Name
-label_firstto50name = label.Label(font,text="Dominick Beaman", color=COLOR_AOCYELLOW)
-label_firstto50name.anchor_point = (0.5,0.0) # middle top
-label_firstto50name.anchored_position = (board.DISPLAY.width/2,60)
-disp_group[DGROUP_50STARS].append(label_firstto50name)
-
-# Date
-label_firstto50date = label.Label(font,text="24 Dec 2023 21:35!")
-label_firstto50date.anchor_point = (0.5,0.0) # middle top
-label_firstto50date.anchored_position = (board.DISPLAY.width/2,75)
-disp_group[DGROUP_50STARS].append(label_firstto50date)
-
-# stars
-# label_stars = label.Label(font,text="0123456789012345678901234",color=0xffff66) # only 20 chars show
-#label_stars = label.Label(font,text=("*"*MAX_CHAR),color=COLOR_YELLOW)
-label_stars = label.Label(font,text=(" "*MAX_CHAR),color=COLOR_AOCYELLOW)
-label_stars.anchor_point = (0.0,0.0) # middle top
-label_stars.anchored_position = (0,100)
-disp_group[DGROUP_50STARS].append(label_stars)
-
-
-# build disp_group[DGROUP_2023DAY14] ---------------------
-
-# # background -- looks bad when display is viewed from the side
-# bg = Rect(0, 0, board.DISPLAY.width, board.DISPLAY.height, fill=0x0f0f23)
-# disp_group[DGROUP_2023DAY14].append(bg)
-
-# AOC label at top
-label_aoc = label.Label(font, text="AoC 2023      Day 14", color=COLOR_AOCGREEN)
-label_aoc.anchor_point = (0.0,0.0) # left top
-label_aoc.anchored_position = (0,0)
-disp_group[DGROUP_2023DAY14].append(label_aoc)
-
-# border NOTE: don't forget to adjust start of grid positions START_X ...
-disp_group[DGROUP_2023DAY14].append( Rect( DEMO_CIR_START_X-2, 
-                                            DEMO_CIR_START_Y-2,
-                                            (2*DEMO_CIR_RADIUS+2)*DEMO_N_ROWS+4, # width
-                                            (2*DEMO_CIR_RADIUS+2)*DEMO_N_COLS+4, # height
-                                            fill=COLOR_BLACK, 
-                                            stroke=2,
-                                            outline=COLOR_WHITE) )
-
-# direction highlight
-DEMO_DIR_HIGHLIGHT_WIDE_INDEX = len(disp_group[DGROUP_2023DAY14])
-disp_group[DGROUP_2023DAY14].append( Rect( DEMO_CIR_START_X-2, 
-                                            DEMO_CIR_START_Y+(2*DEMO_CIR_RADIUS+2)*DEMO_N_ROWS,
-                                            (2*DEMO_CIR_RADIUS+2)*DEMO_N_ROWS+4, # width
-                                            2, # height
-                                            fill=COLOR_YELLOW ) )
-
-# can't seem to adjust width and height at runtime... so we need to move these on and off screen
-DEMO_DIR_HIGHLIGHT_TALL_INDEX = len(disp_group[DGROUP_2023DAY14])
-disp_group[DGROUP_2023DAY14].append( Rect( 160, 
-                                           120,
-                                           2, # width
-                                           (2*DEMO_CIR_RADIUS+2)*DEMO_N_COLS+4, # height
-                                           fill=COLOR_YELLOW ) )
-
-# "Load" label
-label_load = label.Label(font, text="Load")
-label_load.anchor_point = (0.0,0.0) # left top
-label_load.anchored_position = (0,100)
-disp_group[DGROUP_2023DAY14].append(label_load)
-
-# "Load" value label
-label_loadval = label.Label(font, text="   0")
-label_loadval.anchor_point = (0.0,0.0) # left top
-label_loadval.anchored_position = (0,115)
-disp_group[DGROUP_2023DAY14].append(label_loadval)
-
-
 # neopixel init ------------------------------------------
 # if USE_NEOPIXELS: # always init... just never turn on if not using
 pin_neopixel = board.NEOPIXEL
 num_neopixel = 5
-neopixels = neopixel.NeoPixel(pin_neopixel, num_neopixel, pixel_order=neopixel.GRB,
-                            brightness=0.01, auto_write=False)
-neopixels.fill(COLOR_BLACK) # turn off
-neopixels.show()
+pix_pin = digitalio.DigitalInOut(pin_neopixel)
+pix_pin.direction = digitalio.Direction.OUTPUT
+pix_writes = 0 # neopixel_write() calls since the last profiling summary
+
+# frames, see pix_frame()
+pix_off = pix_frame([COLOR_BLACK]*num_neopixel)
+pix_bar = [pix_frame([COLOR_YELLOW]*n+[COLOR_BLACK]*(num_neopixel-n)) for n in range(num_neopixel+1)] # first n pixels on
+pix_fade_out = pix_fade_frames(COLOR_YELLOW,COLOR_BLACK,PIX_FADE_FRAMES)
+pix_fade_in = pix_fade_frames(COLOR_BLACK,COLOR_YELLOW,PIX_FADE_FRAMES)
+PIX_CHASE_TAIL = const(2)
+pix_chase = pix_chase_frames(COLOR_YELLOW)
+PIX_PARK_SEC = 1.0 # pix_tick() delay while nothing plays
+
+pix_anim = None # frames playing, see pix_play()
+pix_anim_index = 0
+pix_anim_sec = PIX_PARK_SEC
+pix_anim_loops = 1
+pix_show(pix_off) # turn off
+
+# data link init -----------------------------------------
+# usb_cdc.data is None unless boot.py turned it on, which takes a reset (not a reload)
+link_port = usb_cdc.data
+link_frames = 0 # frames taken in since the last profiling summary
+if link_port is None:
+    print("INFO: no data link, see boot.py")
+else:
+    link_port.timeout = 0 # readinto() takes what is there and returns
+    link_port.write_timeout = 0.1 # an ACK the host does not read is dropped
+    link_reader = link.FrameReader()
+    link_chunk = bytearray(LINK_CHUNK)
+    link_chunk_view = memoryview(link_chunk) # so feed() slices without copying
+    link_last_byte = 0.0 # time.monotonic() when the last bytes came in
+    print("INFO: data link on usb_cdc.data")
 
 # establish global variables for all states ---------------
 
 main_more_delay_sec = 2.0
 main_more_delay_on = False
-main_more_change_time = time.monotonic() + 2.0*main_more_delay_sec 
-# delay a little extra the first time
 
 fiftystar_stars = 0
 fiftystar_count_delay_sec = 1.0
 fiftystar_flash_on = True
 fiftystar_flash_count = 0
 fiftystar_flash_delay_sec = 1.0
-fiftystar_change_time = 0.0
 FIFTYSTAR_FLASHES = const(4)
 
 # demo global vars 
 
 demo_loadval = 0
+demo_loadval_shown = 0 # value on label_loadval
 
-demo_stop = False 
+demo_loads = [0]*5 
+# running load totals indexed by DEMO_FALL_*, recomputed by demo_recompute_loads() 
+#  and kept up to date on every rock move by day14.account_moves()
+
+demo_stop = False # set once the board settled, until demo_wake()
 demo_process_rotate = False 
+DEMO_PARK_SEC = 1.0 # demo_step() delay while stopped, a backstop as demo_wake() makes it due at once
+DEMO_SPIN_CYCLES_PER_STEP = const(1) # spin cycles searched per demo_spin_search_step() call, a 100x100 board is the slow case
+
+demo_work = list() # worklist of DEMO_MODE_ONE_ROCK, cells (irow*demo_n_cols+icol) of rocks which may move
+demo_work_head = 0 # demo_work entries before this index are done
+demo_work_dir = None # direction demo_work was built for, None to rebuild
+DEMO_WORK_COMPACT = const(64) # done entries dropped from demo_work once there are this many
 
 DEMO_FALL_DOWN  = const(1)
 DEMO_FALL_LEFT  = const(2)
 DEMO_FALL_RIGHT = const(3)
 DEMO_FALL_UP    = const(4)
+DEMO_FALL_NAMES = (None,"DOWN","LEFT","RIGHT","UP") # indexed by DEMO_FALL_*
 demo_falldir = DEMO_FALL_DOWN # provision for accelerometer direction reading
 
-# MAIN ANIMATION SPEED KNOB
-demo_step_delay_sec = 0.010 # 100 ms = 0.100 # looks good 
+demo_spinning = False # spin cycle mode, toggled by button A on the demo screen
+demo_spin_index = 0 # position in day14.SPIN_ORDER
+demo_spin_load = 0 # north load after 1e9 spin cycles
+demo_spin_search = None # day14.SpinSearch while the cycle is searched for, see demo_spin_toggle()
+demo_spin_t_start = 0.0
 
-demo_map = np.zeros((DEMO_N_ROWS,DEMO_N_COLS),dtype=np.int8)
-# this is a DEMO_N_ROWS x DEMO_N_COLS matrix, mapping locations of grid
-#  values are one of the three below, where DEMO_V_EMPTY = 0
+# how much moves per animation step
+DEMO_MODE_ONE_ROCK = const(1) # one rock per step (rocks visibly fall one at a time)
+DEMO_MODE_BATCH    = const(2) # every rock that can move moves one cell per step
+DEMO_MODE_SETTLE   = const(3) # solve the tilt in one go, then animate rocks to where they land
+demo_step_mode = DEMO_MODE_ONE_ROCK
 
-DEMO_V_EMPTY = const(0)
-DEMO_V_ROCK  = const(1)
-DEMO_V_CUBE  = const(2)
-
-demo_disp_circles = list()
+# MAIN ANIMATION SPEED KNOB
+demo_step_delay_sec = 0.010 # 100 ms = 0.100 # looks good 
 
-demo_display_group_init_size = len(disp_group[DGROUP_2023DAY14])
+# demo_map, the board, is set up by demo_build() with the rest of the demo screen
+# this is a demo_n_rows x demo_n_cols matrix, mapping locations of grid
+#  values are one of DEMO_V_EMPTY (0), DEMO_V_ROCK or DEMO_V_CUBE (see top)
+#  either way it is read and written as demo_map[irow,icol]
+demo_map = None
+
+demo_tween = list() # animation plan of DEMO_MODE_SETTLE, see demo_settle()
+demo_tween_frame = 0
+demo_settled_dir = None # direction demo_map was last settled for by demo_settle()
+demo_memo = dict() # tilt memo, (board state,direction) -> entry, see demo_memo_begin()
+demo_memo_bytes = 0 # estimated bytes of the entries of demo_memo
+demo_memo_budget = 0 # most bytes demo_memo may take, set by demo_build()
+demo_memo_stamp = 0 # use counter, an entry keeps the count of its last use
+demo_memo_dir = None # direction the memo was looked up for, None to look up again on the next step
+demo_memo_key = None # key of the tilt in progress until it is stored, None after a hit
+demo_memo_origin = None # step modes: cell -> cell its rock started the tilt from, while the tilt is tracked
+demo_memo_hits = 0
+demo_memo_misses = 0
+demo_render_reported = False # demo_render_report() runs the first time the demo screen is shown
+demo_link_layout_bin = None # last board from the data link, a binary layout, see demo_link_layout()
+
+# profiling global vars, see prof_reset()
+PROF_SCREEN_NAMES = ("main","50*","demo") # indexed by DGROUP_*
+prof_iters = [0]*len(disp_group) # loop iterations
+prof_handler_ns = [0]*len(disp_group) # time in the state handler
+prof_refreshes = [0]*len(disp_group) # display refreshes done by prof_refresh()
+prof_refresh_ns = [0]*len(disp_group) # and the time they took
+prof_worst_ns = [0]*len(disp_group) # worst loop iteration
+prof_ring = [0]*PROF_RING_SIZE # recent loop iteration times (us), oldest at prof_ring_index
+prof_ring_index = 0
+prof_reset()
+
+# periodic tasks of each screen, see sched_run()
+sched_tasks = [list() for screen in disp_group]
+sched_add(DGROUP_MAIN,main_more_blink,2.0*main_more_delay_sec) # delay a little extra the first time
+sched_add(DGROUP_MAIN,leaderboard_page_tick,LEADERBOARD_PAGE_SEC)
+sched_add(DGROUP_50STARS,fiftystar_tick,0.0)
+sched_add(DGROUP_2023DAY14,demo_step,0.0)
+sched_add(DGROUP_2023DAY14,demo_spin_search_step,DEMO_PARK_SEC,draws=False) # demo_wake() sets display_dirty
+if USE_ACCEL:
+    sched_add(DGROUP_2023DAY14,demo_check_rotation,0.0,draws=False) # demo_set_falldir() sets display_dirty
+for screen in range(len(sched_tasks)):
+    sched_add(screen,pix_tick,PIX_PARK_SEC,draws=False) # neopixel animations, see pix_play()
+    if link_port is not None:
+        sched_add(screen,link_poll,0.0,draws=False) # the frames applied set display_dirty
+keys_holdoff_until = 0.0 # key presses before this time.monotonic() are ignored
+
+display_dirty = True # something may have changed since the last refresh
+display_next_frame = 0.0 # time.monotonic() of the next refresh allowed by DISPLAY_FPS
+
+# screens, only built when shown, see screen_show()
+SCREEN_BUILD   = (main_build,fiftystar_build,demo_build) # indexed by DGROUP_*
+SCREEN_RELEASE = (main_release,fiftystar_release,demo_release)
+screen_mem = [0]*len(disp_group) # bytes each screen took when last built
+screen_last_shown = [0]*len(disp_group) # screen_shows count when each was last shown, 0 never
+screen_shows = 0
+
+# leaderboard record file, shared by the main and 50* screens.  the rows are a 
+#   fixed pool of LEADERBOARD_ROWS filled one page at a time by 
+#   leaderboard_show_page(), see main_build()
+leaderboard_head = bytearray(LEADERBOARD_HEAD_SIZE) # header and first to 50 block of the record file
+leaderboard_buf = bytearray(LEADERBOARD_ROWS*LEADERBOARD_RECORD_SIZE) # records of the page shown
+leaderboard_file = None
+leaderboard_rows = None # (row field, stars field) pairs, while the main screen is built
+leaderboard_open(LEADERBOARD_FILE)
 
-demo_init()
-    
 # report free memory ----------------------------------------
 print("INFO: Free memory = %d bytes."%gc.mem_free())
 
 # init display ----------------------------------------------
-board.DISPLAY.show(disp_group[DGROUP_MAIN])
+screen_show(DGROUP_MAIN)
 
-print("INFO: END OF SETUP")
+print("INFO: END OF SETUP, %0.2f s after boot"%time.monotonic()) # time.monotonic() starts at boot
 
 # LOOP -----------------------------------------------------------------------
 
@@ -598,114 +2070,84 @@ print("INFO: STARTING LOOP...")
 dgroup_show = 0
 
 while True:
+    if PROFILE:
+        prof_t_loop = time.monotonic_ns()
 
-    # do state actions
-    if dgroup_show == DGROUP_MAIN:
-        if time.monotonic() >= main_more_change_time:
-            if main_more_delay_on:
-                label_more.color = COLOR_BLACK # turn "off" text
-                main_more_delay_on = False
-            else: 
-                label_more.color = COLOR_GRAY # turn "on" text
-                main_more_delay_on = True
-
-            main_more_change_time = time.monotonic() + main_more_delay_sec
-
-    elif dgroup_show == DGROUP_50STARS:
-        if time.monotonic() >= fiftystar_change_time:
-            if fiftystar_stars < MAX_CHAR:
-                fiftystar_stars += 1
-                update_label_stars(fiftystar_stars)
-                if USE_NEOPIXELS:
-                    for i in range(num_neopixel):
-                        neopixels[i] = COLOR_BLACK
-                    for i in range(floor(fiftystar_stars/(MAX_CHAR/num_neopixel))):
-                        neopixels[i] = COLOR_YELLOW
-                    neopixels.show()
-                
-                if fiftystar_stars == MAX_CHAR:
-                    fiftystar_flash_on = True
-                    fiftystar_change_time = time.monotonic() + fiftystar_flash_delay_sec
-                else:
-                    fiftystar_change_time = time.monotonic() + fiftystar_count_delay_sec
-
-            else: # on max stars
-                if fiftystar_flash_count < FIFTYSTAR_FLASHES:
-                    if fiftystar_flash_on: # if they were on, now turn off
-                        update_label_stars(0)
-                        if USE_NEOPIXELS:
-                            neopixels.fill(COLOR_BLACK)
-                            neopixels.show()
-                        fiftystar_flash_on = False
-                        fiftystar_flash_count += 1
-                        
-                    else: # if they were off, now turn on
-                        update_label_stars(MAX_CHAR)
-                        if USE_NEOPIXELS:
-                            neopixels.fill(COLOR_YELLOW)
-                            neopixels.show()
-                        fiftystar_flash_on = True
-
-                    fiftystar_change_time = time.monotonic() + fiftystar_flash_delay_sec
-
-                else: # last flash
-                    fiftystar_flash_on = True 
-                    fiftystar_flash_count = 0
-                    fiftystar_stars = 0
-                    update_label_stars(0)
-                    fiftystar_change_time = time.monotonic() + fiftystar_count_delay_sec
-
-
-    elif dgroup_show == DGROUP_2023DAY14:
-        if time.monotonic() >= demo_next_step_time:
-            
-            if USE_ACCEL: 
-                # check rotation
-                demo_check_rotation()
-            
-            if not demo_stop: 
-                demo_rocks_fall() 
-            
-            # set time for next step increment
-            demo_next_step_time = time.monotonic() + demo_step_delay_sec
-    else:
-        print("ERROR: undefined state: %d"%dgroup_show)
+    # run the tasks of the screen shown which are due
+    sched_next = sched_run(dgroup_show)
+
+    if PROFILE:
+        prof_handler_ns[dgroup_show] += time.monotonic_ns() - prof_t_loop
+        prof_screen = dgroup_show # the key handling below can change screens
 
     # detect button presses
+    # releases are skipped and presses during the holdoff after a handled press 
+    # are dropped, without blocking the loop
     ke = event = keys.events.get()
-    if ke: # if any key press event is happening
+    if ke and ke.pressed and time.monotonic() >= keys_holdoff_until: 
+        keys_holdoff_until = time.monotonic() + KEYS_HOLDOFF_SEC
+        display_dirty = True
         print("INFO: detected key press = %d"%ke.key_number)
-        dgroup_show = (dgroup_show+1)%len(disp_group)
-        board.DISPLAY.show(disp_group[dgroup_show])
-
-        # do state transition stuff, if necessary
-        if USE_NEOPIXELS:
-            neopixels.fill(COLOR_BLACK) # turn off all neopixels on any state transition
-            neopixels.show()
-
-        if dgroup_show == DGROUP_MAIN:
-            print("INFO: transitioning to MAIN/LEADERBOARD screen")
-            main_more_delay_on = False
-            label_more.color = COLOR_BLACK
-            main_more_change_time = time.monotonic() + 2.0*main_more_delay_sec
-
-        elif dgroup_show == DGROUP_50STARS:
-            print("INFO: transitioning to 50* screen")
-            fiftystar_stars = 0
-            update_label_stars(0)
-            fiftystar_flash_count = 0
-            fiftystar_time_change = time.monotonic() + 2.0*fiftystar_flash_delay_sec
+        if dgroup_show == DGROUP_2023DAY14 and ke.key_number == KEY_A:
+            # A on the demo screen toggles spin cycle mode instead of changing screens
+            demo_spin_toggle()
+        elif dgroup_show == DGROUP_MAIN and ke.key_number in (KEY_UP,KEY_DOWN):
+            # UP and DOWN on the main screen page through the leaderboard instead of changing screens
+            leaderboard_show_page(leaderboard_page + (1 if ke.key_number == KEY_DOWN else -1))
+            sched_delay(DGROUP_MAIN,leaderboard_page_tick,LEADERBOARD_PAGE_SEC)
+        elif PROFILE and ke.key_number == KEY_SELECT:
+            prof_summary() # SELECT prints the profiling counters instead of changing screens
+        else:
+            dgroup_show = (dgroup_show+1)%len(disp_group)
+            screen_show(dgroup_show)
 
-        elif dgroup_show == DGROUP_2023DAY14:
-            print("INFO: transitioning to DEMO screen")
-            demo_init()
-            demo_next_step_time = time.monotonic() + 2.0*demo_step_delay_sec 
+            # do state transition stuff, if necessary
+            pix_stop() # turn off all neopixels on any state transition
 
+            if dgroup_show == DGROUP_MAIN:
+                print("INFO: transitioning to MAIN/LEADERBOARD screen")
+                main_more_delay_on = False
+                text_color(label_more,COLOR_BLACK)
+                sched_delay(DGROUP_MAIN,main_more_blink,2.0*main_more_delay_sec)
+                leaderboard_show_page(0)
+                sched_delay(DGROUP_MAIN,leaderboard_page_tick,LEADERBOARD_PAGE_SEC)
+
+            elif dgroup_show == DGROUP_50STARS:
+                print("INFO: transitioning to 50* screen")
+                fiftystar_stars = 0
+                update_label_stars(0)
+                fiftystar_flash_count = 0
+                sched_delay(DGROUP_50STARS,fiftystar_tick,2.0*fiftystar_flash_delay_sec)
+
+            elif dgroup_show == DGROUP_2023DAY14:
+                print("INFO: transitioning to DEMO screen")
+                demo_init()
+                if USE_ACCEL:
+                    demo_accel_reset()
+                    sched_delay(DGROUP_2023DAY14,demo_check_rotation,accel_poll_sec)
+                sched_delay(DGROUP_2023DAY14,demo_step,2.0*demo_step_delay_sec)
+
+            else:
+                print("ERROR: undefined state transition: %d"%dgroup_show)
+
+    # one refresh per frame with everything this tick changed, at most DISPLAY_FPS a second
+    if display_dirty:
+        if time.monotonic() >= display_next_frame:
+            display_next_frame = time.monotonic() + 1.0/DISPLAY_FPS
+            display_dirty = False
+            if PROFILE:
+                prof_refresh(dgroup_show)
+            else:
+                board.DISPLAY.refresh()
         else:
-            print("ERROR: undefined state transition: %d"%dgroup_show)
+            sched_next = min(sched_next,display_next_frame)
+
+    if PROFILE:
+        prof_loop_done(prof_screen,prof_t_loop)
 
-        time.sleep(0.5) # pause to ignore registering too many clicks
-        keys.events.clear()   
-        keys.reset()           
+    # idle (light sleep) until the next task or frame is due
+    idle_sec = sched_next - time.monotonic()
+    if idle_sec > 0:
+        time.sleep(idle_sec)
 
     # print("DEBUG: ...BOTTOM OF LOOP")
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+# Host-side benchmarks of the Day 14 demo
+#
+# Runs the puzzle logic cases of bench_day14.py (the module which also runs, in
+# reduced form, from the CircuitPython REPL) and, through the simulator in
+# simulate.py, the code.py hot paths on the same boards: demo_rocks_fall() in
+# each step mode and direction until the board settles, and again played from
+# the tilt memo (DEMO_MODE_ONE_ROCK, filled by a first run), demo_init() after
+# the board was tilted, and update_label_loadval() with and without a change of
+# the value shown.  Boards are the example, random 20x20 and 100x100 boards and
+# optionally a layout file.  Reports the host time per call, steps to settle
+# and bytes allocated per call (tracemalloc).
+#
+# --save writes the results as a JSON baseline and --check compares against one
+# and exits with status 1 on a regression (slower than the baseline by more
+# than --tolerance, more allocations or more steps).  Host times only compare
+# with a baseline made on the same computer.  Needs NumPy on the host.
+#
+# usage: python3 host-tools/day14_bench.py [--quick] [--layout FILE] [--save FILE] [--check FILE]
+
+import argparse
+import contextlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+REPO = os.path.dirname(HERE)
+sys.path.insert(0, REPO)
+
+import aoc2023_day14 as day14  # noqa: E402
+import bench_day14  # noqa: E402
+import simulate  # noqa: E402
+
+STEP_MODES = (("one", "DEMO_MODE_ONE_ROCK"), ("batch", "DEMO_MODE_BATCH"), ("settle", "DEMO_MODE_SETTLE"))
+
+
+def layout_text(grid):
+    symbols = {day14.V_EMPTY: ".", day14.V_ROCK: "O", day14.V_CUBE: "#"}
+    return "".join("".join(symbols[int(v)] for v in row) + "\n" for row in grid)
+
+
+def circuitpy_root(directory, grid):
+    # a stand-in CIRCUITPY drive with grid as the init layout
+    os.symlink(os.path.join(REPO, "fonts"), os.path.join(directory, "fonts"))
+    shutil.copy(os.path.join(REPO, "aoc2023_day14_ex.txt"), directory)
+    with open(os.path.join(directory, "aoc2023_day14_init.txt"), "w") as f:
+        f.write(layout_text(grid))
+
+
+def bench_code(name, grid, n_calls, max_steps):
+    # code.py cases for one board, list of results
+    results = []
+    with tempfile.TemporaryDirectory() as root:
+        circuitpy_root(root, grid)
+        sim = simulate.Simulator(quiet=True, root=root)
+        ns = sim.load(setup_only=True)
+        bench_day14.ticks_ns = time.perf_counter_ns  # the simulator's clock is virtual
+
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            # the demo screen is only built when shown, and reads its layout from the CIRCUITPY root
+            cwd = os.getcwd()
+            os.chdir(root)
+            try:
+                ns["screen_show"](ns["DGROUP_2023DAY14"])
+            finally:
+                os.chdir(cwd)
+            for (mode_name, mode) in STEP_MODES:
+                for (direction, dir_name) in bench_day14.DIRECTIONS:
+                    ns["demo_init"]()
+                    ns["demo_memo_clear"]()  # the tilt is worked out, not played from the memo
+                    ns["demo_step_mode"] = ns[mode]
+                    ns["demo_set_falldir"](direction)
+                    results.append(bench_day14.measure_steps(
+                        "demo_rocks_fall/%s/%s/%s" % (mode_name, name, dir_name), ns["demo_rocks_fall"], max_steps))
+
+            # gc.mem_free() counts the whole host heap while tracemalloc runs, size the memo as on the badge
+            ns["demo_memo_budget"] = int(simulate.HEAP_BYTES * ns["DEMO_MEMO_HEAP_FRACTION"])
+            for (direction, dir_name) in bench_day14.DIRECTIONS:
+                # the tilt once in DEMO_MODE_SETTLE to fill the memo (a plan too big for it is not
+                # kept, the timed run is a miss), then timed from the same board
+                ns["demo_init"]()
+                ns["demo_step_mode"] = ns["DEMO_MODE_SETTLE"]
+                ns["demo_set_falldir"](direction)
+                while ns["demo_rocks_fall"]():
+                    pass
+                ns["demo_init"]()
+                ns["demo_step_mode"] = ns["DEMO_MODE_ONE_ROCK"]
+                results.append(bench_day14.measure_steps(
+                    "demo_rocks_fall/memo/%s/%s" % (name, dir_name), ns["demo_rocks_fall"], max_steps))
+
+            tilts = iter(bench_day14.DIRECTIONS * n_calls)
+
+            def tilt():
+                # move the rocks away from the layout so demo_init() has something to put back
+                ns["demo_settle"](next(tilts)[0])
+                ns["demo_tween_finish"]()
+                return ()
+
+            results.append(bench_day14.measure("demo_init/%s" % name, ns["demo_init"], n_calls, tilt))
+
+            ns["demo_init"]()
+            changes = iter((day14.FALL_UP, day14.FALL_DOWN) * n_calls)
+
+            def change():
+                ns["demo_falldir"] = next(changes)
+                return ()
+
+            results.append(bench_day14.measure("update_label_loadval/changed/%s" % name,
+                                               ns["update_label_loadval"], n_calls, change))
+            results.append(bench_day14.measure("update_label_loadval/same/%s" % name,
+                                               ns["update_label_loadval"], n_calls))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="benchmark the Day 14 demo on the host")
+    parser.add_argument("--layout", help="also benchmark this layout text file")
+    parser.add_argument("--quick", action="store_true", help="fewer calls, skip spin_load() on big boards")
+    parser.add_argument("--max-steps", type=int, default=500, help="cap on demo_rocks_fall() calls per run")
+    parser.add_argument("--save", help="write the results to this JSON baseline file")
+    parser.add_argument("--check", help="compare against this JSON baseline file")
+    parser.add_argument("--tolerance", type=float, default=bench_day14.TOLERANCE,
+                        help="allowed slowdown against the baseline (0.5 = 50%%)")
+    args = parser.parse_args()
+
+    n_calls = 1 if args.quick else 5
+    boards = bench_day14.boards(os.path.join(REPO, "aoc2023_day14_ex.txt"))
+    if args.layout:
+        boards.append((os.path.splitext(os.path.basename(args.layout))[0], day14.read_layout(args.layout)))
+
+    tracemalloc.start()
+    results = []
+    for (name, grid) in boards:
+        big = grid.shape[0] * grid.shape[1] > 1000
+        bench_day14.ticks_ns = time.perf_counter_ns
+        board_results = bench_day14.bench_logic(name, grid, n_calls, spin=not (args.quick and big))
+        board_results += bench_code(name, grid, n_calls, args.max_steps)
+        for result in board_results:
+            print(bench_day14.format_result(result))
+        results += board_results
+    tracemalloc.stop()
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=1)
+        print("saved %d results to %s" % (len(results), args.save))
+
+    if args.check:
+        with open(args.check) as f:
+            baseline = dict((result["case"], result) for result in json.load(f))
+        regressions = bench_day14.check(results, baseline, args.tolerance)
+        for line in regressions:
+            print("REGRESSION: %s" % line)
+        print("%d regressions against %s" % (len(regressions), args.check))
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
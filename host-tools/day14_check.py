@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+# Host-side check of the Day 14 solver in aoc2023_day14.py
+#
+# Settles a layout file in each direction with day14.settle() and compares the
+# result against a plain one-cell-at-a-time reference simulation, then does the
+# same for a batch of random boards.  Prints the settled load for each
+# direction; for the checked-in example the north (FALL_UP) load must be 136,
+# the answer given in the puzzle text.  The spin cycle shortcut (day14.spin_load)
+# is checked against running the cycles one by one, the Bitboard versions
+# against the int8 grid versions, and for the example the
+# load after 1e9 cycles must be 64, the part 2 answer.  Each board is also
+# written as a binary layout (day14.pack_layout) and read back with
+# day14.read_layout_bin.  Needs NumPy on the host.
+#
+# usage: python3 host-tools/day14_check.py [layout.txt] [--random N]
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO)
+
+import numpy as np  # noqa: E402
+import aoc2023_day14 as day14  # noqa: E402
+
+EXAMPLE = os.path.join(REPO, "aoc2023_day14_ex.txt")
+EXAMPLE_NORTH_LOAD = 136
+EXAMPLE_SPIN_LOAD = 64
+
+DIRECTIONS = {
+    day14.FALL_UP: ("UP", -1, 0),
+    day14.FALL_DOWN: ("DOWN", 1, 0),
+    day14.FALL_LEFT: ("LEFT", 0, -1),
+    day14.FALL_RIGHT: ("RIGHT", 0, 1),
+}
+
+
+def reference_settle(grid, direction):
+    # move rocks one cell at a time until nothing moves
+    (name, fall_y, fall_x) = DIRECTIONS[direction]
+    (n_rows, n_cols) = grid.shape
+    moved = True
+    while moved:
+        moved = False
+        for irow in range(n_rows):
+            for icol in range(n_cols):
+                jrow = irow + fall_y
+                jcol = icol + fall_x
+                if (grid[irow, icol] == day14.V_ROCK and 0 <= jrow < n_rows and 0 <= jcol < n_cols
+                        and grid[jrow, jcol] == day14.V_EMPTY):
+                    grid[jrow, jcol] = day14.V_ROCK
+                    grid[irow, icol] = day14.V_EMPTY
+                    moved = True
+
+
+def check_moves(before, after, moves):
+    # replaying the moves on the starting grid must give the settled grid
+    replay = before.copy()
+    for (irow, icol, jrow, jcol) in moves:
+        replay[irow, icol] = day14.V_EMPTY
+    for (irow, icol, jrow, jcol) in moves:
+        replay[jrow, jcol] = day14.V_ROCK
+    return (replay == after).all()
+
+
+def check_grid(grid):
+    loads = {}
+    for direction in DIRECTIONS:
+        expect = grid.copy()
+        reference_settle(expect, direction)
+        got = grid.copy()
+        moves = day14.settle(got, direction)
+        if not (got == expect).all():
+            raise AssertionError("settle() disagrees with reference for %s" % DIRECTIONS[direction][0])
+        if not check_moves(grid, got, moves):
+            raise AssertionError("moves do not replay to the settled grid for %s" % DIRECTIONS[direction][0])
+        board = day14.Bitboard.from_grid(grid)
+        board.settle(direction)
+        if not (board.to_grid() == expect).all():
+            raise AssertionError("Bitboard.settle() disagrees with reference for %s" % DIRECTIONS[direction][0])
+        plan = day14.plan_travel(moves)
+        if [d for (d, *_) in plan] != sorted((d for (d, *_) in plan), reverse=True):
+            raise AssertionError("travel plan is not longest first")
+        loads[direction] = day14.load(got, direction)
+    return loads
+
+
+def check_pack(grid):
+    # the binary layout must read back as the same grid
+    with tempfile.TemporaryDirectory() as tmp:
+        filename = os.path.join(tmp, "layout.bin")
+        with open(filename, "wb") as f:
+            f.write(day14.pack_layout(grid))
+        if not np.array_equal(day14.read_layout_bin(filename), grid):
+            raise AssertionError("binary layout does not read back as the grid")
+
+
+def check_spin(grid, n_cycles):
+    # the cycle detection shortcut must agree with spinning n_cycles times
+    expect = grid.copy()
+    for cycle in range(n_cycles):
+        day14.spin_cycle(expect)
+    (got, start, period) = day14.spin_load(grid.copy(), n_cycles)
+    if day14.spin_load(day14.Bitboard.from_grid(grid), n_cycles) != (got, start, period):
+        raise AssertionError("spin_load() on a Bitboard disagrees with the int8 grid")
+    if got != day14.load(expect, day14.FALL_UP):
+        raise AssertionError("spin_load() after %d cycles is %d, expected %d"
+                             % (n_cycles, got, day14.load(expect, day14.FALL_UP)))
+
+
+def random_grid(n_rows, n_cols, rng):
+    grid = np.zeros((n_rows, n_cols), dtype=np.int8)
+    for irow in range(n_rows):
+        for icol in range(n_cols):
+            grid[irow, icol] = rng.choice((day14.V_EMPTY, day14.V_EMPTY, day14.V_ROCK, day14.V_CUBE))
+    return grid
+
+
+def main():
+    parser = argparse.ArgumentParser(description="check the Day 14 solver against a reference")
+    parser.add_argument("layout", nargs="?", default=EXAMPLE, help="layout text file")
+    parser.add_argument("--random", type=int, default=200, help="number of random boards to check")
+    parser.add_argument("--seed", type=int, default=14)
+    args = parser.parse_args()
+
+    grid = day14.read_layout(args.layout)
+    loads = check_grid(grid)
+    check_pack(grid)
+    print("%s: %dx%d" % (os.path.basename(args.layout), grid.shape[0], grid.shape[1]))
+    for direction in DIRECTIONS:
+        print("  settled %-5s load = %d" % (DIRECTIONS[direction][0], loads[direction]))
+    if os.path.abspath(args.layout) == EXAMPLE and loads[day14.FALL_UP] != EXAMPLE_NORTH_LOAD:
+        raise AssertionError("example north load %d, expected %d" % (loads[day14.FALL_UP], EXAMPLE_NORTH_LOAD))
+
+    (spin, start, period) = day14.spin_load(grid.copy())
+    print("  load after 1e9 spin cycles = %d (repeats every %s cycles from cycle %s)" % (spin, period, start))
+    if os.path.abspath(args.layout) == EXAMPLE and spin != EXAMPLE_SPIN_LOAD:
+        raise AssertionError("example spin load %d, expected %d" % (spin, EXAMPLE_SPIN_LOAD))
+
+    rng = random.Random(args.seed)
+    for i in range(args.random):
+        grid = random_grid(rng.randint(1, 12), rng.randint(1, 12), rng)
+        check_grid(grid)
+        check_pack(grid)
+        check_spin(grid, rng.randint(1, 60))
+    print("OK: %d random boards match the reference" % args.random)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+# Host-side converter of a Day 14 text layout to the binary layout format
+#
+# Reads a text layout ("O" rock, "#" cube, "." empty) with day14.read_layout()
+# and writes it with day14.pack_layout(): an 8 byte header with the grid size,
+# then the rocks and the cubes as rows of packed bits.  code.py loads
+# aoc2023_day14_init.bin in preference to aoc2023_day14_init.txt, with a single
+# readinto and no text parsing.  The written file is read back with
+# day14.read_layout_bin() and compared to the text layout before exiting.
+# Needs NumPy on the host.
+#
+# usage: python3 host-tools/day14_pack.py [layout.txt] [-o layout.bin]
+
+import argparse
+import os
+import sys
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO)
+
+import numpy as np  # noqa: E402
+import aoc2023_day14 as day14  # noqa: E402
+
+DEFAULT_LAYOUT = os.path.join(REPO, "aoc2023_day14_init.txt")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="convert a Day 14 text layout to a binary layout")
+    parser.add_argument("layout", nargs="?", default=DEFAULT_LAYOUT, help="layout text file")
+    parser.add_argument("-o", "--output", help="binary layout file (default: layout with a .bin extension)")
+    args = parser.parse_args()
+
+    output = args.output or os.path.splitext(args.layout)[0] + ".bin"
+
+    grid = day14.read_layout(args.layout)
+    (n_rows, n_cols) = grid.shape
+    if n_rows > day14.LAYOUT_MAX_SIZE or n_cols > day14.LAYOUT_MAX_SIZE:
+        raise SystemExit("%dx%d layout is larger than %dx%d, the badge would not load it"
+                         % (n_rows, n_cols, day14.LAYOUT_MAX_SIZE, day14.LAYOUT_MAX_SIZE))
+
+    data = day14.pack_layout(grid)
+    with open(output, "wb") as f:
+        f.write(data)
+
+    if not np.array_equal(day14.read_layout_bin(output), grid):
+        raise AssertionError("%s does not read back as %s" % (output, args.layout))
+
+    print("%s: %dx%d, %d bytes (text layout is %d bytes)"
+          % (output, n_rows, n_cols, len(data), os.path.getsize(args.layout)))
+
+
+if __name__ == "__main__":
+    main()
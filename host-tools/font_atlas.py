@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+# Host-side converter of the BDF font to a packed glyph atlas
+#
+# The font is made with otf2bdf (see font-making/), this turns the BDF file
+# into the atlas code.py loads at boot instead of parsing the BDF text:
+# every char of the font subset rasterized into one fixed size cell on a
+# common baseline (the font is monospaced), all cells side by side in one
+# 1 bit bitmap.
+#
+# atlas file format, all values unsigned bytes:
+#   0  b"GLYA"
+#   4  cell width, cell height (pixels), first char code, number of chars
+#   8  metrics table: advance width of each char, in char code order
+#   8+number of chars: the bitmap, cell height rows of (cell width * number
+#      of chars) pixels, each row padded to a whole byte, pixel x at bit x%8
+#      (least significant bit first) of byte x//8 of its row.  This is what
+#      bitmaptools.readinto(bitmap, file, bits_per_pixel=1) reads in one go.
+#
+# The written file is read back and compared to the rasterized font before
+# exiting.
+#
+# usage: python3 host-tools/font_atlas.py [font.bdf] [-o font.atlas]
+
+import argparse
+import os
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_FONT = os.path.join(REPO, "fonts", "SourceCodePro-subset_32_126-10pt.bdf")
+MAGIC = b"GLYA"
+HEADER_SIZE = 8
+FIRST_CHAR = 32
+LAST_CHAR = 126
+
+
+def read_bdf(path):
+    # returns (bounding box, {code: (width, height, dx, dy, advance, rows)}),
+    # rows a list of ints, bit (width-1-x) of a row set for pixel x
+    bbox = None
+    glyphs = {}
+    with open(path, encoding="latin-1") as f:
+        lines = iter(f)
+        code = None
+        for line in lines:
+            words = line.split()
+            if not words:
+                continue
+            if words[0] == "FONTBOUNDINGBOX":
+                bbox = tuple(int(v) for v in words[1:5])
+            elif words[0] == "ENCODING":
+                code = int(words[1])
+            elif words[0] == "DWIDTH":
+                advance = int(words[1])
+            elif words[0] == "BBX":
+                (w, h, dx, dy) = (int(v) for v in words[1:5])
+            elif words[0] == "BITMAP":
+                pad = ((w + 7) // 8) * 8 - w
+                rows = [int(next(lines).strip() or "0", 16) >> pad for y in range(h)]
+                glyphs[code] = (w, h, dx, dy, advance, rows)
+    if bbox is None:
+        raise ValueError("%s: no FONTBOUNDINGBOX, not a BDF font" % path)
+    return (bbox, glyphs)
+
+
+def rasterize(bbox, glyphs):
+    # returns (cell_w, cell_h, advances, pixels), pixels[y][x] of the whole atlas
+    (bb_w, bb_h, bb_dx, bb_dy) = bbox
+    n_chars = LAST_CHAR - FIRST_CHAR + 1
+    missing = [chr(c) for c in range(FIRST_CHAR, LAST_CHAR + 1) if c not in glyphs]
+    if missing:
+        raise ValueError("font has no glyph for %r" % "".join(missing))
+    advances = [glyphs[c][4] for c in range(FIRST_CHAR, LAST_CHAR + 1)]
+    cell_w = glyphs[ord("0")][4]
+    if any(a != cell_w for a in advances):
+        raise ValueError("font is not monospaced, advance widths %s" % sorted(set(advances)))
+    cell_h = bb_h
+    baseline = bb_h + bb_dy
+    pixels = [[0] * (cell_w * n_chars) for y in range(cell_h)]
+    for i in range(n_chars):
+        (w, h, dx, dy, advance, rows) = glyphs[FIRST_CHAR + i]
+        top = baseline - (h + dy)
+        for y in range(h):
+            for x in range(w):
+                (cell_x, cell_y) = (dx + x, top + y)
+                if rows[y] >> (w - 1 - x) & 1 and 0 <= cell_x < cell_w and 0 <= cell_y < cell_h:
+                    pixels[cell_y][i * cell_w + cell_x] = 1
+    return (cell_w, cell_h, advances, pixels)
+
+
+def pack(cell_w, cell_h, advances, pixels):
+    data = bytearray(MAGIC + bytes((cell_w, cell_h, FIRST_CHAR, len(advances))))
+    data += bytes(advances)
+    row_bytes = (len(pixels[0]) + 7) // 8
+    for row in pixels:
+        packed = bytearray(row_bytes)
+        for (x, v) in enumerate(row):
+            if v:
+                packed[x // 8] |= 1 << (x % 8)
+        data += packed
+    return bytes(data)
+
+
+def unpack(data):
+    # inverse of pack(), returns (cell_w, cell_h, advances, pixels)
+    if data[0:4] != MAGIC:
+        raise ValueError("not a glyph atlas")
+    (cell_w, cell_h, first, n_chars) = data[4:8]
+    advances = list(data[HEADER_SIZE:HEADER_SIZE + n_chars])
+    width = cell_w * n_chars
+    row_bytes = (width + 7) // 8
+    start = HEADER_SIZE + n_chars
+    if len(data) != start + row_bytes * cell_h:
+        raise ValueError("atlas is %d bytes, expected %d" % (len(data), start + row_bytes * cell_h))
+    pixels = []
+    for y in range(cell_h):
+        row = data[start + y * row_bytes:start + (y + 1) * row_bytes]
+        pixels.append([row[x // 8] >> (x % 8) & 1 for x in range(width)])
+    return (cell_w, cell_h, advances, pixels)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="convert a BDF font to the glyph atlas loaded by code.py")
+    parser.add_argument("font", nargs="?", default=DEFAULT_FONT, help="BDF font file")
+    parser.add_argument("-o", "--output", help="atlas file (default: font with an .atlas extension)")
+    args = parser.parse_args()
+
+    output = args.output or os.path.splitext(args.font)[0] + ".atlas"
+
+    atlas = rasterize(*read_bdf(args.font))
+    data = pack(*atlas)
+    with open(output, "wb") as f:
+        f.write(data)
+
+    with open(output, "rb") as f:
+        if unpack(f.read()) != atlas:
+            raise AssertionError("%s does not read back as %s" % (output, args.font))
+
+    print("%s: %d chars in %dx%d cells, %d bytes (BDF font is %d bytes)"
+          % (output, len(atlas[2]), atlas[0], atlas[1], len(data), os.path.getsize(args.font)))
+
+
+if __name__ == "__main__":
+    main()
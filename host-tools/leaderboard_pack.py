@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+# Host-side converter of an AoC private leaderboard to the leaderboard record file
+#
+# Reads the JSON export of a private leaderboard (the "[API]" link on its
+# page, {"event": ..., "members": {id: {"name", "stars", "local_score",
+# "last_star_ts", ...}}}) and writes the record file code.py shows on the
+# leaderboard and first-to-50 screens, so the badge does no JSON parsing:
+# the members sorted as on the AoC page (local score, then stars, then who
+# got their last star first) with each row already laid out as text.
+#
+# record file format, numbers unsigned little-endian:
+#   0   b"AOCB"
+#   4   number of members (2 bytes), ROW_CHARS (1 byte), 0
+#   8   first to 50 stars: length of the name (1 byte), the name (ROW_CHARS
+#       bytes, blank padded), length of the date (1 byte), the date (ROW_CHARS
+#       bytes, blank padded), the name is "nobody yet" and the date blank
+#       when nobody has 50 stars
+#   50  one record per member in order: the row text (ROW_CHARS bytes,
+#       "1st:   " and the name cut to NAME_CHARS), then the stars (1 byte)
+#
+# Names are ASCII, other chars become "?".  Members without a name show as
+# "(anonymous user #id)" as on the AoC page.  The date is the time of the
+# 50th star in the AoC time zone (UTC-5) unless --utc-offset says otherwise.
+#
+# usage: python3 host-tools/leaderboard_pack.py leaderboard.json [-o aoc2023_leaderboard.bin]
+
+import argparse
+import datetime
+import json
+import os
+import struct
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_OUTPUT = os.path.join(REPO, "aoc2023_leaderboard.bin")
+MAGIC = b"AOCB"
+ROW_CHARS = 20  # MAX_CHAR of code.py, the width of the screen in chars
+RANK_CHARS = 7  # "1st:" and room for the stars code.py shows over the blanks
+NAME_CHARS = ROW_CHARS - RANK_CHARS
+HEADER_SIZE = 8
+FIFTY_SIZE = 2 * (1 + ROW_CHARS)
+RECORD_SIZE = ROW_CHARS + 1
+ALL_STARS = 50
+NOBODY = "nobody yet"
+
+
+def ascii_text(text, n_chars):
+    text = "".join(c if " " <= c <= "~" else "?" for c in text)
+    return text[:n_chars]
+
+
+def ordinal(n):
+    if n % 100 in (11, 12, 13):
+        return "%dth" % n
+    return "%d%s" % (n, {1: "st", 2: "nd", 3: "rd"}.get(n % 10, "th"))
+
+
+def member_name(member):
+    return member.get("name") or "(anonymous user #%s)" % member["id"]
+
+
+def sort_members(members):
+    return sorted(members, key=lambda m: (-m.get("local_score", 0), -m.get("stars", 0),
+                                          m.get("last_star_ts", 0), str(m["id"])))
+
+
+def row_text(rank, member):
+    rank_text = ordinal(rank) + ":"
+    if len(rank_text) > 4:
+        rank_text = ordinal(rank)[:4]  # 1000th and up, the stars take the next 3 cells
+    return (rank_text.ljust(RANK_CHARS) + ascii_text(member_name(member), NAME_CHARS)).ljust(ROW_CHARS)
+
+
+def first_to_50(members, utc_offset):
+    # (name, date) of the member who got 50 stars first
+    done = [m for m in members if m.get("stars", 0) >= ALL_STARS]
+    if not done:
+        return (NOBODY, "")
+    first = min(done, key=lambda m: (m.get("last_star_ts", 0), str(m["id"])))
+    when = datetime.datetime.fromtimestamp(int(first["last_star_ts"]),
+                                           datetime.timezone(datetime.timedelta(hours=utc_offset)))
+    return (ascii_text(member_name(first), ROW_CHARS), when.strftime("%d %b %Y %H:%M!"))
+
+
+def pack(members, utc_offset):
+    members = sort_members(members)
+    (name, date) = first_to_50(members, utc_offset)
+    data = bytearray(MAGIC + struct.pack("<HBB", len(members), ROW_CHARS, 0))
+    for text in (name, date):
+        data += bytes((len(text),)) + text.ljust(ROW_CHARS).encode("ascii")
+    for (i, member) in enumerate(members):
+        data += row_text(i + 1, member).encode("ascii") + bytes((min(int(member.get("stars", 0)), 255),))
+    return bytes(data)
+
+
+def unpack(data):
+    # inverse of pack(), returns (first to 50 name, date, [(row text, stars), ...])
+    if data[0:4] != MAGIC:
+        raise ValueError("not a leaderboard record file")
+    (n_members, row_chars, reserved) = struct.unpack("<HBB", data[4:8])
+    if row_chars != ROW_CHARS or len(data) != HEADER_SIZE + FIFTY_SIZE + n_members * RECORD_SIZE:
+        raise ValueError("bad leaderboard record file")
+    fifty = []
+    for i in range(2):
+        start = HEADER_SIZE + i * (1 + ROW_CHARS)
+        fifty.append(data[start + 1:start + 1 + data[start]].decode("ascii"))
+    rows = []
+    for i in range(n_members):
+        start = HEADER_SIZE + FIFTY_SIZE + i * RECORD_SIZE
+        rows.append((data[start:start + ROW_CHARS].decode("ascii"), data[start + ROW_CHARS]))
+    return (fifty[0], fifty[1], rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="convert an AoC private leaderboard JSON export to a record file")
+    parser.add_argument("leaderboard", help="JSON export of the private leaderboard")
+    parser.add_argument("-o", "--output", default=DEFAULT_OUTPUT, help="record file (default: %(default)s)")
+    parser.add_argument("--utc-offset", type=float, default=-5, help="time zone of the first to 50 date, hours")
+    args = parser.parse_args()
+
+    with open(args.leaderboard) as f:
+        members = list(json.load(f)["members"].values())
+
+    data = pack(members, args.utc_offset)
+    with open(args.output, "wb") as f:
+        f.write(data)
+
+    with open(args.output, "rb") as f:
+        (name, date, rows) = unpack(f.read())
+    if len(rows) != len(members):
+        raise AssertionError("%s does not read back as %s" % (args.output, args.leaderboard))
+
+    for (text, stars) in rows:
+        print("%s %2d*" % (text, stars))
+    print("first to 50*: %s" % (name if name == NOBODY else "%s, %s" % (name, date)))
+    print("%s: %d members, %d bytes" % (args.output, len(rows), len(data)))
+
+
+if __name__ == "__main__":
+    main()
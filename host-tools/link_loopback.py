@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+# Loopback test of the data link: link_send.py on one end of a pseudo-terminal,
+# code.py under the simulator on the other
+#
+# The slave end of the pseudo-terminal stands in for usb_cdc.data.  Written
+# before the run, on the main screen: line noise ending in a false frame start
+# (dropped once nothing more comes), a board frame with a bad CRC (dropped) and
+# a new leaderboard.  Written on the demo screen during the run:
+# a board of the same size with rocks moved (swapped in place), then a board
+# of another size (the demo screen is rebuilt).  Then the ACKs are read back and the
+# screens compared to what was sent.  Needs NumPy on the host.
+#
+# usage: python3 host-tools/link_loopback.py
+
+import os
+import sys
+import tty
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+REPO = os.path.dirname(HERE)
+sys.path.insert(0, REPO)
+
+import numpy as np  # noqa: E402
+import aoc2023_day14 as day14  # noqa: E402
+import aoc2023_link as link  # noqa: E402
+import leaderboard_pack  # noqa: E402
+import link_send  # noqa: E402
+import simulate  # noqa: E402
+
+SWAP_AT = 3.0  # virtual seconds, on the demo screen
+SWAP_CHECK_AT = 4.0
+RESIZE_AT = 5.0
+RUN_SECONDS = 7.0
+MEMBERS = [{"id": 1, "name": "Loopback", "stars": 50, "local_score": 900, "last_star_ts": 1703462400},
+           {"id": 2, "name": "Pseudo Terminal", "stars": 31, "local_score": 400, "last_star_ts": 1703000000}]
+
+
+def grid_of(layout):
+    if isinstance(layout, day14.Bitboard):
+        return layout.to_grid()
+    return np.array(layout)
+
+
+def moved_rocks(grid):
+    # grid with every rock one cell to the right where that cell is empty
+    moved = grid.copy()
+    (n_rows, n_cols) = grid.shape
+    for irow in range(n_rows):
+        for icol in range(n_cols - 2, -1, -1):
+            if moved[irow, icol] == day14.V_ROCK and moved[irow, icol + 1] == day14.V_EMPTY:
+                moved[irow, icol + 1] = day14.V_ROCK
+                moved[irow, icol] = day14.V_EMPTY
+    return moved
+
+
+def tiles_grid(tiles, shape):
+    return np.array([[tiles[icol, irow] for icol in range(shape[1])] for irow in range(shape[0])])
+
+
+def field_text(field, n_chars):
+    return "".join(chr(field[i] + 32) for i in range(n_chars))
+
+
+def main():
+    sim = simulate.Simulator(quiet=True)
+    import usb_cdc  # the stand-in, once the simulator put sim/ on the path
+
+    (master, slave) = os.openpty()
+    tty.setraw(master)
+    tty.setraw(slave)
+    usb_cdc.data = usb_cdc.Serial(slave)
+
+    init_bin = os.path.join(REPO, "aoc2023_day14_init.bin")
+    if os.path.exists(init_bin):
+        start = day14.read_layout_bin(init_bin)
+    else:
+        start = day14.read_layout(os.path.join(REPO, "aoc2023_day14_init.txt"))
+    same_size = moved_rocks(start)
+    other_size = moved_rocks(day14.read_layout(os.path.join(REPO, "aoc2023_day14_ex.txt")))
+    if other_size.shape == start.shape:
+        other_size = other_size[:-1, :]
+    leaderboard = leaderboard_pack.pack(MEMBERS, -5)
+
+    # before the run, on the main screen
+    bad = bytearray(link.frame(link.BOARD, day14.pack_layout(same_size)))
+    bad[-1] ^= 0xFF
+    os.write(master, b"\x00noise\xa5\x01" + bytes(bad))
+    os.write(master, link.frame(link.LEADERBOARD, leaderboard))
+
+    failures = []
+    seen = {}
+
+    def timeline(now):
+        ns = sim.namespace
+        if now >= SWAP_AT and "swap" not in seen:
+            seen["swap"] = ns["disp_group"][ns["DGROUP_2023DAY14"]]
+            os.write(master, link.frame(link.BOARD, day14.pack_layout(same_size)))
+        elif now >= SWAP_CHECK_AT and "swapped" not in seen:
+            seen["swapped"] = True
+            if ns["disp_group"][ns["DGROUP_2023DAY14"]] is not seen["swap"]:
+                failures.append("same size board rebuilt the demo screen")
+            if not np.array_equal(grid_of(ns["demo_layout"]), same_size):
+                failures.append("same size board not taken in")
+            if not np.array_equal(tiles_grid(ns["demo_board_tiles"], same_size.shape) == day14.V_CUBE,
+                                  same_size == day14.V_CUBE):
+                failures.append("demo board tiles do not show the same size board")
+        elif now >= RESIZE_AT and "resize" not in seen:
+            seen["resize"] = True
+            os.write(master, link.frame(link.BOARD, day14.pack_layout(other_size)))
+
+    sim.clock.listeners.append(timeline)
+    sim.script_keys([(1.0, 0), (2.0, 0)])  # main, 50*, demo
+    ns = sim.run(RUN_SECONDS)
+
+    acks = link_send.read_acks(master, 3, 1.0)
+    if acks != [(link.LEADERBOARD, link.ACK_OK), (link.BOARD, link.ACK_OK), (link.BOARD, link.ACK_OK)]:
+        failures.append("ACKs %s" % acks)
+    if ns["link_reader"].errors != 2:
+        failures.append("%d frames dropped, expected the false one in the noise and the one with a bad CRC"
+                        % ns["link_reader"].errors)
+    if ns["leaderboard_n"] != len(MEMBERS) or not field_text(ns["leaderboard_rows"][0][0], 20).startswith("1st:   Loopback"):
+        failures.append("leaderboard not shown")
+    if not np.array_equal(grid_of(ns["demo_layout"]), other_size):
+        failures.append("demo board is not the resized board")
+    elif not np.array_equal(tiles_grid(ns["demo_board_tiles"], other_size.shape) == day14.V_CUBE,
+                            other_size == day14.V_CUBE):
+        failures.append("demo board tiles do not show the resized board")
+
+    os.close(master)
+    os.close(slave)
+    for failure in failures:
+        print("FAIL: %s" % failure)
+    if failures:
+        sys.exit(1)
+    print("OK: leaderboard of %d, board %dx%d swapped in place, resized to %dx%d, bad frames dropped"
+          % (len(MEMBERS), start.shape[0], start.shape[1], other_size.shape[0], other_size.shape[1]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+# Host-side sender of new boards and leaderboards over the badge data link
+#
+# The badge takes frames (see aoc2023_link.py) on its second USB serial
+# channel, which boot.py turns on next to the console: on Linux it shows up
+# as the second /dev/ttyACM*, on macOS as the second /dev/tty.usbmodem*.
+# code.py applies each frame to the running screens, with no reload, and
+# answers with an ACK frame; this waits for it and exits non-zero unless the
+# badge took the frame.
+#
+# a board is a text layout (packed with day14.pack_layout(), needs NumPy) or a
+# binary layout as written by host-tools/day14_pack.py; a leaderboard is a
+# JSON export (packed as host-tools/leaderboard_pack.py does) or a record file.
+#
+# usage: python3 host-tools/link_send.py PORT board layout.txt|layout.bin
+#        python3 host-tools/link_send.py PORT leaderboard leaderboard.json|leaderboard.bin
+
+import argparse
+import json
+import os
+import select
+import sys
+import time
+import tty
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO)
+
+import aoc2023_link as link  # noqa: E402
+
+ACK_TIMEOUT = 5.0  # seconds, a 100x100 board takes the badge well under a second
+STATUS_NAMES = {link.ACK_OK: "ok", link.ACK_BAD: "rejected", link.ACK_UNKNOWN: "unknown frame type"}
+
+
+def board_payload(path, utc_offset=None):
+    if path.endswith(".txt"):
+        import aoc2023_day14 as day14
+        return day14.pack_layout(day14.read_layout(path))
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def leaderboard_payload(path, utc_offset=-5):
+    if path.endswith(".json"):
+        import leaderboard_pack
+        with open(path) as f:
+            return leaderboard_pack.pack(list(json.load(f)["members"].values()), utc_offset)
+    with open(path, "rb") as f:
+        return f.read()
+
+
+PAYLOADS = {"board": (link.BOARD, board_payload), "leaderboard": (link.LEADERBOARD, leaderboard_payload)}
+
+
+def open_port(path):
+    fd = os.open(path, os.O_RDWR | os.O_NOCTTY)
+    tty.setraw(fd)  # no echo or newline translation, the frames are binary
+    return fd
+
+
+def read_acks(fd, n_acks, timeout=ACK_TIMEOUT):
+    # list of the next n_acks ACKs, (type of the frame answered, status),
+    # skipping anything else
+    reader = link.FrameReader()
+    deadline = time.monotonic() + timeout
+    acks = []
+    while len(acks) < n_acks:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0 or not select.select([fd], [], [], remaining)[0]:
+            raise TimeoutError("no ACK from the badge within %.1f s" % timeout)
+        data = os.read(fd, 256)
+        i = 0
+        while True:
+            i = reader.feed(data, i, len(data))
+            if reader.frame_type is None:
+                break
+            payload = bytes(reader.payload())
+            if reader.frame_type == link.ACK and len(payload) == 2:
+                acks.append((payload[0], payload[1]))
+            reader.next()
+    return acks
+
+
+def send(fd, frame_type, payload, timeout=ACK_TIMEOUT):
+    # send one frame and return the ACK status
+    if len(payload) > link.MAX_PAYLOAD:
+        raise ValueError("%d byte payload, the badge takes at most %d" % (len(payload), link.MAX_PAYLOAD))
+    os.write(fd, link.frame(frame_type, payload))
+    (ack_type, status) = read_acks(fd, 1, timeout)[0]
+    if ack_type != frame_type:
+        raise ValueError("ACK of a type %d frame, sent type %d" % (ack_type, frame_type))
+    return status
+
+
+def main():
+    parser = argparse.ArgumentParser(description="send a board or a leaderboard to the badge data link")
+    parser.add_argument("port", help="serial device of the data link (not the console)")
+    parser.add_argument("kind", choices=sorted(PAYLOADS), help="what to send")
+    parser.add_argument("file", help="layout (.txt or .bin) or leaderboard (.json or .bin)")
+    parser.add_argument("--utc-offset", type=float, default=-5, help="time zone of the first to 50 date, hours")
+    parser.add_argument("--timeout", type=float, default=ACK_TIMEOUT, help="seconds to wait for the ACK")
+    args = parser.parse_args()
+
+    (frame_type, make_payload) = PAYLOADS[args.kind]
+    payload = make_payload(args.file, args.utc_offset)
+    fd = open_port(args.port)
+    try:
+        status = send(fd, frame_type, payload, args.timeout)
+    finally:
+        os.close(fd)
+
+    print("%s: %s of %d bytes %s" % (args.port, args.kind, len(payload), STATUS_NAMES.get(status, "status %d" % status)))
+    if status != link.ACK_OK:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
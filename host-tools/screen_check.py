@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+# Host-side check of the demo screen after it is released and built again
+#
+# Runs code.py under the simulator, settles the board tilted north on the demo
+# screen and checks the Load label shows the load.  Then the demo screen is
+# released and built again, first by screen_release() as a resized board from
+# the data link does, then by the warm budget (SCREEN_WARM_BUDGET below zero
+# releases every screen not shown), and each time the board is reset and
+# settled to the same load again: the new label must show it too, not the
+# "   0" it was built with.  Needs NumPy on the host.
+#
+# usage: python3 host-tools/screen_check.py
+
+import contextlib
+import os
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+REPO = os.path.dirname(HERE)
+sys.path.insert(0, REPO)
+
+import aoc2023_day14 as day14  # noqa: E402
+import simulate  # noqa: E402
+
+
+def label_text(ns):
+    field = ns["label_loadval"]
+    return "".join(chr(field[i] + ns["TEXT_FIRST_CHAR"]) for i in range(field.width)).rstrip()
+
+
+def settle_north(ns):
+    # reset the board and let it settle tilted north, returns the load shown
+    ns["demo_init"]()
+    ns["demo_set_falldir"](day14.FALL_UP)
+    while ns["demo_rocks_fall"]():
+        pass
+    return "%4d" % ns["demo_loadval"]
+
+
+def main():
+    os.chdir(REPO)  # the demo screen reads its layout when it is built
+    sim = simulate.Simulator(quiet=True)
+    ns = sim.load(setup_only=True)
+    demo = ns["DGROUP_2023DAY14"]
+    failures = []
+
+    def check(when):
+        expect = settle_north(ns)
+        if label_text(ns) != expect:
+            failures.append("%s: Load label shows %r, expected %r" % (when, label_text(ns), expect))
+
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):  # code.py's console
+        ns["dgroup_show"] = demo
+        ns["screen_show"](demo)
+        check("first build")
+        first = ns["disp_group"][demo]
+
+        ns["screen_release"](demo)
+        ns["screen_show"](demo)
+        check("rebuilt after screen_release()")
+
+        ns["SCREEN_WARM_BUDGET"] = -1
+        ns["dgroup_show"] = ns["DGROUP_MAIN"]
+        ns["screen_show"](ns["DGROUP_MAIN"])
+        if ns["disp_group"][demo] is not None:
+            failures.append("demo screen not released past the warm budget")
+        ns["dgroup_show"] = demo
+        ns["screen_show"](demo)
+        check("rebuilt after the warm budget released it")
+        if ns["disp_group"][demo] is first:
+            failures.append("demo screen was never rebuilt")
+
+    for failure in failures:
+        print("FAIL: %s" % failure)
+    if failures:
+        sys.exit(1)
+    print("OK: Load label shows %s after each rebuild" % label_text(ns).strip())
+
+
+if __name__ == "__main__":
+    main()
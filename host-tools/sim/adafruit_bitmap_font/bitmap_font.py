@@ -0,0 +1,54 @@
+# stand-in for adafruit_bitmap_font.bitmap_font: a small BDF reader
+
+import displayio
+from fontio import Glyph
+
+
+class BDF:
+    def __init__(self, path, bitmap_class=displayio.Bitmap):
+        self.bitmap_class = bitmap_class
+        self.bounding_box = (0, 0, 0, 0)
+        self.glyphs = {}
+        self.glyphs_parsed = 0
+        with open(path, encoding="latin-1") as f:
+            self._parse(f)
+
+    def _parse(self, f):
+        code = None
+        for line in f:
+            words = line.split()
+            if not words:
+                continue
+            key = words[0]
+            if key == "FONTBOUNDINGBOX":
+                self.bounding_box = tuple(int(v) for v in words[1:5])
+            elif key == "ENCODING":
+                code = int(words[1])
+            elif key == "DWIDTH":
+                shift_x = int(words[1])
+                shift_y = int(words[2])
+            elif key == "BBX":
+                (w, h, dx, dy) = (int(v) for v in words[1:5])
+            elif key == "BITMAP":
+                bitmap = self.bitmap_class(w, h, 2)
+                for y in range(h):
+                    bits = int(f.readline().strip() or "0", 16)
+                    nbits = ((w + 7) // 8) * 8
+                    for x in range(w):
+                        if bits & (1 << (nbits - 1 - x)):
+                            bitmap[x, y] = 1
+                self.glyphs[code] = Glyph(bitmap, 0, w, h, dx, dy, shift_x, shift_y)
+                self.glyphs_parsed += 1
+
+    def get_bounding_box(self):
+        return self.bounding_box
+
+    def load_glyphs(self, code_points):
+        pass
+
+    def get_glyph(self, code_point):
+        return self.glyphs.get(code_point)
+
+
+def load_font(filename, bitmap=displayio.Bitmap):
+    return BDF(filename, bitmap)
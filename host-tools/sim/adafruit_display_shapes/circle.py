@@ -0,0 +1,28 @@
+# stand-in for adafruit_display_shapes.circle
+#   like the library, the TileGrid x/y is the top left corner, which is the
+#   center given to the constructor shifted by the radius
+
+import displayio
+
+
+class Circle(displayio.TileGrid):
+    def __init__(self, x0, y0, r, *, fill=None, outline=None, stroke=1):
+        size = 2 * r + 1
+        bitmap = displayio.Bitmap(size, size, 3)
+        palette = displayio.Palette(3)
+        palette.make_transparent(0)
+        palette[1] = 0 if fill is None else fill
+        if fill is None:
+            palette.make_transparent(1)
+        palette[2] = 0 if outline is None else outline
+        for y in range(size):
+            for x in range(size):
+                d2 = (x - r) ** 2 + (y - r) ** 2
+                if d2 <= r * r:
+                    inner = r - stroke
+                    if outline is not None and d2 > inner * inner:
+                        bitmap[x, y] = 2
+                    else:
+                        bitmap[x, y] = 1
+        super().__init__(bitmap, pixel_shader=palette, x=x0 - r, y=y0 - r)
+        self.r = r
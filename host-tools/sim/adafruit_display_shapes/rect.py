@@ -0,0 +1,32 @@
+# stand-in for adafruit_display_shapes.rect
+
+import displayio
+
+
+class Rect(displayio.TileGrid):
+    def __init__(self, x, y, width, height, *, fill=None, outline=None, stroke=1):
+        bitmap = displayio.Bitmap(width, height, 2)
+        palette = displayio.Palette(2)
+        if outline is not None:
+            palette[1] = outline
+            for w in range(width):
+                for s in range(stroke):
+                    bitmap[w, s] = 1
+                    bitmap[w, height - 1 - s] = 1
+            for h in range(height):
+                for s in range(stroke):
+                    bitmap[s, h] = 1
+                    bitmap[width - 1 - s, h] = 1
+        if fill is None:
+            palette.make_transparent(0)
+        else:
+            palette[0] = fill
+        super().__init__(bitmap, pixel_shader=palette, x=x, y=y)
+
+    @property
+    def fill(self):
+        return self.pixel_shader[0]
+
+    @fill.setter
+    def fill(self, color):
+        self.pixel_shader[0] = color
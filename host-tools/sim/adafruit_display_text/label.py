@@ -0,0 +1,114 @@
+# stand-in for adafruit_display_text.label: renders the whole text into one
+#   bitmap instead of one TileGrid per glyph, which is all the harness needs
+
+import displayio
+
+
+class Label(displayio.Group):
+    def __init__(self, font, *, text="", color=0xFFFFFF, line_spacing=1.25,
+                 anchor_point=None, anchored_position=None, scale=1, **kwargs):
+        super().__init__(scale=scale)
+        self.font = font
+        self._palette = displayio.Palette(2)
+        self._palette.make_transparent(0)
+        self._color = color
+        self._palette[1] = 0 if color is None else color
+        self.line_spacing = line_spacing
+        self._anchor_point = (0.0, 0.0)
+        self._anchored_position = (0, 0)
+        self._text = None
+        self.text_updates = 0
+        self._tilegrid = None
+        self.text = text
+        if anchor_point is not None:
+            self.anchor_point = anchor_point
+        if anchored_position is not None:
+            self.anchored_position = anchored_position
+
+    def _render(self):
+        (bb_w, bb_h, bb_dx, bb_dy) = self.font.get_bounding_box()
+        lines = self._text.split("\n")
+        line_h = int(bb_h * self.line_spacing)
+        width = 1
+        for line in lines:
+            w = 0
+            for c in line:
+                glyph = self.font.get_glyph(ord(c))
+                if glyph is not None:
+                    w += glyph.shift_x
+            width = max(width, w)
+        height = bb_h + line_h * (len(lines) - 1)
+        bitmap = displayio.Bitmap(width, height, 2)
+        baseline = bb_h + bb_dy
+        for (iline, line) in enumerate(lines):
+            cursor = 0
+            for c in line:
+                glyph = self.font.get_glyph(ord(c))
+                if glyph is None:
+                    continue
+                top = iline * line_h + baseline - (glyph.height + glyph.dy)
+                tpr = glyph.bitmap.width // glyph.width if glyph.width else 1
+                sx = (glyph.tile_index % tpr) * glyph.width
+                sy = (glyph.tile_index // tpr) * glyph.height
+                for y in range(glyph.height):
+                    for x in range(glyph.width):
+                        if glyph.bitmap[sx + x, sy + y]:
+                            px = cursor + glyph.dx + x
+                            py = top + y
+                            if 0 <= px < width and 0 <= py < height:
+                                bitmap[px, py] = 1
+                cursor += glyph.shift_x
+        self._size = (width, height)
+        self._tilegrid = displayio.TileGrid(bitmap, pixel_shader=self._palette)
+        while len(self):
+            self.pop()
+        self.append(self._tilegrid)
+        self._place()
+
+    def _place(self):
+        (w, h) = self._size
+        (ax, ay) = self._anchor_point
+        (px, py) = self._anchored_position
+        self.x = int(round(px - ax * w))
+        self.y = int(round(py - ay * h))
+
+    @property
+    def text(self):
+        return self._text
+
+    @text.setter
+    def text(self, value):
+        self._text = value
+        self.text_updates += 1
+        self._render()
+
+    @property
+    def color(self):
+        return self._color
+
+    @color.setter
+    def color(self, value):
+        self._color = value
+        self._palette[1] = 0 if value is None else value
+
+    @property
+    def anchor_point(self):
+        return self._anchor_point
+
+    @anchor_point.setter
+    def anchor_point(self, value):
+        self._anchor_point = value
+        self._place()
+
+    @property
+    def anchored_position(self):
+        return self._anchored_position
+
+    @anchored_position.setter
+    def anchored_position(self, value):
+        self._anchored_position = value
+        self._place()
+
+    @property
+    def bounding_box(self):
+        return (0, 0) + self._size
@@ -0,0 +1,73 @@
+# stand-in for the adafruit_lis3dh accelerometer library
+#   acceleration readings come from VECTOR, a function of virtual time that
+#   the harness installs; the default is the badge held upright.  with the
+#   data-ready interrupt enabled (CTRL_REG3 I1_DRDY1), int1 reads high once
+#   a new sample is due at data_rate and low again after acceleration is read.
+
+import time
+
+STANDARD_GRAVITY = 9.806
+
+RANGE_16_G = 0b11
+RANGE_8_G = 0b10
+RANGE_4_G = 0b01
+RANGE_2_G = 0b00
+
+DATARATE_1344_HZ = 0b1001
+DATARATE_400_HZ = 0b0111
+DATARATE_200_HZ = 0b0110
+DATARATE_100_HZ = 0b0101
+DATARATE_50_HZ = 0b0100
+DATARATE_25_HZ = 0b0011
+DATARATE_10_HZ = 0b0010
+DATARATE_1_HZ = 0b0001
+DATARATE_POWERDOWN = 0
+DATARATE_LOWPOWER_1K6HZ = 0b1000
+DATARATE_LOWPOWER_5KHZ = 0b1001
+
+_RATE_HZ = {DATARATE_1344_HZ: 1344, DATARATE_400_HZ: 400, DATARATE_200_HZ: 200, DATARATE_100_HZ: 100,
+            DATARATE_50_HZ: 50, DATARATE_25_HZ: 25, DATARATE_10_HZ: 10, DATARATE_1_HZ: 1,
+            DATARATE_POWERDOWN: 0, DATARATE_LOWPOWER_1K6HZ: 1600}
+
+_REG_CTRL3 = 0x22
+_I1_DRDY1 = 0x10
+
+
+def VECTOR(now):
+    return (0.0, STANDARD_GRAVITY, 0.0)
+
+
+class LIS3DH_I2C:
+    def __init__(self, i2c, *, address=0x18, int1=None, int2=None):
+        self._registers = i2c.registers.setdefault(address, {})  # shared with writes straight on the bus
+        self.range = RANGE_4_G
+        self.data_rate = DATARATE_400_HZ
+        self._int1 = int1
+        self.reads = 0
+        self._sample_read = -1  # index of the last sample read
+        if int1 is not None:
+            int1.read_hook = self._drdy
+
+    def _sample(self):
+        # index of the latest sample taken at data_rate
+        return int(time.monotonic() * _RATE_HZ[self.data_rate])
+
+    def _drdy(self):
+        if not self._registers.get(_REG_CTRL3, 0) & _I1_DRDY1:
+            return False
+        return self._sample() > self._sample_read
+
+    @property
+    def acceleration(self):
+        self.reads += 1
+        self._sample_read = self._sample()
+        return VECTOR(time.monotonic())
+
+    def shake(self, shake_threshold=30, avg_count=10, total_delay=0.1):
+        return False
+
+    def _read_register_byte(self, register):
+        return self._registers.get(register, 0)
+
+    def _write_register_byte(self, register, value):
+        self._registers[register] = value
@@ -0,0 +1,28 @@
+# stand-in for the CircuitPython "bitmaptools" module
+#   readinto() follows the CircuitPython implementation for 1, 2, 4 and 8 bits
+#   per pixel: rows padded to a whole element, pixel x at the low bits of its
+#   byte unless reverse_pixels_in_element
+
+import numpy as _np
+
+
+def readinto(bitmap, file, bits_per_pixel, element_size=1, reverse_pixels_in_element=False,
+             swap_bytes_in_element=False, reverse_rows=False):
+    if bits_per_pixel not in (1, 2, 4, 8):
+        raise NotImplementedError("bits_per_pixel %d" % bits_per_pixel)
+    row_bytes = (bitmap.width * bits_per_pixel + 8 * element_size - 1) // (8 * element_size) * element_size
+    data = file.read(row_bytes * bitmap.height)
+    if len(data) < row_bytes * bitmap.height:
+        raise EOFError()
+    rows = _np.frombuffer(data, dtype=_np.uint8).reshape(bitmap.height, row_bytes)
+    if swap_bytes_in_element:
+        rows = rows.reshape(bitmap.height, -1, element_size)[:, :, ::-1].reshape(bitmap.height, row_bytes)
+    per_byte = 8 // bits_per_pixel
+    x = _np.arange(bitmap.width)
+    shift = (x % per_byte) * bits_per_pixel
+    if reverse_pixels_in_element:
+        shift = 8 - bits_per_pixel - shift
+    values = (rows[:, x // per_byte] >> shift) & ((1 << bits_per_pixel) - 1)
+    if reverse_rows:
+        values = values[::-1]
+    bitmap.data[:, :] = values
@@ -0,0 +1,42 @@
+# stand-in for the CircuitPython "board" module of the Adafruit PyBadge
+
+import displayio
+
+BUTTON_CLOCK = "BUTTON_CLOCK"
+BUTTON_OUT = "BUTTON_OUT"
+BUTTON_LATCH = "BUTTON_LATCH"
+NEOPIXEL = "NEOPIXEL"
+ACCELEROMETER_INTERRUPT = "ACCELEROMETER_INTERRUPT"
+
+DISPLAY = displayio.Display(160, 128)
+
+
+class _I2C:
+    # the board I2C bus: register writes (register address, then the bytes
+    # from it on) land in registers[device address], which the device
+    # stand-ins read
+    def __init__(self):
+        self.registers = {}
+        self._locked = False
+
+    def try_lock(self):
+        if self._locked:
+            return False
+        self._locked = True
+        return True
+
+    def unlock(self):
+        self._locked = False
+
+    def writeto(self, address, buffer, *, start=0, end=None):
+        data = bytes(buffer[start:end])
+        device = self.registers.setdefault(address, {})
+        for (i, value) in enumerate(data[1:]):
+            device[data[0] + i] = value
+
+
+_i2c = _I2C()
+
+
+def I2C():
+    return _i2c
@@ -0,0 +1,41 @@
+# stand-in for the CircuitPython "digitalio" module
+
+
+class Direction:
+    INPUT = "INPUT"
+    OUTPUT = "OUTPUT"
+
+
+class Pull:
+    UP = "UP"
+    DOWN = "DOWN"
+
+
+class DigitalInOut:
+    def __init__(self, pin):
+        self.pin = pin
+        self.direction = Direction.INPUT
+        self.pull = None
+        self._value = False
+        self.read_hook = None  # set by the devices wired to the pin
+
+    @property
+    def value(self):
+        if self.read_hook is not None:
+            return self.read_hook()
+        return self._value
+
+    @value.setter
+    def value(self, value):
+        self._value = value
+
+    def switch_to_input(self, pull=None):
+        self.direction = Direction.INPUT
+        self.pull = pull
+
+    def switch_to_output(self, value=False, **kwargs):
+        self.direction = Direction.OUTPUT
+        self._value = value
+
+    def deinit(self):
+        pass
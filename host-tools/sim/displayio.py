@@ -0,0 +1,209 @@
+# stand-in for the CircuitPython "displayio" module
+#   only what code.py uses: Bitmap, Palette, TileGrid, Group and a framebuffer
+#   backed Display.  render() composites a group tree into an RGB numpy array.
+
+import numpy as _np
+
+
+def _rgb(color):
+    if isinstance(color, int):
+        return ((color >> 16) & 0xFF, (color >> 8) & 0xFF, color & 0xFF)
+    return tuple(color[:3])
+
+
+class Bitmap:
+    def __init__(self, width, height, value_count):
+        self.width = width
+        self.height = height
+        self.value_count = value_count
+        self.data = _np.zeros((height, width), dtype=_np.uint32)
+
+    def _xy(self, index):
+        if isinstance(index, tuple):
+            return index
+        return (index % self.width, index // self.width)
+
+    def __getitem__(self, index):
+        (x, y) = self._xy(index)
+        return int(self.data[y, x])
+
+    def __setitem__(self, index, value):
+        (x, y) = self._xy(index)
+        self.data[y, x] = value
+
+    def fill(self, value):
+        self.data[:, :] = value
+
+
+class Palette:
+    def __init__(self, color_count):
+        self.colors = _np.zeros((color_count, 3), dtype=_np.uint8)
+        self.opaque = _np.ones(color_count, dtype=bool)
+
+    def __len__(self):
+        return len(self.opaque)
+
+    def __setitem__(self, index, color):
+        self.colors[index] = _rgb(color)
+
+    def __getitem__(self, index):
+        (r, g, b) = self.colors[index]
+        return (int(r) << 16) | (int(g) << 8) | int(b)
+
+    def make_transparent(self, index):
+        self.opaque[index] = False
+
+    def make_opaque(self, index):
+        self.opaque[index] = True
+
+    def is_transparent(self, index):
+        return not self.opaque[index]
+
+
+class TileGrid:
+    def __init__(self, bitmap, *, pixel_shader, width=1, height=1,
+                 tile_width=None, tile_height=None, default_tile=0, x=0, y=0):
+        self.bitmap = bitmap
+        self.pixel_shader = pixel_shader
+        self.width = width
+        self.height = height
+        self.tile_width = bitmap.width if tile_width is None else tile_width
+        self.tile_height = bitmap.height if tile_height is None else tile_height
+        self.tiles = _np.full((height, width), default_tile, dtype=_np.uint16)
+        self.x = x
+        self.y = y
+        self.hidden = False
+
+    def _xy(self, index):
+        if isinstance(index, tuple):
+            return index
+        return (index % self.width, index // self.width)
+
+    def __getitem__(self, index):
+        (x, y) = self._xy(index)
+        return int(self.tiles[y, x])
+
+    def __setitem__(self, index, value):
+        (x, y) = self._xy(index)
+        self.tiles[y, x] = value
+
+    def pixels(self):
+        # returns (rgb, opaque) arrays for the whole grid
+        tw = self.tile_width
+        th = self.tile_height
+        per_row = self.bitmap.width // tw
+        src = self.bitmap.data
+        idx = _np.empty((self.height * th, self.width * tw), dtype=_np.uint32)
+        for ty in range(self.height):
+            for tx in range(self.width):
+                t = int(self.tiles[ty, tx])
+                sx = (t % per_row) * tw
+                sy = (t // per_row) * th
+                idx[ty * th:(ty + 1) * th, tx * tw:(tx + 1) * tw] = src[sy:sy + th, sx:sx + tw]
+        shader = self.pixel_shader
+        idx = _np.minimum(idx, len(shader) - 1)
+        return (shader.colors[idx], shader.opaque[idx])
+
+
+class Group:
+    def __init__(self, *, scale=1, x=0, y=0):
+        self.scale = scale
+        self.x = x
+        self.y = y
+        self.hidden = False
+        self._layers = []
+
+    def append(self, layer):
+        self._layers.append(layer)
+
+    def insert(self, index, layer):
+        self._layers.insert(index, layer)
+
+    def pop(self, index=-1):
+        return self._layers.pop(index)
+
+    def remove(self, layer):
+        self._layers.remove(layer)
+
+    def index(self, layer):
+        return self._layers.index(layer)
+
+    def __len__(self):
+        return len(self._layers)
+
+    def __getitem__(self, index):
+        return self._layers[index]
+
+    def __setitem__(self, index, layer):
+        self._layers[index] = layer
+
+    def __iter__(self):
+        return iter(self._layers)
+
+
+def _composite(canvas, layer, ox, oy, scale):
+    if layer is None or getattr(layer, "hidden", False):
+        return
+    if isinstance(layer, Group):
+        s = scale * layer.scale
+        for child in layer:
+            _composite(canvas, child, ox + layer.x * scale, oy + layer.y * scale, s)
+        return
+    (rgb, opaque) = layer.pixels()
+    if scale != 1:
+        rgb = rgb.repeat(scale, axis=0).repeat(scale, axis=1)
+        opaque = opaque.repeat(scale, axis=0).repeat(scale, axis=1)
+    x0 = ox + layer.x * scale
+    y0 = oy + layer.y * scale
+    (h, w) = opaque.shape
+    (ch, cw) = canvas.shape[:2]
+    cx0 = max(x0, 0)
+    cy0 = max(y0, 0)
+    cx1 = min(x0 + w, cw)
+    cy1 = min(y0 + h, ch)
+    if cx0 >= cx1 or cy0 >= cy1:
+        return
+    sub_rgb = rgb[cy0 - y0:cy1 - y0, cx0 - x0:cx1 - x0]
+    sub_mask = opaque[cy0 - y0:cy1 - y0, cx0 - x0:cx1 - x0]
+    region = canvas[cy0:cy1, cx0:cx1]
+    region[sub_mask] = sub_rgb[sub_mask]
+
+
+def render(group, width, height):
+    canvas = _np.zeros((height, width, 3), dtype=_np.uint8)
+    if group is not None:
+        _composite(canvas, group, 0, 0, 1)
+    return canvas
+
+
+class Display:
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.root_group = None
+        self.auto_refresh = True
+        self.brightness = 1.0
+        self.refresh_count = 0
+        self.on_refresh = None  # set by the harness
+        self._frame = None  # what the panel shows, once auto_refresh is off
+
+    def show(self, group):
+        self.root_group = group
+
+    def refresh(self, *, target_frames_per_second=None, minimum_frames_per_second=0):
+        self.refresh_count += 1
+        if not self.auto_refresh:
+            self._frame = render(self.root_group, self.width, self.height)
+        if self.on_refresh is not None:
+            self.on_refresh(self)
+        return True
+
+    def render(self):
+        # with auto_refresh off the panel only changes on refresh()
+        if not self.auto_refresh and self._frame is not None:
+            return self._frame.copy()
+        return render(self.root_group, self.width, self.height)
+
+
+def release_displays():
+    pass
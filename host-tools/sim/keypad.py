@@ -0,0 +1,68 @@
+# stand-in for the CircuitPython "keypad" module
+#   key events come from a script installed by the harness:
+#   SCRIPT is a list of (time, key_number, pressed) sorted by time, and
+#   events become visible once the virtual clock passes their time.
+
+import time
+
+SCRIPT = []
+
+
+class Event:
+    def __init__(self, key_number=0, pressed=True, timestamp=0):
+        self.key_number = key_number
+        self.pressed = pressed
+        self.released = not pressed
+        self.timestamp = timestamp
+
+    def __eq__(self, other):
+        return (self.key_number, self.pressed) == (other.key_number, other.pressed)
+
+
+class EventQueue:
+    def __init__(self):
+        self._pending = []
+        self.overflowed = False
+
+    def _poll(self):
+        now = time.monotonic()
+        while SCRIPT and SCRIPT[0][0] <= now:
+            (t, key_number, pressed) = SCRIPT.pop(0)
+            self._pending.append(Event(key_number, pressed, int(t * 1000)))
+
+    def get(self):
+        self._poll()
+        if self._pending:
+            return self._pending.pop(0)
+        return None
+
+    def get_into(self, event):
+        ev = self.get()
+        if ev is None:
+            return False
+        event.key_number = ev.key_number
+        event.pressed = ev.pressed
+        event.released = ev.released
+        event.timestamp = ev.timestamp
+        return True
+
+    def clear(self):
+        self._poll()
+        self._pending = []
+
+    def __len__(self):
+        self._poll()
+        return len(self._pending)
+
+
+class ShiftRegisterKeys:
+    def __init__(self, *, clock, data, latch, key_count=8, value_when_pressed=True,
+                 value_to_latch=True, interval=0.020, max_events=64):
+        self.key_count = key_count
+        self.events = EventQueue()
+
+    def reset(self):
+        pass
+
+    def deinit(self):
+        pass
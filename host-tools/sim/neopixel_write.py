@@ -0,0 +1,11 @@
+# stand-in for the CircuitPython "neopixel_write" module
+#   the last buffer written to each pin is kept in written, by pin name
+
+written = {}
+write_count = 0
+
+
+def neopixel_write(digitalinout, buf):
+    global write_count
+    written[digitalinout.pin] = bytes(buf)
+    write_count += 1
@@ -0,0 +1 @@
+# stand-in for the CircuitPython "ulab" package, backed by NumPy
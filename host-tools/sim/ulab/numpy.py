@@ -0,0 +1,7 @@
+# stand-in for ulab.numpy: NumPy plus the few names that differ in ulab
+
+from numpy import *  # noqa: F401,F403
+import numpy as _np
+
+float = _np.float64
+bool = _np.bool_
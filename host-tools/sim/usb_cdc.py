@@ -0,0 +1,36 @@
+# stand-in for the CircuitPython "usb_cdc" module
+#   data is None, as on a badge without boot.py, unless a harness sets it to a
+#   Serial over a file descriptor (host-tools/link_loopback.py uses the slave
+#   end of a pseudo-terminal)
+
+import fcntl
+import os
+import struct
+import termios
+
+console = None
+data = None
+
+
+class Serial:
+    def __init__(self, fd):
+        self.fd = fd
+        self.timeout = 1.0
+        self.write_timeout = None
+        os.set_blocking(fd, False)
+
+    @property
+    def in_waiting(self):
+        return struct.unpack("i", fcntl.ioctl(self.fd, termios.FIONREAD, b"\0\0\0\0"))[0]
+
+    def readinto(self, buf):
+        # non-blocking whatever the timeout, the virtual clock cannot wait for the host
+        try:
+            data = os.read(self.fd, len(buf))
+        except BlockingIOError:
+            return None
+        buf[:len(data)] = data
+        return len(data)
+
+    def write(self, data):
+        return os.write(self.fd, data)
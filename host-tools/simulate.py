@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+# Headless host simulator for code.py
+#
+# Runs the real code.py under CPython with the stand-in CircuitPython modules
+# in sim/ (framebuffer display, scripted buttons and accelerometer, ulab.numpy
+# mapped to NumPy) and a virtual monotonic clock, so the screens can be
+# exercised and timed without a PyBadge.  Needs NumPy on the host.
+#
+# examples:
+#   python3 host-tools/simulate.py --seconds 20 --key 2 --key 8 --tilt 12:left
+#   python3 host-tools/simulate.py --seconds 5 --key 0.5 --key 1 --frames /tmp/frames --fps 5
+#   python3 host-tools/simulate.py --seconds 20 --key 2 --key 4 --time-calls demo_rocks_fall
+
+import argparse
+import builtins
+import gc
+import os
+import struct
+import sys
+import time
+import zlib
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+REPO = os.path.dirname(HERE)
+SIM_DIR = os.path.join(HERE, "sim")
+CODE_PY = os.path.join(REPO, "code.py")
+
+LOOP_MARKER = "# LOOP ---"  # start of the main loop section in code.py
+
+HEAP_BYTES = 192 * 1024  # SAMD51J19 RAM, used to fake gc.mem_free()
+
+TILT_G = 9.806
+TILTS = {
+    "flat":  (0.0, 0.0, TILT_G),
+    "down":  (0.0, TILT_G, 0.0),
+    "up":    (0.0, -TILT_G, 0.0),
+    "right": (TILT_G, 0.0, 0.0),
+    "left":  (-TILT_G, 0.0, 0.0),
+}
+
+
+class SimulationDone(BaseException):
+    # BaseException so "except Exception" in code.py cannot swallow it
+    pass
+
+
+class VirtualClock:
+    # time only moves when code.py asks for it (call_cost per monotonic() call)
+    # or sleeps, so runs are deterministic and independent of host speed
+
+    def __init__(self, call_cost=0.0002):
+        self.now = 0.0
+        self.call_cost = call_cost
+        self.end = None
+        self.listeners = []
+        self.slept = 0.0
+
+    def advance(self, dt):
+        self.now += dt
+        for listener in self.listeners:
+            listener(self.now)
+        if self.end is not None and self.now >= self.end:
+            raise SimulationDone()
+
+    def monotonic(self):
+        self.advance(self.call_cost)
+        return self.now
+
+    def monotonic_ns(self):
+        return int(self.monotonic() * 1e9)
+
+    def sleep(self, seconds):
+        self.slept += max(seconds, 0.0)
+        self.advance(max(seconds, 0.0))
+
+
+def write_png(path, rgb):
+    # minimal truecolor PNG writer so the harness does not need Pillow
+    (h, w) = rgb.shape[:2]
+    raw = b"".join(b"\x00" + rgb[y].tobytes() for y in range(h))
+
+    def chunk(tag, data):
+        body = tag + data
+        return struct.pack(">I", len(data)) + body + struct.pack(">I", zlib.crc32(body) & 0xFFFFFFFF)
+
+    with open(path, "wb") as f:
+        f.write(b"\x89PNG\r\n\x1a\n")
+        f.write(chunk(b"IHDR", struct.pack(">IIBBBBB", w, h, 8, 2, 0, 0, 0)))
+        f.write(chunk(b"IDAT", zlib.compress(raw, 6)))
+        f.write(chunk(b"IEND", b""))
+
+
+class Simulator:
+
+    def __init__(self, call_cost=0.0002, quiet=False, root=REPO):
+        # root is the directory standing in for the CIRCUITPY drive, where
+        # code.py finds its data files (layouts, fonts)
+        self.clock = VirtualClock(call_cost)
+        self.quiet = quiet
+        self.root = root
+        self.namespace = None
+        self.frames_written = 0
+        self.timed_calls = {}  # function name -> [calls, host seconds]
+        self._install()
+
+    def _install(self):
+        # stand-ins first, then the CIRCUITPY root for the modules next to code.py
+        for path in (REPO, SIM_DIR):
+            if path not in sys.path:
+                sys.path.insert(0, path)
+        time.monotonic = self.clock.monotonic
+        time.monotonic_ns = self.clock.monotonic_ns
+        time.sleep = self.clock.sleep
+        builtins.const = lambda value: value
+        gc.mem_free = self.mem_free
+        gc.mem_alloc = self.mem_alloc
+
+    def mem_alloc(self):
+        import tracemalloc
+        if tracemalloc.is_tracing():
+            return tracemalloc.get_traced_memory()[0]
+        return 0
+
+    def mem_free(self):
+        return max(HEAP_BYTES - self.mem_alloc(), 0)
+
+    @property
+    def display(self):
+        import board
+        return board.DISPLAY
+
+    def script_keys(self, presses, hold=0.1):
+        # presses: list of (time, key_number)
+        import keypad
+        events = []
+        for (t, key_number) in presses:
+            events.append((t, key_number, True))
+            events.append((t + hold, key_number, False))
+        keypad.SCRIPT[:] = sorted(events)
+
+    def script_tilts(self, tilts):
+        # tilts: list of (time, (x, y, z)), held until the next entry
+        import adafruit_lis3dh
+        tilts = sorted(tilts)
+
+        def vector(now):
+            current = TILTS["down"]
+            for (t, v) in tilts:
+                if t <= now:
+                    current = v
+            return current
+
+        adafruit_lis3dh.VECTOR = vector
+
+    def capture_frames(self, directory, fps):
+        os.makedirs(directory, exist_ok=True)
+        state = {"next": 0.0}
+
+        def listener(now):
+            if now >= state["next"]:
+                state["next"] = now + 1.0 / fps
+                self.save_frame(os.path.join(directory, "frame_%05d.png" % self.frames_written))
+
+        self.clock.listeners.append(listener)
+
+    def save_frame(self, path):
+        write_png(path, self.display.render())
+        self.frames_written += 1
+
+    def time_calls(self, name):
+        # wrap the code.py function name (after setup, before the loop) to
+        # count its calls and the host time they take
+        function = self.namespace[name]
+        stats = self.timed_calls.setdefault(name, [0, 0.0])
+
+        def timed(*args, **kwargs):
+            t_start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                stats[0] += 1
+                stats[1] += time.perf_counter() - t_start
+
+        self.namespace[name] = timed
+
+    def _exec(self, source, first_line):
+        # exec a part of code.py from the CIRCUITPY root (it opens its data
+        # files relative to it), keeping code.py line numbers
+        cwd = os.getcwd()
+        os.chdir(self.root)
+        stdout = sys.stdout
+        if self.quiet:
+            sys.stdout = open(os.devnull, "w")
+        try:
+            exec(compile("\n" * first_line + source, CODE_PY, "exec"), self.namespace)
+        finally:
+            if self.quiet:
+                sys.stdout.close()
+                sys.stdout = stdout
+            os.chdir(cwd)
+
+    def load(self, setup_only=False, timed=()):
+        # run the setup part of code.py, then (unless setup_only) the LOOP
+        # section in the same namespace, with the functions in timed wrapped
+        with open(CODE_PY) as f:
+            source = f.read()
+        split = source.index(LOOP_MARKER)
+        self.namespace = {"__name__": "__main__", "__file__": CODE_PY}
+        self._exec(source[:split], 0)
+        if not setup_only:
+            for name in timed:
+                self.time_calls(name)
+            self._exec(source[split:], source.count("\n", 0, split))
+        return self.namespace
+
+    def run(self, seconds, timed=()):
+        self.clock.end = self.clock.now + seconds
+        try:
+            self.load(timed=timed)
+        except SimulationDone:
+            pass
+        finally:
+            self.clock.end = None
+        return self.namespace
+
+
+def parse_key(text):
+    # "T" or "T:KEY" -> (T, KEY); default key 0 (B)
+    (t, _, key_number) = text.partition(":")
+    return (float(t), int(key_number or 0))
+
+
+def parse_tilt(text):
+    # "T:NAME" or "T:X,Y,Z"
+    (t, _, vector) = text.partition(":")
+    if vector in TILTS:
+        return (float(t), TILTS[vector])
+    return (float(t), tuple(float(v) for v in vector.split(",")))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="run code.py headless with a virtual clock")
+    parser.add_argument("--seconds", type=float, default=10.0, help="virtual seconds to run")
+    parser.add_argument("--key", action="append", default=[], type=parse_key,
+                        help="key press at T seconds, as T or T:KEY_NUMBER (repeatable)")
+    parser.add_argument("--tilt", action="append", default=[], type=parse_tilt,
+                        help="accelerometer from T seconds, as T:flat|up|down|left|right or T:X,Y,Z")
+    parser.add_argument("--frames", help="directory to dump PNG frames into")
+    parser.add_argument("--fps", type=float, default=10.0, help="frame dump rate (virtual time)")
+    parser.add_argument("--final", help="write the last frame to this PNG file")
+    parser.add_argument("--time-calls", action="append", default=[], metavar="FUNCTION",
+                        help="count calls to a code.py function and their host time (repeatable)")
+    parser.add_argument("--quiet", action="store_true", help="hide code.py console output")
+    parser.add_argument("--root", default=REPO,
+                        help="directory standing in for CIRCUITPY, with the data files (default: the repo)")
+    args = parser.parse_args()
+
+    sim = Simulator(quiet=args.quiet, root=args.root)
+    sim.script_keys(args.key)
+    sim.script_tilts(args.tilt)
+    if args.frames:
+        sim.capture_frames(args.frames, args.fps)
+
+    wall = time.perf_counter()
+    sim.run(args.seconds, timed=args.time_calls)
+    wall = time.perf_counter() - wall
+
+    if args.final:
+        sim.save_frame(args.final)
+    print("SIM: %.1f virtual s in %.2f host s, %d display refreshes, %d frames written"
+          % (sim.clock.now, wall, sim.display.refresh_count, sim.frames_written))
+    for (name, (calls, seconds)) in sim.timed_calls.items():
+        print("SIM: %s: %d calls, %.1f us host time per call"
+              % (name, calls, 1e6 * seconds / max(calls, 1)))
+
+
+if __name__ == "__main__":
+    main()